@@ -0,0 +1,34 @@
+import gc as garbage
+import time
+import tracemalloc
+
+# Timing shared by the benchmark scripts, which import it from their own directory (python benchmarks/<script>.py puts
+# that directory first on sys.path). Every time is the best of several calls, which is the least disturbed by other load.
+
+def Time(function, repeats=3, warmup=False, longest=None):
+    # Returns (best time in seconds, result of the last call) of repeats calls of a function without arguments. With warmup,
+    # function is first called once untimed (e.g. to fill caches); calls stop early after one that takes more than longest seconds.
+    if warmup:
+        function()
+    times = []
+    for repeat in range(repeats):
+        # drop the previous result first, so that large results are not held twice
+        result = None
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+        if longest is not None and times[-1] > longest:
+            break
+    return min(times), result
+
+def Measure(function, repeats=3, warmup=False, longest=None):
+    # Returns (best time in seconds, peak traced memory in bytes, result) of a function timed as by Time; memory is
+    # measured in one more, untimed call, whose result is returned.
+    seconds, result = Time(function, repeats, warmup, longest)
+    del result
+    garbage.collect()
+    tracemalloc.start()
+    result = function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak, result
@@ -0,0 +1,50 @@
+import numpy as np
+from freeformdeformation import geom_classes as gc
+from freeformdeformation import geom_functions as gf
+from math import sqrt
+
+# Compares adaptive tessellation against the smallest uniform grid that meets the same chordal deviation tolerance,
+# reporting vertex, triangle and evaluation counts for each.
+
+# cylinder from examples/NURBS_surface_cylinder.py
+cylinder = gc.NURBSSurface()
+cylinder.controlPoints = [[[0, 1, 0], [1, 1, 0], [1, 0, 0], [1, -1, 0], [0, -1, 0], [-1, -1, 0], [-1, 0, 0], [-1, 1, 0], [0, 1, 0]],
+                          [[0, 1, 1], [1, 1, 1], [1, 0, 1], [1, -1, 1], [0, -1, 1], [-1, -1, 1], [-1, 0, 1], [-1, 1, 1], [0, 1, 1]]]
+cylinder.weights = [[1, sqrt(2)/2, 1, sqrt(2)/2, 1, sqrt(2)/2, 1, sqrt(2)/2, 1]] * 2
+cylinder.degree1 = 1
+cylinder.degree2 = 2
+cylinder.knotVector1 = gf.KnotVector(2, 1)
+cylinder.knotVector2 = [0, 0, 0, 1/4, 1/4, 1/2, 1/2, 3/4, 3/4, 1, 1, 1]
+
+# bicubic plate with a sharp bump in one corner and a heavily weighted control point
+n = 12
+u, v = np.meshgrid(np.linspace(0, 1, n), np.linspace(0, 1, n), indexing='ij')
+bump = gc.NURBSSurface()
+bump.controlPoints = np.stack([u, v, 0.3 * np.exp(-((u - 0.2) ** 2 + (v - 0.2) ** 2) / 0.01)], axis=-1)
+weights = np.ones((n, n))
+weights[8, 8] = 20
+bump.weights = weights
+bump.degree1 = 3
+bump.degree2 = 3
+bump.knotVector1 = gf.KnotVector(n, 3)
+bump.knotVector2 = gf.KnotVector(n, 3)
+
+def UniformTessellation(surface, tolerance):
+    # Returns the adaptive tessellation and the coarsest uniform knot-aligned grid within tolerance, with the number of
+    # segments per knot span in each direction in proportion to the adaptive result.
+    adaptive = surface.Tessellate(tolerance)
+    knots = [np.unique(knotVector[degree:len(knotVector) - degree]) for knotVector, degree in ((surface.knotVector1, surface.degree1), (surface.knotVector2, surface.degree2))]
+    density = np.array([(len(breaks) - 1) / (len(k) - 1) for breaks, k in zip(adaptive.breaks, knots)])
+    for segments in range(1, 10000):
+        perSpan = np.maximum(1, np.round(segments * density / density.max())).astype(int)
+        breaks = [np.append(np.concatenate([np.linspace(a, b, m + 1)[:-1] for a, b in zip(k[:-1], k[1:])]), k[-1]) for k, m in zip(knots, perSpan)]
+        uniform = surface.Tessellate(tolerance, maxIterations=0, breaks=breaks)
+        if uniform.deviation <= tolerance:
+            return adaptive, uniform
+
+for name, surface in (('cylinder', cylinder), ('bump', bump)):
+    print(name)
+    for tolerance in (1e-2, 1e-3, 1e-4):
+        adaptive, uniform = UniformTessellation(surface, tolerance)
+        print('    tolerance {:.0e}: adaptive {}'.format(tolerance, adaptive))
+        print('                      uniform  {}'.format(uniform))
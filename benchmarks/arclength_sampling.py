@@ -0,0 +1,46 @@
+import sys
+import numpy as np
+from freeformdeformation import geom_classes as gc
+from _timing import Time
+
+# Compares sampling an airfoil-like NURBS curve at points equally spaced in arc length by oversampling in parameter and
+# interpolating the cumulative chord length (the usual workaround) with Evaluate(spacing='arclength'), which inverts a
+# Gauss-Legendre arc length table. The spacing error is the largest deviation of the true arc length between neighbouring
+# samples from the ideal spacing, relative to that spacing.
+# usage: python arclength_sampling.py [number of samples]
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+# NACA 0012 section from the trailing edge over the upper surface, around the leading edge and back, clustered at the nose
+x = (1 - np.cos(np.linspace(0, np.pi, 40))) / 2
+y = 0.6 * (0.2969 * np.sqrt(x) - 0.1260 * x - 0.3516 * x ** 2 + 0.2843 * x ** 3 - 0.1036 * x ** 4)
+controlPoints = np.concatenate([np.stack([x, y], axis=1)[::-1], np.stack([x, -y], axis=1)[1:]])
+weights = np.ones(len(controlPoints))
+weights[len(x) - 1] = 2
+curve = gc.NURBSCurve(controlPoints=controlPoints, weights=weights, degree=3)
+reference = gc.ArcLengthTable(curve.knotVector, curve.degree, curve.Pw, segments=16, points=16, tolerance=1e-15)
+
+def SpacingError(parameters):
+    spacing = np.diff(reference.LengthsAt(parameters))
+    ideal = reference.length / (len(parameters) - 1)
+    return np.abs(spacing - ideal).max() / ideal
+
+def Oversampled(factor):
+    # evaluate factor * N points equally spaced in parameter, then interpolate parameters at equal chord lengths
+    parameters = np.linspace(curve.knotVector[curve.degree], curve.knotVector[-(curve.degree + 1)], factor * N)
+    points = curve.Evaluate(N=factor * N)
+    chords = np.concatenate([[0], np.cumsum(np.linalg.norm(np.diff(points, axis=0), axis=1))])
+    uniform = np.interp(np.linspace(0, chords[-1], N), chords, parameters)
+    return uniform, curve.EvaluateAt(uniform)
+
+def ArcLength():
+    curve._arcLengthTable = None
+    parameters = curve.ArcLengthParameters(N)
+    return parameters, curve.EvaluateAt(parameters)
+
+for factor in (4, 16, 64, 256):
+    seconds, (parameters, points) = Time(lambda: Oversampled(factor), repeats=5)
+    print('oversampled x{:<4d} {:8.2f} ms, spacing error {:.1e}'.format(factor, 1e3 * seconds, SpacingError(parameters)))
+seconds, (parameters, points) = Time(ArcLength, repeats=5)
+print('arc length table   {:8.2f} ms, spacing error {:.1e} (table of {} segments, including building it)'.format(
+    1e3 * seconds, SpacingError(parameters), len(curve.ArcLengthTable().parameters) - 1))
@@ -0,0 +1,27 @@
+import sys
+import numpy as np
+from freeformdeformation import geom_classes as gc
+from freeformdeformation import geom_batch
+from freeformdeformation import geom_functions as gf
+from _timing import Time
+
+# Compares evaluating a population of NURBS curves that share their degree and knot vector one curve at a time with
+# evaluating them as one GeometryBatch, and with a dense matrix multiply of the same size as a lower bound.
+# usage: python batch_evaluation.py [population size] [points per curve]
+
+batchSize = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+N = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+rng = np.random.default_rng(0)
+
+for nControlPoints, degree in ((12, 3), (30, 3), (30, 5)):
+    knotVector = gf.KnotVector(nControlPoints, degree)
+    curves = [gc.NURBSCurve(controlPoints=rng.random((nControlPoints, 2)), weights=1 + rng.random(nControlPoints),
+                            degree=degree, knotVector=knotVector) for i in range(batchSize)]
+    batch = geom_batch.GeometryBatch(curves)
+    loopTime, loopPoints = Time(lambda: np.stack([curve.Evaluate(N) for curve in curves]), repeats=5)
+    batchTime, batchPoints = Time(lambda: batch.Evaluate(N), repeats=5)
+    dense = gc.BasisMatrix(np.linspace(knotVector[degree], knotVector[-(degree + 1)], N), knotVector, degree).ToDense()
+    net = batch._net.reshape(nControlPoints, -1)
+    denseTime, dense = Time(lambda: dense @ net, repeats=5)
+    print('{} curves, {} control points, degree {}, {} points each: loop {:.2f} ms, batch {:.2f} ms ({:.1f}x), dense matrix multiply {:.2f} ms, max difference {:.1e}'.format(
+        batchSize, nControlPoints, degree, N, 1e3 * loopTime, 1e3 * batchTime, loopTime / batchTime, 1e3 * denseTime, np.abs(batchPoints - loopPoints).max()))
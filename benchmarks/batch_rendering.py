@@ -0,0 +1,30 @@
+import sys
+import os
+import tempfile
+import time
+import numpy as np
+from freeformdeformation import geom_classes as gc
+from freeformdeformation import visualisation as visual
+
+# Times rendering curves and surfaces to PNG files with visualisation.RenderToFiles (no window, one reused figure),
+# and the effect of decimation on a surface plot of a large evaluated grid.
+# usage: python batch_rendering.py [number of plots]
+
+nPlots = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+rng = np.random.default_rng(0)
+curves = [gc.NURBSCurve(controlPoints=rng.random((8, 3)), weights=1 + rng.random(8), degree=3) for i in range(nPlots)]
+surfaces = [gc.NURBSSurface(controlPoints=rng.random((6, 6, 3)), weights=1 + rng.random((6, 6)), degree1=3, degree2=3) for i in range(nPlots)]
+
+with tempfile.TemporaryDirectory() as directory:
+    for name, geometries in (('curves', curves), ('surfaces', surfaces)):
+        filenames = [os.path.join(directory, '{}_{}.png'.format(name, i)) for i in range(nPlots)]
+        start = time.perf_counter()
+        visual.RenderToFiles(geometries, filenames)
+        elapsed = time.perf_counter() - start
+        print('{} {}: {:.1f} ms per plot'.format(nPlots, name, 1e3 * elapsed / nPlots))
+    
+    points = surfaces[0].Evaluate(N1=2000, N2=2000)
+    for maxLines in (50, 100, 400):
+        start = time.perf_counter()
+        visual.SurfacePlot(surfaces[0], points=points, maxLines=maxLines, filename=os.path.join(directory, 'large.png'))
+        print('2000x2000 grid drawn with at most {} lines per direction: {:.1f} ms'.format(maxLines, 1e3 * (time.perf_counter() - start)))
@@ -0,0 +1,206 @@
+import sys
+import argparse
+import datetime
+import json
+import platform
+import numpy as np
+from freeformdeformation import geom_classes as gc
+from freeformdeformation import geom_functions as gf
+from freeformdeformation import backends
+from _timing import Measure
+
+# Times the geometry kernels and the class Evaluate methods over degrees, control net sizes and sample counts, measures
+# peak memory, and stores the results as JSON. Two result files can be compared, failing (exit status 1) when any case
+# is slower than the baseline by more than a threshold.
+#
+# usage:
+# python benchmark_suite.py run [--full] [--output results.json] [--compare baseline.json --threshold 0.2]
+# python benchmark_suite.py compare baseline.json results.json [--threshold 0.2]
+
+QUICK = {'degrees': [1, 3, 5], 'nControlPoints': [10, 1000], 'samples': [1000, 100000]}
+FULL = {'degrees': [1, 2, 3, 4, 5], 'nControlPoints': [4, 10, 100, 1000, 10000], 'samples': [10 ** k for k in range(2, 8)]}
+# the scalar (one point per call) kernels are timed on at most this many points
+SCALAR_SAMPLES = 2000
+
+def CurveFixture(degree, nControlPoints, rng):
+    return gc.NURBSCurve(controlPoints=rng.random((nControlPoints, 3)), weights=1 + rng.random(nControlPoints), degree=degree)
+
+def BSplineCurveFixture(degree, nControlPoints, rng):
+    return gc.BSplineCurve(controlPoints=rng.random((nControlPoints, 3)), degree=degree)
+
+def SurfaceFixture(degree, nControlPoints, rng):
+    # square control net with about nControlPoints control points
+    n = max(degree + 1, int(round(np.sqrt(nControlPoints))))
+    return gc.NURBSSurface(controlPoints=rng.random((n, n, 3)), weights=1 + rng.random((n, n)), degree1=degree, degree2=degree)
+
+def VolumeFixture(degree, nControlPoints, rng):
+    # cubic control net with about nControlPoints control points
+    n = max(degree + 1, int(round(nControlPoints ** (1 / 3))))
+    return gc.NURBSVolume(controlPoints=rng.random((n, n, n, 3)), weights=1 + rng.random((n, n, n)), degree1=degree,
+                          degree2=degree, degree3=degree)
+
+# Each case returns (function to time, number of points it evaluates) for a degree, control net size and sample count.
+
+def FindSpanCase(degree, nControlPoints, samples, rng):
+    knotVector = gf.KnotVector(nControlPoints, degree)
+    parameters = rng.random(min(samples, SCALAR_SAMPLES)) * knotVector[-1]
+    return (lambda: [gf.FindSpan(degree, u, knotVector) for u in parameters]), len(parameters)
+
+def FindSpansCase(degree, nControlPoints, samples, rng):
+    knotVector = gf.KnotVector(nControlPoints, degree)
+    parameters = rng.random(samples) * knotVector[-1]
+    return (lambda: gf.FindSpans(degree, parameters, knotVector)), samples
+
+def BSplineBasisFunsCase(degree, nControlPoints, samples, rng):
+    knotVector = gf.KnotVector(nControlPoints, degree)
+    parameters = rng.random(min(samples, SCALAR_SAMPLES)) * knotVector[-1]
+    spans = gf.FindSpans(degree, parameters, knotVector)
+    return (lambda: [gf.BSplineBasisFuns(i, u, degree, knotVector) for i, u in zip(spans, parameters)]), len(parameters)
+
+def BSplineBasisFunsBatchCase(degree, nControlPoints, samples, rng):
+    knotVector = gf.KnotVector(nControlPoints, degree)
+    parameters = rng.random(samples) * knotVector[-1]
+    spans = gf.FindSpans(degree, parameters, knotVector)
+    return (lambda: gf.BSplineBasisFunsBatch(spans, parameters, degree, knotVector)), samples
+
+def NURBSCurvePointCase(degree, nControlPoints, samples, rng):
+    curve = CurveFixture(degree, nControlPoints, rng)
+    parameters = rng.random(min(samples, SCALAR_SAMPLES)) * curve.knotVector[-1]
+    return (lambda: [gf.NURBSCurvePoint(u, curve.knotVector, degree, curve.controlPoints, curve.weights) for u in parameters]), len(parameters)
+
+def NURBSCurvePointsCase(degree, nControlPoints, samples, rng):
+    curve = CurveFixture(degree, nControlPoints, rng)
+    parameters = rng.random(samples) * curve.knotVector[-1]
+    return (lambda: gf.NURBSCurvePoints(parameters, curve.knotVector, degree, curve.controlPoints, curve.weights)), samples
+
+def NURBSSurfacePointCase(degree, nControlPoints, samples, rng):
+    surface = SurfaceFixture(degree, nControlPoints, rng)
+    parameters = rng.random((min(samples, SCALAR_SAMPLES), 2)) * surface.knotVector1[-1]
+    return (lambda: [gf.NURBSSurfacePoint(u, v, surface.knotVector1, surface.knotVector2, degree, degree, surface.controlPoints, surface.weights)
+                     for u, v in parameters]), len(parameters)
+
+def NURBSSurfacePointsCase(degree, nControlPoints, samples, rng):
+    surface = SurfaceFixture(degree, nControlPoints, rng)
+    N = max(1, int(round(np.sqrt(samples))))
+    parameters = np.linspace(0, surface.knotVector1[-1], N)
+    return (lambda: gf.NURBSSurfacePoints(parameters, parameters, surface.knotVector1, surface.knotVector2, degree, degree,
+                                          surface.controlPoints, surface.weights)), N * N
+
+def BSplineCurveEvaluateCase(degree, nControlPoints, samples, rng):
+    curve = BSplineCurveFixture(degree, nControlPoints, rng)
+    return (lambda: curve.Evaluate(N=samples)), samples
+
+def NURBSCurveEvaluateCase(degree, nControlPoints, samples, rng):
+    curve = CurveFixture(degree, nControlPoints, rng)
+    return (lambda: curve.Evaluate(N=samples)), samples
+
+def NURBSSurfaceEvaluateCase(degree, nControlPoints, samples, rng):
+    surface = SurfaceFixture(degree, nControlPoints, rng)
+    N = max(1, int(round(np.sqrt(samples))))
+    return (lambda: surface.Evaluate(N1=N, N2=N)), N * N
+
+def NURBSVolumeEvaluateCase(degree, nControlPoints, samples, rng):
+    volume = VolumeFixture(degree, nControlPoints, rng)
+    N = max(1, int(round(samples ** (1 / 3))))
+    return (lambda: volume.Evaluate(N1=N, N2=N, N3=N)), N ** 3
+
+CASES = {'FindSpan': FindSpanCase,
+         'FindSpans': FindSpansCase,
+         'BSplineBasisFuns': BSplineBasisFunsCase,
+         'BSplineBasisFunsBatch': BSplineBasisFunsBatchCase,
+         'NURBSCurvePoint': NURBSCurvePointCase,
+         'NURBSCurvePoints': NURBSCurvePointsCase,
+         'NURBSSurfacePoint': NURBSSurfacePointCase,
+         'NURBSSurfacePoints': NURBSSurfacePointsCase,
+         'BSplineCurve.Evaluate': BSplineCurveEvaluateCase,
+         'NURBSCurve.Evaluate': NURBSCurveEvaluateCase,
+         'NURBSSurface.Evaluate': NURBSSurfaceEvaluateCase,
+         'NURBSVolume.Evaluate': NURBSVolumeEvaluateCase}
+
+def Key(result):
+    return '{} degree={} nControlPoints={} samples={}'.format(result['case'], result['degree'], result['nControlPoints'], result['samples'])
+
+def Run(grid, cases, repeats, seed=0):
+    # Returns a list of result dictionaries, one per case, degree, control net size and sample count.
+    results = []
+    for case in cases:
+        for degree in grid['degrees']:
+            for nControlPoints in grid['nControlPoints']:
+                if nControlPoints < degree + 1:
+                    continue
+                for samples in grid['samples']:
+                    rng = np.random.default_rng(seed)
+                    function, points = CASES[case](degree, nControlPoints, samples, rng)
+                    # long cases are timed once
+                    seconds, peak = Measure(function, repeats, longest=1.0)[:2]
+                    result = {'case': case, 'degree': degree, 'nControlPoints': nControlPoints, 'samples': samples, 'points': points,
+                              'seconds': seconds, 'nanosecondsPerPoint': 1e9 * seconds / points, 'peakBytes': peak}
+                    print('{:70s} {:10.3f} ms {:9.1f} ns/point {:10.2f} MB'.format(Key(result), 1e3 * seconds, result['nanosecondsPerPoint'], peak / 1e6))
+                    results.append(result)
+    return results
+
+def Compare(baseline, current, threshold, memoryThreshold=None):
+    """
+    Prints the relative change of every case present in both result files and returns the list of regressions: cases
+    whose time per point grew by more than threshold (or peak memory by more than memoryThreshold, if given).
+    """
+    old = {Key(result): result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        key = Key(result)
+        if key not in old:
+            continue
+        timeRatio = result['nanosecondsPerPoint'] / old[key]['nanosecondsPerPoint']
+        memoryRatio = (result['peakBytes'] + 1) / (old[key]['peakBytes'] + 1)
+        regressed = timeRatio > 1 + threshold or (memoryThreshold is not None and memoryRatio > 1 + memoryThreshold)
+        print('{:70s} time x{:6.2f} memory x{:6.2f}{}'.format(key, timeRatio, memoryRatio, '  REGRESSION' if regressed else ''))
+        if regressed:
+            regressions.append(key)
+    return regressions
+
+def Metadata():
+    return {'date': datetime.datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+            'numpy': np.__version__, 'platform': platform.platform(), 'processor': platform.processor(),
+            'backend': backends.GetBackend()}
+
+def Main(arguments):
+    parser = argparse.ArgumentParser(description='Benchmark and regression suite for the geometry kernels')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help='run the benchmarks')
+    run.add_argument('--full', action='store_true', help='degrees 1-5, control nets 4-10^4, samples 10^2-10^7 (default: a quick subset)')
+    run.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES), help='cases to run (default: all)')
+    run.add_argument('--repeats', type=int, default=3, help='timed repeats per case; the best is kept (default: 3)')
+    run.add_argument('--backend', choices=['numpy', 'numba'], default='numpy', help='kernel backend (default: numpy)')
+    run.add_argument('--output', help='JSON file the results are written to')
+    run.add_argument('--compare', help='JSON baseline to compare the results against')
+    run.add_argument('--threshold', type=float, default=0.2, help='largest allowed relative slow-down (default: 0.2)')
+    run.add_argument('--memory-threshold', type=float, help='largest allowed relative growth of peak memory (default: not checked)')
+    compare = commands.add_parser('compare', help='compare two result files')
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=0.2, help='largest allowed relative slow-down (default: 0.2)')
+    compare.add_argument('--memory-threshold', type=float, help='largest allowed relative growth of peak memory (default: not checked)')
+    options = parser.parse_args(arguments)
+
+    if options.command == 'run':
+        backends.SetBackend(options.backend)
+        grid = FULL if options.full else QUICK
+        current = {'metadata': Metadata(), 'grid': grid, 'results': Run(grid, options.cases, options.repeats)}
+        if options.output:
+            with open(options.output, 'w') as file:
+                json.dump(current, file, indent=1)
+        if not options.compare:
+            return 0
+        with open(options.compare) as file:
+            baseline = json.load(file)
+    else:
+        with open(options.baseline) as file:
+            baseline = json.load(file)
+        with open(options.current) as file:
+            current = json.load(file)
+    regressions = Compare(baseline, current, options.threshold, options.memory_threshold)
+    print('{} regression(s) beyond {:.0%}'.format(len(regressions), options.threshold))
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(Main(sys.argv[1:]))
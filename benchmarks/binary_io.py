@@ -0,0 +1,43 @@
+import sys
+import os
+import pickle
+import tempfile
+import time
+import numpy as np
+from freeformdeformation import ffd_lattice
+from freeformdeformation import geom_io
+
+# Compares opening a large FFD lattice (with embedded points) saved by geom_io with unpickling it, and the time to the
+# first deformation of the embedded points after opening.
+# usage: python binary_io.py [control points per direction] [embedded points]
+
+n = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+nPoints = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+rng = np.random.default_rng(0)
+
+lattice = ffd_lattice.FFDLattice(nControlPoints=(n, n, n))
+lattice.Embed(rng.random((nPoints, 3)))
+lattice.controlPoints = lattice.controlPoints + 0.01 * rng.standard_normal(lattice.controlPoints.shape)
+
+with tempfile.TemporaryDirectory() as directory:
+    binaryPath = os.path.join(directory, 'lattice.bin')
+    picklePath = os.path.join(directory, 'lattice.pickle')
+    start = time.perf_counter()
+    geom_io.Save(binaryPath, lattice)
+    saveTime = time.perf_counter() - start
+    start = time.perf_counter()
+    with open(picklePath, 'wb') as f:
+        pickle.dump(lattice, f, protocol=pickle.HIGHEST_PROTOCOL)
+    pickleTime = time.perf_counter() - start
+    print('{}^3 control points, {} embedded points: file {:.1f} MB, save {:.1f} ms, pickle {:.1f} ms'.format(
+        n, nPoints, os.path.getsize(binaryPath) / 1e6, 1e3 * saveTime, 1e3 * pickleTime))
+    
+    for name, Open in (('geom_io.Load', lambda: geom_io.Load(binaryPath)), ('pickle.load', lambda: pickle.load(open(picklePath, 'rb')))):
+        start = time.perf_counter()
+        loaded = Open()
+        openTime = time.perf_counter() - start
+        deformed = loaded.Deform()
+        deformTime = time.perf_counter() - start - openTime
+        print('{:14s} open {:8.2f} ms, first Deform {:8.2f} ms, max difference {:.1e}'.format(
+            name, 1e3 * openTime, 1e3 * deformTime, np.abs(deformed - lattice.Deform()).max()))
+        del loaded
@@ -0,0 +1,43 @@
+import sys
+import time
+import numpy as np
+from freeformdeformation import geom_classes as gc
+from freeformdeformation import bvh
+
+# Times closest point and ray queries with a BoundingVolumeHierarchy on wavy cubic surfaces with growing numbers of
+# Bezier patches, against the brute force approach of evaluating a dense grid (8 samples per knot span) and taking
+# the nearest grid point with a SpatialGrid. The BVH answers are exact to Newton tolerance; the grid answers are not.
+# usage: python bvh_queries.py [number of queries]
+
+M = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+rng = np.random.default_rng(0)
+
+for n in (10, 20, 40, 80):
+    u = np.linspace(0, 1, n)
+    X, Y = np.meshgrid(u, u, indexing='ij')
+    controlPoints = np.stack([X, Y, 0.05 * np.sin(8 * X) * np.cos(7 * Y)], axis=-1)
+    surface = gc.NURBSSurface(controlPoints=controlPoints, weights=1 + 0.2 * rng.random((n, n)), degree1=3, degree2=3)
+    patches = (n - 3) ** 2
+    
+    start = time.perf_counter()
+    tree = bvh.BoundingVolumeHierarchy(surface)
+    buildTime = time.perf_counter() - start
+    # points near the surface, and rays shot down at it
+    parameters = rng.random((M, 2)) * surface.knotVector1[-1]
+    points = surface.EvaluateAt(parameters) + 0.01 * rng.standard_normal((M, 3))
+    tree.ClosestPoints(points[:10])
+    start = time.perf_counter()
+    closestParameters, closest, distances = tree.ClosestPoints(points)
+    closestTime = time.perf_counter() - start
+    origins = np.c_[rng.random((M, 2)), np.ones(M)]
+    start = time.perf_counter()
+    hit, t, hitParameters, hitPoints = tree.IntersectRays(origins, np.tile([0, 0, -1.0], (M, 1)))
+    rayTime = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    samples = 8 * (n - 3) + 1
+    grid = surface.Evaluate(N1=samples, N2=samples).reshape(-1, 3)
+    nearest, gridDistances = gc.SpatialGrid(grid).Nearest(points)
+    bruteTime = time.perf_counter() - start
+    print('{:5d} patches: build {:7.1f} ms, {} closest points {:7.1f} ms, {} rays {:7.1f} ms ({} hits); dense grid nearest {:7.1f} ms (error up to {:.1e})'.format(
+        patches, 1e3 * buildTime, M, 1e3 * closestTime, M, 1e3 * rayTime, hit.sum(), 1e3 * bruteTime, np.max(gridDistances - distances)))
@@ -0,0 +1,50 @@
+import sys
+import numpy as np
+from freeformdeformation import geom_classes as gc
+from freeformdeformation import geom_functions as gf
+from freeformdeformation import fitting
+from freeformdeformation import backends
+from _timing import Time
+
+# Times global curve interpolation and least squares approximation (one control point per 20 data points) of noisy
+# airfoil-like data with the banded solvers, under every available backend, against a dense solve of the same
+# interpolation system (skipped above 4000 points), and a surface interpolation and approximation of a grid of data.
+# usage: python curve_fitting.py [largest number of curve data points]
+
+largest = int(sys.argv[1]) if len(sys.argv) > 1 else 160000
+rng = np.random.default_rng(0)
+
+def Data(M):
+    t = np.linspace(0, 2 * np.pi, M)
+    x = (1 + np.cos(t)) / 2
+    return np.stack([x, 0.6 * np.sin(t) * np.sqrt(x) * (1 - x) + 1e-5 * rng.standard_normal(M)], axis=1)
+
+def DenseInterpolation(points):
+    parameters = gf.FittingParameters(points)
+    knotVector = gf.AveragedKnotVector(parameters, 3)
+    return np.linalg.solve(gc.BasisMatrix(parameters, knotVector, 3).ToDense(), points)
+
+M = 1000
+while M <= largest:
+    points = Data(M)
+    line = '{:7d} points:'.format(M)
+    for backend in backends.AvailableBackends():
+        backends.SetBackend(backend)
+        fitting.InterpolateCurve(points[:100])
+        interpolationTime, curve = Time(lambda: fitting.InterpolateCurve(points))
+        approximationTime, approximation = Time(lambda: fitting.ApproximateCurve(points, M // 20))
+        line += ' {} interpolation {:8.2f} ms, approximation {:8.2f} ms |'.format(backend, 1e3 * interpolationTime, 1e3 * approximationTime)
+    backends.SetBackend('numpy')
+    if M <= 4000:
+        denseTime, dense = Time(lambda: DenseInterpolation(points), repeats=1)
+        line += ' dense interpolation {:8.2f} ms (max difference {:.1e})'.format(1e3 * denseTime, np.abs(dense - curve.controlPoints).max())
+    print(line)
+    M *= 2
+
+n = 400
+u, v = np.meshgrid(np.linspace(0, 1, n), np.linspace(0, 1, n), indexing='ij')
+grid = np.stack([u, v, 0.1 * np.sin(6 * u) * np.cos(4 * v) + 1e-5 * rng.standard_normal(u.shape)], axis=-1)
+interpolationTime, surface = Time(lambda: fitting.InterpolateSurface(grid))
+approximationTime, surface = Time(lambda: fitting.ApproximateSurface(grid, n // 10, n // 10))
+print('{0}x{0} surface grid: interpolation {1:8.2f} ms, approximation to {2}x{2} control points {3:8.2f} ms'.format(
+    n, 1e3 * interpolationTime, n // 10, 1e3 * approximationTime))
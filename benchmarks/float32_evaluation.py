@@ -0,0 +1,49 @@
+import sys
+import numpy as np
+from freeformdeformation import geom_classes as gc
+from freeformdeformation import ffd_lattice
+from freeformdeformation import geom_functions as gf
+from _timing import Measure
+
+# Compares float64 and float32 (dtype=np.float32) evaluation of large grids of a cubic NURBS surface and volume and
+# deformation of points embedded in an FFD lattice: time with cached basis matrices, bytes of the result, peak memory
+# allocated during the call (tracemalloc), and the largest float32 error against float64 relative to the largest control
+# point coordinate, next to the bound of gf.RoundingErrorBound (for FFD, relative to the largest displacement, next to
+# the bound documented in FFDLattice.Embed).
+# usage: python float32_evaluation.py [largest surface grid side]
+
+largest = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+rng = np.random.default_rng(0)
+
+def Report(name, results, scale, bound):
+    (time64, peak64, result64), (time32, peak32, result32) = results
+    error = np.abs(result32.astype(np.float64) - result64).max() / scale
+    print('{:28s} float64 {:8.1f} ms, result {:7.1f} MB, peak {:7.1f} MB | float32 {:8.1f} ms, result {:7.1f} MB, peak {:7.1f} MB'
+          ' | x{:.2f} faster, error {:.1e} (bound {:.1e})'.format(
+              name, 1e3 * time64, result64.nbytes / 1e6, peak64 / 1e6, 1e3 * time32, result32.nbytes / 1e6, peak32 / 1e6,
+              time64 / time32, error, bound))
+
+surface = gc.NURBSSurface(controlPoints=rng.random((40, 40, 3)), weights=0.5 + rng.random((40, 40)), degree1=3, degree2=3)
+N = 500
+while N <= largest:
+    results = [Measure(lambda: surface.Evaluate(N, N, dtype=dtype), warmup=True) for dtype in (np.float64, np.float32)]
+    Report('surface {0}x{0}'.format(N), results, np.abs(surface.controlPoints).max(), gf.RoundingErrorBound([3, 3]))
+    N *= 2
+
+volume = gc.NURBSVolume(controlPoints=rng.random((12, 12, 12, 3)), weights=0.5 + rng.random((12, 12, 12)), degree1=3, degree2=3, degree3=3)
+for N in (100, 200):
+    results = [Measure(lambda: volume.Evaluate(N, N, N, dtype=dtype), warmup=True) for dtype in (np.float64, np.float32)]
+    Report('volume {0}x{0}x{0}'.format(N), results, np.abs(volume.controlPoints).max(), gf.RoundingErrorBound([3, 3, 3]))
+
+points = rng.random((2000000, 3))
+displacements = 0.05 * rng.standard_normal((8, 8, 8, 3))
+results = []
+for dtype in (np.float64, np.float32):
+    lattice = ffd_lattice.FFDLattice(nControlPoints=(8, 8, 8))
+    embedding = lattice.Embed(points, dtype=dtype)
+    print('FFD 8^3 lattice, {} points, {} embedding: {:8.1f} MB of basis functions and points'.format(
+        len(points), np.dtype(dtype).name, (embedding['data'].nbytes + embedding['points'].nbytes) / 1e6))
+    results.append(Measure(lambda: lattice.Deform(displacements), warmup=True))
+u = np.finfo(np.float32).eps / 2
+# the bound of Embed, relative to the largest displacement (points lie in [0, 1]^3)
+Report('FFD deform, 2000000 points', results, np.abs(displacements).max(), (64 + 2) * u + 2 * u / np.abs(displacements).max())
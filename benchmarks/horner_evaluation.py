@@ -0,0 +1,33 @@
+import sys
+import numpy as np
+from freeformdeformation import geom_classes as gc
+from freeformdeformation import geom_functions as gf
+from _timing import Time
+
+# Compares scattered-point evaluation through the basis functions (EvaluateAt) with Horner evaluation of the cached
+# power basis form (HornerEvaluateAt) for curves and surfaces of degrees 1 to 5.
+# usage: python horner_evaluation.py [number of points]
+
+M = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+rng = np.random.default_rng(0)
+
+for degree in range(1, 6):
+    n = 20
+    curve = gc.NURBSCurve()
+    curve.controlPoints = rng.random((n, 3))
+    curve.weights = 1 + rng.random(n)
+    curve.degree = degree
+    curve.knotVector = gf.KnotVector(n, degree)
+    surface = gc.NURBSSurface()
+    surface.controlPoints = rng.random((n, n, 3))
+    surface.weights = 1 + rng.random((n, n))
+    surface.degree1 = surface.degree2 = degree
+    surface.knotVector1 = surface.knotVector2 = gf.KnotVector(n, degree)
+    
+    for name, geometry, parameters in (('curve', curve, rng.random(M) * curve.knotVector[-1]),
+                                       ('surface', surface, rng.random((M, 2)) * surface.knotVector1[-1])):
+        setup, patches = Time(geometry.PowerBasis, repeats=1)
+        basisTime, reference = Time(lambda: geometry.EvaluateAt(parameters))
+        hornerTime, result = Time(lambda: geometry.HornerEvaluateAt(parameters))
+        print('degree {} {:7s}: EvaluateAt {:.1f} ns/point, Horner {:.1f} ns/point (setup {:.2f} ms), max difference {:.1e}'.format(
+            degree, name, 1e9 * basisTime / M, 1e9 * hornerTime / M, 1e3 * setup, np.abs(result - reference).max()))
@@ -0,0 +1,37 @@
+import sys
+import subprocess
+import time
+
+# Times starting a fresh Python process that imports the package, as every worker of a process pool does, against
+# processes that import nothing and NumPy only, and lists which optional heavy modules each import loaded. Accessing
+# freeformdeformation.visualisation is what imports matplotlib; nothing else should.
+# usage: python import_time.py [processes per measurement]
+
+repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+HEAVY = ('matplotlib', 'matplotlib.pyplot', 'numba', 'concurrent.futures.process', 'freeformdeformation.parallel')
+CHECK = "import sys; print(','.join(m for m in {!r} if m in sys.modules))".format(HEAVY)
+
+statements = [('python only', 'pass'),
+              ('numpy', 'import numpy'),
+              ('numpy + pyplot (the old eager imports)', 'import numpy, matplotlib.pyplot, mpl_toolkits.mplot3d'),
+              ('freeformdeformation', 'import freeformdeformation'),
+              ('freeformdeformation + fitting + geom_io', 'import freeformdeformation as ffd; ffd.fitting; ffd.geom_io'),
+              ('freeformdeformation + visualisation', 'import freeformdeformation as ffd; ffd.visualisation.CurvePlot'),
+              ('freeformdeformation + plot to file', "import freeformdeformation as ffd; ffd.visualisation.CurvePlot("
+               "ffd.BSplineCurve(controlPoints=[[0, 0], [1, 1], [2, 0]], degree=2), dimension='2D', filename='/dev/null')")]
+
+def Seconds(statement):
+    times = []
+    for repeat in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', statement], check=True)
+        times.append(time.perf_counter() - start)
+    return min(times), sorted(times)[len(times) // 2]
+
+baseline = None
+for name, statement in statements:
+    best, median = Seconds(statement)
+    baseline = best if baseline is None else baseline
+    loaded = subprocess.run([sys.executable, '-c', statement + '; ' + CHECK], check=True, capture_output=True, text=True).stdout.strip()
+    print('{:42s} best {:8.1f} ms, median {:8.1f} ms, over python {:8.1f} ms, loaded: {}'.format(
+        name, 1e3 * best, 1e3 * median, 1e3 * (best - baseline), loaded or '-'))
@@ -0,0 +1,43 @@
+import sys
+import time
+import numpy as np
+from freeformdeformation import geom_classes as gc
+from freeformdeformation import ffd_lattice
+
+# Compares full re-evaluation with incremental re-evaluation after moving a few control points (UpdateControlPoints)
+# for a NURBS surface grid and for the points embedded in an FFD lattice.
+# usage: python incremental_evaluation.py [surface samples per direction] [embedded points]
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+nPoints = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+rng = np.random.default_rng(0)
+
+def Compare(name, Full, Incremental, Move, steps=10):
+    Incremental()
+    fullTime = incrementalTime = 0
+    for step in range(steps):
+        Move()
+        start = time.perf_counter()
+        patched = Incremental()
+        incrementalTime += time.perf_counter() - start
+        start = time.perf_counter()
+        full = Full()
+        fullTime += time.perf_counter() - start
+    print('{:50s} full {:8.2f} ms, incremental {:8.2f} ms ({:.0f}x), max difference {:.1e}'.format(
+        name, 1e3 * fullTime / steps, 1e3 * incrementalTime / steps, fullTime / incrementalTime, np.abs(patched - full).max()))
+
+for n, movedPoints in ((60, 1), (60, 4), (20, 1)):
+    surface = gc.NURBSSurface(controlPoints=rng.random((n, n, 3)), weights=1 + rng.random((n, n)), degree1=3, degree2=3)
+    def Move():
+        indices = rng.integers(0, n, (movedPoints, 2))
+        surface.UpdateControlPoints(indices, controlPoints=surface.controlPoints[tuple(indices.T)] + 0.01 * rng.standard_normal((movedPoints, 3)))
+    Compare('surface {}x{}, {}x{} grid, {} point(s) moved'.format(n, n, N, N, movedPoints),
+            lambda: surface.Evaluate(N1=N, N2=N), lambda: surface.Evaluate(N1=N, N2=N, incremental=True), Move)
+
+for n in (12, 6):
+    lattice = ffd_lattice.FFDLattice(nControlPoints=(n, n, n))
+    lattice.Embed(rng.random((nPoints, 3)))
+    def Move():
+        index = tuple(rng.integers(0, n, 3))
+        lattice.UpdateControlPoints(index, controlPoints=[lattice.controlPoints[index] + 0.01 * rng.standard_normal(3)])
+    Compare('FFD lattice {}^3, {} points, 1 point moved'.format(n, nPoints), lattice.Deform, lambda: lattice.Deform(incremental=True), Move)
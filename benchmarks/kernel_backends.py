@@ -0,0 +1,49 @@
+import sys
+import numpy as np
+from freeformdeformation import geom_functions as gf
+from freeformdeformation import backends
+from _timing import Time
+
+# Times each replaceable kernel under every available backend against the NumPy reference, and checks that the
+# results match to 1e-12. JIT compilation happens in an untimed warm-up call.
+# usage: python kernel_backends.py [number of points] [degree]
+
+M = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+degree = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+n = 100
+rng = np.random.default_rng(0)
+knotVector = gf.KnotVector(n, degree).astype(float)
+parameters = rng.random(M) * knotVector[-1]
+controlPoints = rng.random((n, 4))
+spans = gf.FindSpans(degree, parameters, knotVector)
+B = gf.BSplineBasisFunsBatch(spans, parameters, degree, knotVector)
+indices = spans[:, None] - degree + np.arange(degree + 1)
+
+# a banded system: the collocation matrix of an interpolating curve through min(M, 100000) points
+nBanded = min(M, 100000)
+bandedParameters = np.linspace(0, 1, nBanded)
+bandedKnotVector = gf.AveragedKnotVector(bandedParameters, degree)
+bandedSpans = gf.FindSpans(degree, bandedParameters, bandedKnotVector)
+bandedMatrix = gf.BandedRows(bandedSpans - degree, gf.BSplineBasisFunsBatch(bandedSpans, bandedParameters, degree, bandedKnotVector), nBanded)
+
+arguments = {'FindSpans': (degree, parameters, knotVector),
+             'BSplineBasisFunsBatch': (spans, parameters, degree, knotVector),
+             'DersBasisFunsBatch': (spans, parameters, degree, 2, knotVector),
+             'SparseBasisDot': (indices[:, 0], B, controlPoints),
+             'SparseRowsDot': (indices, B, controlPoints),
+             'SolveBanded': bandedMatrix + (rng.random((nBanded, 3)),)}
+
+print('{} points, degree {}, backends {}'.format(M, degree, backends.AvailableBackends()))
+for kernel in backends.KERNELS:
+    backends.SetBackend('numpy')
+    referenceTime, reference = Time(lambda: getattr(gf, kernel)(*arguments[kernel]))
+    line = '{:22s} numpy {:8.2f} ms'.format(kernel, 1e3 * referenceTime)
+    for backend in backends.AvailableBackends()[1:]:
+        backends.SetBackend(backend)
+        function = getattr(gf, kernel)
+        elapsed, result = Time(lambda: function(*arguments[kernel]), warmup=True)
+        error = np.abs(np.asarray(result, dtype=float) - reference).max()
+        assert error <= 1e-12, (kernel, backend, error)
+        line += ' | {} {:8.2f} ms (x{:.1f}, max difference {:.1e})'.format(backend, 1e3 * elapsed, referenceTime / elapsed, error)
+    print(line)
+backends.SetBackend('numpy')
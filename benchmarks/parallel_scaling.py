@@ -0,0 +1,40 @@
+import sys
+import os
+import numpy as np
+from freeformdeformation import geom_classes as gc
+from freeformdeformation import ffd_lattice
+from _timing import Time
+
+# Times tiled evaluation of a large surface grid and an FFD volume grid on 1 ... number of cores workers,
+# for both the thread and the process backend, and checks every result against serial evaluation.
+# usage: python parallel_scaling.py [N] [maximum workers]
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+maxWorkers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+repeats = 3
+
+# bicubic surface with a 20 x 20 control net
+n = 20
+u, v = np.meshgrid(np.linspace(0, 1, n), np.linspace(0, 1, n), indexing='ij')
+surface = gc.NURBSSurface()
+surface.controlPoints = np.stack([u, v, np.sin(4 * u) * np.cos(3 * v)], axis=-1)
+surface.weights = 1 + 0.5 * np.random.default_rng(0).random((n, n))
+surface.degree1 = 3
+surface.degree2 = 3
+surface.knotVector1 = np.concatenate([[0] * 3, np.linspace(0, 1, n - 2), [1] * 3])
+surface.knotVector2 = surface.knotVector1
+
+# cubic FFD lattice with a 6 x 6 x 6 control net, sampled on a grid with about as many points as the surface
+lattice = ffd_lattice.FFDLattice(nControlPoints=(6, 6, 6))
+M = int(round(N ** (2 / 3)))
+
+for name, Evaluate in (('surface {0} x {0}'.format(N), lambda **kwargs: surface.Evaluate(N1=N, N2=N, **kwargs)),
+                       ('volume {0} x {0} x {0}'.format(M), lambda **kwargs: lattice.Evaluate(N1=M, N2=M, N3=M, **kwargs))):
+    serialTime, reference = Time(Evaluate, repeats)
+    print('{}: serial {:.3f} s'.format(name, serialTime))
+    for backend in ('thread', 'process'):
+        for workers in range(1, maxWorkers + 1):
+            elapsed, result = Time(lambda: Evaluate(workers=workers, backend=backend), repeats)
+            assert np.array_equal(result, reference)
+            print('    {:7s} workers = {:2d}: {:.3f} s, speed-up {:.2f}'.format(backend, workers, elapsed, serialTime / elapsed))
+            del result
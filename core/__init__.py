@@ -0,0 +1,35 @@
+import importlib
+
+# NURBS curves, surfaces and volumes, and free-form deformation lattices.
+# Importing the package loads only NumPy and the geometry kernels and classes (geom_functions, geom_structures,
+# geom_classes, ffd_lattice and geom_batch). The other modules are imported on first attribute access
+# (e.g. freeformdeformation.visualisation), so matplotlib, numba and the process pools of parallel are only loaded by
+# programs that use them.
+
+from . import geom_functions
+from . import geom_structures
+from . import geom_classes
+from . import ffd_lattice
+from . import geom_batch
+from .geom_structures import SpatialGrid, ControlNetJacobian, Tessellation, PowerBasisPatches, ArcLengthTable
+from .geom_classes import BasisMatrix, BasisMatrixCache, TensorProductDot, BSplineCurve, NURBSCurve, NURBSSurface, NURBSVolume
+from .ffd_lattice import FFDLattice
+from .geom_batch import GeometryBatch
+
+__version__ = '0.1.0'
+
+# modules imported on first use (visualisation needs matplotlib and jit_kernels needs numba)
+LAZY_MODULES = ('backends', 'bvh', 'fitting', 'geom_io', 'instrumentation', 'jit_kernels', 'parallel', 'visualisation')
+
+__all__ = ['geom_functions', 'geom_structures', 'geom_classes', 'ffd_lattice', 'geom_batch', 'SpatialGrid',
+           'ControlNetJacobian', 'Tessellation', 'PowerBasisPatches', 'ArcLengthTable', 'BasisMatrix', 'BasisMatrixCache',
+           'TensorProductDot', 'BSplineCurve', 'NURBSCurve', 'NURBSSurface', 'NURBSVolume', 'FFDLattice', 'GeometryBatch']
+
+def __getattr__(name):
+    # Imports a lazily loaded module on first access; importlib caches it as an attribute of the package afterwards.
+    if name in LAZY_MODULES:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+def __dir__():
+    return sorted(set(globals()) | set(LAZY_MODULES))
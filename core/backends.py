@@ -0,0 +1,51 @@
+from . import geom_functions as gf
+
+# Kernels that a backend can replace. Everything in geom_functions and geom_classes calls them through the
+# geom_functions module, so swapping the module attributes switches every evaluation path at once.
+KERNELS = ('FindSpans', 'BSplineBasisFunsBatch', 'DersBasisFunsBatch', 'SparseBasisDot', 'SparseRowsDot', 'SolveBanded')
+
+# the NumPy kernels, unwrapped in case instrumentation.Enable() has already replaced them by timing wrappers
+_reference = {name: getattr(getattr(gf, name), '__wrapped__', getattr(gf, name)) for name in KERNELS}
+_backend = 'numpy'
+
+def AvailableBackends():
+    # Returns a list of the names of the backends that can be used here ('numpy' always, 'numba' if it is installed).
+    backends = ['numpy']
+    try:
+        import numba
+        backends.append('numba')
+    except ImportError:
+        pass
+    return backends
+
+def GetBackend():
+    # Returns the name of the backend in use.
+    return _backend
+
+def SetBackend(name):
+    """
+    Selects the implementation of the span search, basis function, basis function derivative, sparse contraction and
+    banded solver kernels.
+
+    Arguments:
+    name -- 'numpy' for the vectorised NumPy reference kernels, or 'numba' for JIT-compiled kernels
+            (requires numba; kernels are compiled on first use)
+    """
+    global _backend
+    if name == 'numpy':
+        kernels = _reference
+    elif name == 'numba':
+        try:
+            from . import jit_kernels
+        except ImportError as error:
+            raise ImportError("backend 'numba' requires numba to be installed") from error
+        kernels = {kernel: getattr(jit_kernels, kernel) for kernel in KERNELS}
+    else:
+        raise ValueError("backend == {} is not one of {}".format(name, ['numpy', 'numba']))
+    for kernel, function in kernels.items():
+        setattr(gf, kernel, function)
+    _backend = name
+
+def ReferenceKernel(name):
+    # Returns the NumPy reference implementation of a kernel, whatever backend is in use.
+    return _reference[name]
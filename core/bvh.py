@@ -0,0 +1,397 @@
+import numpy as np
+from . import geom_functions as gf
+
+# A bounding volume hierarchy of the Bezier pieces of a curve, surface or volume. By the convex hull property of
+# rational Bezier pieces with positive weights, each piece lies inside the axis-aligned box of its control points, so
+# queries descend the tree through the boxes that can contain an answer and only solve for the answer on the pieces
+# they reach. Pieces reached by a query whose boxes are still large are split in two in every direction
+# (de Casteljau at the middle of the piece) the first time, so the tree is only refined where it is queried.
+
+def _SplitBezier(Pw, axis):
+    # Returns the halves (left, right) of Bezier control nets (weighted control points) split at the middle of the
+    # direction indexed by axis, by de Casteljau's algorithm.
+    Q = np.moveaxis(Pw, axis, 0).copy()
+    n = len(Q)
+    left, right = np.empty_like(Q), np.empty_like(Q)
+    left[0], right[-1] = Q[0], Q[-1]
+    for r in range(1, n):
+        Q[:n - r] = 0.5 * (Q[:n - r] + Q[1:n - r + 1])
+        left[r], right[n - 1 - r] = Q[0], Q[n - 1 - r]
+    return np.moveaxis(left, 0, axis), np.moveaxis(right, 0, axis)
+
+def _ClippedNewton(Residual, x, lower, upper, tolerance=1e-10, maxIterations=20):
+    """
+    Returns a tuple (x, converged) from batched Newton-Raphson iteration on square systems of equations, with each
+    system's unknowns clipped to its own box.
+
+    Arguments:
+    Residual -- function mapping (x, rows) to (F, J): residuals (shape = (M, n)) and Jacobians (shape = (M, n, n)) of the
+                systems rows at x (shape = (M, n))
+    x -- array (shape = (number of systems, n)) of starting values
+    lower, upper -- arrays (shape = (number of systems, n)) of bounds on the unknowns
+    tolerance -- norm of the residual below which a system is solved (default = 1e-10)
+    maxIterations -- maximum number of iterations (default = 20)
+    """
+    x = x.copy()
+    converged = np.zeros(len(x), dtype=bool)
+    active = np.arange(len(x))
+    for iteration in range(maxIterations + 1):
+        F, J = Residual(x[active], active)
+        done = np.linalg.norm(F, axis=1) <= tolerance
+        converged[active[done]] = True
+        active, F, J = active[~done], F[~done], J[~done]
+        if len(active) == 0 or iteration == maxIterations:
+            break
+        JTJ = np.einsum('aik,ail->akl', J, J)
+        JTJ += 1e-14 * np.trace(JTJ, axis1=1, axis2=2)[:, None, None] * np.eye(x.shape[1])
+        step = -np.linalg.solve(JTJ, np.einsum('aik,ai->ak', J, F)[..., None])[..., 0]
+        x[active] = np.clip(x[active] + step, lower[active], upper[active])
+    return x, converged
+
+def _ClippedProjection(Derivatives, points, x, lower, upper, tolerance=1e-10, maxIterations=20):
+    """
+    Returns parameters (shape = (number of points, k)) of the closest points of a curve or surface to a set of points,
+    each found within its own box of parameters by batched Newton iteration on the squared distance (the Gauss-Newton
+    approximation is used where the Newton matrix is not positive definite), with steps clipped to the box and halved
+    while they move away from the point.
+    
+    Arguments:
+    Derivatives -- function mapping parameters (shape = (M, k)) to (points, first, second) as PartialDerivativesAt(u, True)
+    points -- array (shape = (number of points, dimension)) of Cartesian coordinates
+    x -- array (shape = (number of points, k)) of starting parameters
+    lower, upper -- arrays (shape = (number of points, k)) of bounds on the parameters
+    tolerance -- distance moved (in Cartesian space) below which iteration stops (default = 1e-10)
+    maxIterations -- maximum number of iterations (default = 20)
+    """
+    x = x.copy()
+    active = np.arange(len(x))
+    for iteration in range(maxIterations):
+        u = x[active]
+        C, J, H = Derivatives(u)
+        residual = C - points[active]
+        distance = np.linalg.norm(residual, axis=1)
+        gradient = np.einsum('aik,ai->ak', J, residual)
+        JTJ = np.einsum('aik,ail->akl', J, J)
+        newton = JTJ + np.einsum('ai,aikl->akl', residual, H)
+        positive = np.linalg.eigvalsh(newton)[:, 0] > 0
+        JTJ[positive] = newton[positive]
+        # parameters on a bound of the box with the gradient pointing out of it stay there; the others take a Newton step
+        fixed = ((u <= lower[active]) & (gradient > 0)) | ((u >= upper[active]) & (gradient < 0))
+        free = ~fixed
+        JTJ = JTJ * (free[:, :, None] & free[:, None, :]) + fixed[:, :, None] * np.eye(x.shape[1])
+        JTJ += 1e-14 * np.trace(JTJ, axis1=1, axis2=2)[:, None, None] * np.eye(x.shape[1])
+        step = -np.linalg.solve(JTJ, (gradient * free)[..., None])[..., 0]
+        uNew = np.clip(u + step, lower[active], upper[active])
+        for halving in range(5):
+            worse = np.linalg.norm(Derivatives(uNew)[0] - points[active], axis=1) > distance
+            if not np.any(worse):
+                break
+            step[worse] *= 0.5
+            uNew[worse] = np.clip(u[worse] + step[worse], lower[active[worse]], upper[active[worse]])
+        # steps that still move away from the point are not taken
+        uNew[worse] = u[worse]
+        x[active] = uNew
+        moved = np.linalg.norm(np.einsum('aik,ak->ai', J, uNew - u), axis=1)
+        active = active[moved > tolerance]
+        if len(active) == 0:
+            break
+    return x
+
+class BoundingVolumeHierarchy:
+    """
+    Creates a bounding volume hierarchy of a curve, surface or volume (e.g. an FFD lattice) for batched closest point,
+    ray intersection and containment queries. The tree is built over the Bezier pieces of the geometry (one per knot span,
+    or tensor product of knot spans), each bounded by the box of its control points, and leaves are subdivided lazily.
+    The hierarchy is rebuilt if the geometry's control net, degrees or knots have changed when it is queried.
+
+    Arguments:
+    geometry -- curve, surface or volume object defined by a class from geom_classes.py
+    leafSize -- diagonal of a leaf box above which a query reaching the leaf subdivides its piece
+                (default = 1/32 of the diagonal of the box of the whole control net)
+    maxDepth -- largest number of times a Bezier piece is subdivided (default = 8)
+    """
+    def __init__(self, geometry, leafSize=None, maxDepth=8):
+        self.geometry = geometry
+        self.leafSize = leafSize
+        self.maxDepth = maxDepth
+        self._version = None
+        self._Update()
+
+    def _GeometryVersion(self):
+        return (self.geometry.netVersion,) + tuple((degree, knotVector.tobytes()) for knotVector, degree in self.geometry._directions)
+
+    def _Update(self):
+        # Builds the tree if it has not been built for the geometry as it is now.
+        version = self._GeometryVersion()
+        if version == self._version:
+            return
+        self._version = version
+        breakpoints, patches = self.geometry.BezierPatches()
+        k = len(breakpoints)
+        self.nDirections = k
+        pieceShape = patches.shape[k:]
+        self._pieces = patches.reshape((-1,) + pieceShape)
+        spans = np.meshgrid(*[np.arange(len(b) - 1) for b in breakpoints], indexing='ij')
+        self._domains = np.stack([np.stack([breakpoints[d][spans[d].ravel()], breakpoints[d][spans[d].ravel() + 1]], axis=1) for d in range(k)], axis=1)
+        self._depth = np.zeros(len(self._pieces), dtype=int)
+        lower, upper, anchors = self._PieceBoxes(self._pieces)
+        if self.leafSize is None:
+            self._leafSize = np.linalg.norm(upper.max(axis=0) - lower.min(axis=0)) / 32
+        else:
+            self._leafSize = self.leafSize
+        self._BuildTree(lower, upper, anchors)
+
+    def _PieceBoxes(self, pieces):
+        # Returns the box bounds of the control points of each piece, and its first corner (a point on the geometry).
+        points = pieces[..., :-1] / pieces[..., -1:]
+        flat = points.reshape(len(pieces), -1, points.shape[-1])
+        return flat.min(axis=1), flat.max(axis=1), flat[:, 0]
+
+    def _BuildTree(self, lower, upper, anchors):
+        # Builds a binary tree over the pieces top down, splitting each node's pieces at the median of their box centres
+        # along the longest axis of the node box. The children of a node are stored next to each other.
+        nodeLower, nodeUpper, nodeAnchor, firstChild, childCount, nodePiece = [], [], [], [], [], []
+        def NewNode(members):
+            nodeLower.append(lower[members].min(axis=0))
+            nodeUpper.append(upper[members].max(axis=0))
+            nodeAnchor.append(anchors[members[0]])
+            firstChild.append(-1)
+            childCount.append(0)
+            nodePiece.append(members[0] if len(members) == 1 else -1)
+            return len(nodeLower) - 1
+        centres = 0.5 * (lower + upper)
+        stack = [(NewNode(np.arange(len(lower))), np.arange(len(lower)))]
+        while stack:
+            node, members = stack.pop()
+            if len(members) == 1:
+                continue
+            axis = np.argmax(nodeUpper[node] - nodeLower[node])
+            order = members[np.argsort(centres[members, axis], kind='stable')]
+            halves = (order[:len(order) // 2], order[len(order) // 2:])
+            children = [NewNode(half) for half in halves]
+            firstChild[node], childCount[node] = children[0], 2
+            stack.extend(zip(children, halves))
+        self._lower, self._upper, self._anchor = np.array(nodeLower), np.array(nodeUpper), np.array(nodeAnchor)
+        self._firstChild, self._childCount, self._piece = np.array(firstChild), np.array(childCount), np.array(nodePiece)
+
+    @property
+    def nNodes(self):
+        return len(self._lower)
+
+    @property
+    def nPieces(self):
+        # Returns the number of Bezier pieces, including those made by subdivision.
+        return len(self._pieces)
+
+    def _Subdivide(self, nodes):
+        # Splits the pieces of leaf nodes in two in every direction, making each node the parent of 2^k new leaves.
+        pieces = [self._pieces[self._piece[nodes]]]
+        domains = [self._domains[self._piece[nodes]]]
+        for d in range(self.nDirections):
+            halves = [_SplitBezier(piece, d + 1) for piece in pieces]
+            pieces = [half for pair in halves for half in pair]
+            middle = [0.5 * (domain[:, d, 0] + domain[:, d, 1]) for domain in domains]
+            split = []
+            for domain, m in zip(domains, middle):
+                left, right = domain.copy(), domain.copy()
+                left[:, d, 1], right[:, d, 0] = m, m
+                split += [left, right]
+            domains = split
+        # children of a node are contiguous: (node 0 child 0, node 0 child 1, ...), so interleave the 2^k lists
+        nChildren = len(pieces)
+        pieces = np.stack(pieces, axis=1).reshape((-1,) + self._pieces.shape[1:])
+        domains = np.stack(domains, axis=1).reshape((-1,) + self._domains.shape[1:])
+        firstPiece = len(self._pieces)
+        self._pieces = np.concatenate([self._pieces, pieces])
+        self._domains = np.concatenate([self._domains, domains])
+        self._depth = np.concatenate([self._depth, np.repeat(self._depth[self._piece[nodes]] + 1, nChildren)])
+        lower, upper, anchors = self._PieceBoxes(pieces)
+        firstNode = len(self._lower)
+        self._lower = np.concatenate([self._lower, lower])
+        self._upper = np.concatenate([self._upper, upper])
+        self._anchor = np.concatenate([self._anchor, anchors])
+        self._firstChild = np.concatenate([self._firstChild, np.full(len(pieces), -1)])
+        self._childCount = np.concatenate([self._childCount, np.zeros(len(pieces), dtype=int)])
+        self._piece = np.concatenate([self._piece, firstPiece + np.arange(len(pieces))])
+        self._firstChild[nodes] = firstNode + nChildren * np.arange(len(nodes))
+        self._childCount[nodes] = nChildren
+        self._piece[nodes] = -1
+
+    def _Traverse(self, nQueries, Keep):
+        """
+        Returns arrays (queries, nodes) of the leaves reached by each query, descending from the root through the nodes
+        for which Keep(queries, nodes) is True and subdividing large leaves on the way.
+
+        Arguments:
+        nQueries -- number of queries
+        Keep -- function mapping arrays (queries, nodes) of pairs to an array of booleans, True for pairs to descend into
+        """
+        queries, nodes = np.arange(nQueries), np.zeros(nQueries, dtype=int)
+        leafQueries, leafNodes = [], []
+        while len(queries):
+            keep = Keep(queries, nodes)
+            queries, nodes = queries[keep], nodes[keep]
+            leaf = self._firstChild[nodes] < 0
+            diagonal = np.linalg.norm(self._upper[nodes] - self._lower[nodes], axis=1)
+            split = leaf & (diagonal > self._leafSize) & (self._depth[self._piece[nodes]] < self.maxDepth)
+            if np.any(split):
+                self._Subdivide(np.unique(nodes[split]))
+                leaf = self._firstChild[nodes] < 0
+            leafQueries.append(queries[leaf])
+            leafNodes.append(nodes[leaf])
+            queries, nodes = queries[~leaf], nodes[~leaf]
+            counts = self._childCount[nodes]
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            queries, nodes = np.repeat(queries, counts), np.repeat(self._firstChild[nodes], counts) + offsets
+        return np.concatenate(leafQueries), np.concatenate(leafNodes)
+
+    def ClosestPoints(self, points, tolerance=1e-10, maxIterations=20):
+        """
+        Returns a tuple (parameters, closest, distances) of the parameters (shape = (number of points, k)) and Cartesian
+        coordinates of the closest point of the curve or surface to each of a set of points, and the distances to them.
+        The tree is searched branch and bound, with the corners of the pieces (which lie on the geometry) giving upper
+        bounds on the distance. Each point is then projected onto the pieces that may hold its closest point, nearest
+        box first, within each piece's parametric domain, until no remaining box is closer than the closest point found.
+        The closest point found is finally polished by Newton iteration over the whole parametric domain (as in Invert),
+        so that it matches Invert to the solver tolerance.
+
+        Arguments:
+        points -- array (shape = (number of points, dimension)) of Cartesian coordinates
+        tolerance -- distance moved by a Newton step below which the projection stops (default = 1e-10)
+        maxIterations -- maximum number of Newton iterations per candidate piece, and of the final polish (default = 20)
+        """
+        self._Update()
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        bound = np.full(len(points), np.inf)
+        def LowerBound(queries, nodes):
+            p = points[queries]
+            gap = np.maximum(self._lower[nodes] - p, 0) + np.maximum(p - self._upper[nodes], 0)
+            return np.einsum('ij,ij->i', gap, gap)
+        def Keep(queries, nodes):
+            np.minimum.at(bound, queries, np.sum((points[queries] - self._anchor[nodes]) ** 2, axis=1))
+            return LowerBound(queries, nodes) <= bound[queries]
+        queries, nodes = self._Traverse(len(points), Keep)
+        lowerBounds = LowerBound(queries, nodes)
+        
+        # project onto the nearest box's piece first, which bounds the distance with a point on the geometry, then onto
+        # every other piece whose box is closer than that point
+        geometry = self.geometry
+        Derivatives = lambda u: geometry.PartialDerivativesAt(u, True)
+        result = np.empty((len(points), self.nDirections))
+        distances = np.full(len(points), np.inf)
+        order = np.lexsort((lowerBounds, queries))
+        queries, nodes, lowerBounds = queries[order], nodes[order], lowerBounds[order]
+        first = np.r_[True, queries[1:] != queries[:-1]] if len(queries) else np.zeros(0, dtype=bool)
+        for iteration in range(2):
+            q, domains = queries[first], self._domains[self._piece[nodes[first]]]
+            u = _ClippedProjection(Derivatives, points[q], domains.mean(axis=2), domains[:, :, 0], domains[:, :, 1], tolerance, maxIterations)
+            d = np.linalg.norm(geometry.EvaluateAt(u if self.nDirections > 1 else u[:, 0]) - points[q], axis=1)
+            # the nearest projection of each point in this pass
+            nearest = np.lexsort((d, q))
+            nearest = nearest[np.r_[True, q[nearest][1:] != q[nearest][:-1]]] if len(nearest) else nearest
+            q, u, d = q[nearest], u[nearest], d[nearest]
+            better = d < distances[q]
+            result[q[better]], distances[q[better]] = u[better], d[better]
+            first = ~first & (lowerBounds < distances[queries] ** 2)
+        # polish over the whole parametric domain, where a projection clipped to its piece can still move on
+        lower, upper = geometry.ParametricDomain()
+        polished = gf.NewtonPointInversion(Derivatives, points, result, lower, upper, tolerance,
+                                           maxIterations=maxIterations, closed=geometry.ClosedDirections())[0]
+        d = np.linalg.norm(geometry.EvaluateAt(polished if self.nDirections > 1 else polished[:, 0]) - points, axis=1)
+        better = d < distances
+        result[better], distances[better] = polished[better], d[better]
+        closest = geometry.EvaluateAt(result if self.nDirections > 1 else result[:, 0])
+        return result, closest, distances
+
+    def IntersectRays(self, origins, directions, tolerance=1e-10, maxIterations=20):
+        """
+        Returns a tuple (hit, t, parameters, points) for the first intersection of each ray with a surface: whether
+        the ray hits the surface, the ray parameter t of the hit (origin + t * direction, t >= 0; inf for a miss), and
+        the surface parameters (shape = (number of rays, 2)) and Cartesian coordinates of the hit (nan for a miss).
+        Each ray is intersected (by Newton iteration on surface(u, v) = origin + t * direction) with every piece whose box it passes through.
+
+        Arguments:
+        origins -- array (shape = (number of rays, 3)) of ray origins
+        directions -- array (shape = (number of rays, 3)) of ray directions
+        tolerance -- distance below which the ray and surface points are considered coincident (default = 1e-10)
+        maxIterations -- maximum number of Newton iterations per candidate piece (default = 20)
+        """
+        self._Update()
+        if self.nDirections != 2:
+            raise ValueError("ray intersection needs a surface, not a geometry with {} parametric directions".format(self.nDirections))
+        origins = np.atleast_2d(np.asarray(origins, dtype=float))
+        directions = np.atleast_2d(np.asarray(directions, dtype=float))
+        def Keep(queries, nodes):
+            # slab test, widened by the tolerance
+            o, d = origins[queries], directions[queries]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t1 = (self._lower[nodes] - tolerance - o) / d
+                t2 = (self._upper[nodes] + tolerance - o) / d
+            # a ray parallel to a slab is inside it for all t, or for none
+            parallel = d == 0
+            inside = (o >= self._lower[nodes] - tolerance) & (o <= self._upper[nodes] + tolerance)
+            tNear = np.where(parallel, np.where(inside, -np.inf, np.inf), np.minimum(t1, t2)).max(axis=1)
+            tFar = np.where(parallel, np.where(inside, np.inf, -np.inf), np.maximum(t1, t2)).min(axis=1)
+            return tFar >= np.maximum(tNear, 0)
+        queries, nodes = self._Traverse(len(origins), Keep)
+
+        surface = self.geometry
+        domains = self._domains[self._piece[nodes]]
+        lower = np.concatenate([domains[:, :, 0], np.zeros((len(nodes), 1))], axis=1)
+        upper = np.concatenate([domains[:, :, 1], np.full((len(nodes), 1), np.inf)], axis=1)
+        x = np.concatenate([domains.mean(axis=2), np.zeros((len(nodes), 1))], axis=1)
+        # start t at the projection of the middle of the piece onto the ray
+        o, d = origins[queries], directions[queries]
+        middle = surface.EvaluateAt(x[:, :2])
+        x[:, 2] = np.maximum(np.einsum('ij,ij->i', middle - o, d) / np.einsum('ij,ij->i', d, d), 0)
+        def Residual(x, rows):
+            S, first, second = surface.PartialDerivativesAt(x[:, :2])
+            F = S - origins[queries[rows]] - x[:, 2:] * directions[queries[rows]]
+            return F, np.concatenate([first, -directions[queries[rows], :, None]], axis=2)
+        x, converged = _ClippedNewton(Residual, x, lower, upper, tolerance, maxIterations)
+
+        hit = np.zeros(len(origins), dtype=bool)
+        t = np.full(len(origins), np.inf)
+        parameters = np.full((len(origins), 2), np.nan)
+        queries, x = queries[converged], x[converged]
+        order = np.lexsort((x[:, 2], queries))
+        first = order[np.r_[True, queries[order][1:] != queries[order][:-1]]] if len(order) else order
+        hit[queries[first]] = True
+        t[queries[first]] = x[first, 2]
+        parameters[queries[first]] = x[first, :2]
+        points = np.full(origins.shape, np.nan)
+        points[hit] = origins[hit] + t[hit, None] * directions[hit]
+        return hit, t, parameters, points
+
+    def Contains(self, points, tolerance=1e-10, maxIterations=20):
+        """
+        Returns a tuple (inside, parameters) of whether each point lies inside a volume (e.g. a deformed FFD lattice)
+        and its parametric coordinates (shape = (number of points, 3), nan for points outside). Points outside every
+        leaf box are outside; the others are inverted (by Newton iteration) in every piece whose box contains them.
+
+        Arguments:
+        points -- array (shape = (number of points, 3)) of Cartesian coordinates
+        tolerance -- distance below which a point is considered to lie on the volume (default = 1e-10)
+        maxIterations -- maximum number of Newton iterations per candidate piece (default = 20)
+        """
+        self._Update()
+        if self.nDirections != 3:
+            raise ValueError("containment needs a volume, not a geometry with {} parametric directions".format(self.nDirections))
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        def Keep(queries, nodes):
+            p = points[queries]
+            return np.all((p >= self._lower[nodes] - tolerance) & (p <= self._upper[nodes] + tolerance), axis=1)
+        queries, nodes = self._Traverse(len(points), Keep)
+
+        volume = self.geometry
+        domains = self._domains[self._piece[nodes]]
+        def Residual(x, rows):
+            V, first, second = volume.PartialDerivativesAt(x)
+            return V - points[queries[rows]], first
+        x, converged = _ClippedNewton(Residual, domains.mean(axis=2), domains[:, :, 0], domains[:, :, 1], tolerance, maxIterations)
+
+        inside = np.zeros(len(points), dtype=bool)
+        parameters = np.full(points.shape, np.nan)
+        inside[queries[converged]] = True
+        parameters[queries[converged]] = x[converged]
+        return inside, parameters
@@ -0,0 +1,209 @@
+import numpy as np
+from . import geom_functions as gf
+from . import geom_classes as gc
+from . import geom_structures as gs
+
+# Free-form deformation lattices: NURBS volumes over a parallelepiped in which points are embedded once and then
+# deformed, as the lattice control points move, by sparse products with their precomputed basis functions.
+
+class FFDLattice(gc.NURBSVolume):
+    """
+    Creates a free-form deformation (FFD) lattice: a NURBS volume whose control points start evenly spread
+    (at the Greville abscissae) over a parallelepiped, so that the undeformed lattice maps each local coordinate
+    (s, t, u) in [0, 1]^3 to origin + s*S + t*T + u*U. Points embedded in the lattice follow its control points
+    when they are moved.
+    
+    Keyword arguments:
+    origin -- Cartesian coordinates of the lattice corner at s = t = u = 0 (default = [0, 0, 0])
+    axes -- list of the three lattice edge vectors S, T and U (default = unit vectors)
+    nControlPoints -- number of control points in directions 1, 2 and 3 (default = (4, 4, 4))
+    degrees -- degree of polynomial segments in directions 1, 2 and 3 (default = (3, 3, 3))
+    
+    Constraints:
+    nControlPoints[i] - 1 >= degrees[i] >= 1
+    S, T and U are linearly independent
+    """
+    def __init__(self, **kwargs):
+        unknown = set(kwargs) - {'origin', 'axes', 'nControlPoints', 'degrees'}
+        if unknown:
+            raise TypeError("{}() got unexpected keyword arguments {}".format(type(self).__name__, sorted(unknown)))
+        origin = np.asarray(kwargs.get('origin', np.zeros(3)), dtype=float)
+        axes = np.asarray(kwargs.get('axes', np.eye(3)), dtype=float)
+        nControlPoints = np.asarray(kwargs.get('nControlPoints', (4, 4, 4)))
+        degrees = np.asarray(kwargs.get('degrees', (3, 3, 3)))
+        if origin.shape != (3,):
+            raise ValueError("FFDLattice origin must have shape (3,), not {}".format(origin.shape))
+        if axes.shape != (3, 3):
+            raise ValueError("FFDLattice axes must have shape (3, 3), not {}".format(axes.shape))
+        if nControlPoints.shape != (3,) or degrees.shape != (3,):
+            raise ValueError("FFDLattice nControlPoints and degrees must each have 3 entries, not shapes {} and {}".format(nControlPoints.shape, degrees.shape))
+        for direction, (n, degree) in enumerate(zip(nControlPoints.tolist(), degrees.tolist()), 1):
+            if not 1 <= degree <= n - 1:
+                raise ValueError("FFDLattice degree{} == {} is not in [1, {}] for {} control points".format(direction, degree, n - 1, n))
+        if not np.all(np.isfinite(axes)) or np.linalg.matrix_rank(axes) < 3:
+            raise ValueError("FFDLattice axes must be linearly independent")
+        self.origin, self.axes = origin, axes
+        knotVectors = [gf.KnotVector(n, degree) for n, degree in zip(nControlPoints.tolist(), degrees.tolist())]
+        
+        # Greville abscissae give the undeformed lattice linear precision
+        greville = []
+        for n, knotVector, degree in zip(nControlPoints.tolist(), knotVectors, degrees.tolist()):
+            g = np.array([np.mean(knotVector[i+1:i+degree+1]) for i in range(n)])
+            greville.append(g / knotVector[-1])
+        s, t, u = np.meshgrid(*greville, indexing='ij')
+        self.restControlPoints = origin + s[..., None] * axes[0] + t[..., None] * axes[1] + u[..., None] * axes[2]
+        self.embedding = None
+        super().__init__(controlPoints=self.restControlPoints.copy(), degree1=degrees[0], degree2=degrees[1], degree3=degrees[2],
+                         knotVector1=knotVectors[0], knotVector2=knotVectors[1], knotVector3=knotVectors[2])
+    
+    def LocalCoordinates(self, points):
+        """
+        Returns an array (shape = (number of points, 3)) of local lattice coordinates (s, t, u) of Cartesian points,
+        which lie in [0, 1]^3 for points inside the undeformed lattice.
+        
+        Arguments:
+        points -- array (shape = (number of points, 3)) of Cartesian coordinates
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        return np.linalg.solve(self.axes.T, (points - self.origin).T).T
+
+    def _ReplaceNet(self, direction, Refine):
+        # Refines the rest lattice along with the control net; embedded basis functions would refer to the old net.
+        if self.embedding is not None:
+            raise RuntimeError("cannot refine a lattice with embedded points: refine before calling Embed")
+        knotAttribute, degreeAttribute = self._DirectionAttributes(direction)
+        restPw = gf.WeightedControlPoints(self.restControlPoints, self.weights, 3)
+        knotVector, restPw = Refine(getattr(self, degreeAttribute), getattr(self, knotAttribute), restPw, direction - 1)
+        super()._ReplaceNet(direction, Refine)
+        self.restControlPoints = restPw[..., :-1] / restPw[..., -1:]
+
+    def Embed(self, points, tolerance=1e-12, dtype=np.float64):
+        """
+        Embeds points in the lattice, precomputing each point's local coordinates and the sparse matrix of rational
+        basis functions that maps lattice control points to the point. Points are located with the affine map of the
+        undeformed lattice, or by point inversion if the control points have already been moved.
+        Points outside the lattice are not deformed.
+        With dtype=np.float32 the basis functions are still computed in float64, but the embedded points and basis
+        functions are stored, and Deform computes and returns the deformed points, in float32: this halves the memory of
+        the embedding (which holds (degree1 + 1)(degree2 + 1)(degree3 + 1) basis functions per point) and of every deformation.
+        The rational basis functions are non-negative and sum to one, so a deformed point x is within
+        (n + 2) * u * max(abs(displacements)) + 2 * u * abs(x) of its float64 value, where n is the number of basis
+        functions per point and u = 2**-24 = 6.0e-8: the contraction error scales with the displacements, not the coordinates.
+        
+        Arguments:
+        points -- array (shape = (number of points, 3)) of Cartesian coordinates
+        tolerance -- distance (in local coordinates) by which a point may lie outside [0, 1]^3 and still be embedded (default = 1e-12)
+        dtype -- floating point type of the embedding and deformed points, np.float32 or np.float64 (default = np.float64)
+        """
+        dtype = gc._FloatType(dtype)
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        controlPoints = self.controlPoints
+        lower, upper = self.ParametricDomain()
+        if np.array_equal(controlPoints, self.restControlPoints):
+            stu = self.LocalCoordinates(points)
+            inside = np.all((stu >= -tolerance) & (stu <= 1 + tolerance), axis=1)
+            stu = np.clip(stu[inside], 0, 1)
+        else:
+            parameters, inside, iterations = self.Invert(points)
+            stu = (parameters[inside] - lower) / (upper - lower)
+        parameters = lower + stu * (upper - lower)
+        indices, data = gf.TensorProductBasisFunsBatch(parameters, (self.knotVector1, self.knotVector2, self.knotVector3),
+                                                       (self.degree1, self.degree2, self.degree3))
+        # rational basis functions R = N * w / sum(N * w)
+        data = data * self.weights.ravel()[indices]
+        data /= data.sum(axis=1, keepdims=True)
+        self.embedding = {'points': points.astype(dtype, copy=False), 'inside': np.flatnonzero(inside), 'localCoordinates': stu,
+                          'indices': indices, 'data': data.astype(dtype, copy=False), 'controlPoints': controlPoints}
+        return self.embedding
+    
+    def Deform(self, displacements=None, workers=None, incremental=False):
+        """
+        Returns an array (shape = (number of points, 3)) of the embedded points after deformation of the lattice,
+        computed as one sparse matrix product of the embedding's basis functions with the control point displacements,
+        in the precision the points were embedded in (see Embed).
+        
+        Arguments:
+        displacements -- array (shape = shape(controlPoints)) of control point displacements since the points were embedded
+                         (default = current controlPoints - controlPoints when Embed was called)
+        workers -- number of threads the product is split over in blocks of points (default = serial)
+        incremental -- True (with the default displacements) to keep the (read-only) result and, on later incremental
+                       calls, update it in place for the points influenced by control points changed by UpdateControlPoints
+                       (default = False)
+        """
+        if self.embedding is None:
+            raise RuntimeError("no points embedded: call Embed(points) first")
+        if incremental:
+            if displacements is not None:
+                raise ValueError("incremental deformation follows the control points: displacements cannot be given")
+            return self._DeformIncremental(workers)
+        if displacements is None:
+            displacements = self.controlPoints - self.embedding['controlPoints']
+        dtype = self.embedding['data'].dtype
+        displacements = np.asarray(displacements, dtype=float).astype(dtype, copy=False).reshape(-1, 3)
+        deformed = self.embedding['points'].copy()
+        if workers is None:
+            deformed[self.embedding['inside']] += gf.SparseRowsDot(self.embedding['indices'], self.embedding['data'], displacements)
+        else:
+            from . import parallel
+            deformed[self.embedding['inside']] += parallel.SparseRowsDotChunked(self.embedding['indices'], self.embedding['data'], displacements, workers)
+        return deformed
+    
+    def _DeformIncremental(self, workers):
+        # Returns the kept deformed points, recomputing those influenced by control points changed since they were
+        # computed: a point depends on the control points in the (degree + 1)^3 block that starts at its first column.
+        embedding = self.embedding
+        if 'deformed' not in embedding:
+            deformed = self.Deform(workers=workers)
+            deformed.flags.writeable = False
+            embedding['deformed'] = (self.netVersion, deformed)
+            return deformed
+        version, deformed = embedding['deformed']
+        if version == self.netVersion:
+            return deformed
+        changed = self._EditsSince(version)
+        deformed.flags.writeable = True
+        if changed is None:
+            deformed[...] = self.Deform(workers=workers)
+        else:
+            if 'firstIndices' not in embedding:
+                embedding['firstIndices'] = np.stack(np.unravel_index(embedding['indices'][:, 0], self.weights.shape), axis=1).astype(np.int32)
+            firstIndices = embedding['firstIndices']
+            degrees = np.array([self.degree1, self.degree2, self.degree3])
+            affected = np.zeros(len(firstIndices), dtype=bool)
+            for index in changed:
+                affected |= np.all((firstIndices <= index) & (index <= firstIndices + degrees), axis=1)
+            rows = np.flatnonzero(affected)
+            displacements = (self.controlPoints - embedding['controlPoints']).astype(deformed.dtype, copy=False).reshape(-1, 3)
+            inside = embedding['inside'][rows]
+            deformed[inside] = embedding['points'][inside] + gf.SparseRowsDot(embedding['indices'][rows], embedding['data'][rows], displacements)
+        deformed.flags.writeable = False
+        embedding['deformed'] = (self.netVersion, deformed)
+        return deformed
+    
+    def DeformationJacobian(self):
+        """
+        Returns a ControlNetJacobian of the deformed embedded points with respect to the lattice control points.
+        Weights are fixed when points are embedded, so there is no weight Jacobian; points outside the lattice have empty rows.
+        """
+        if self.embedding is None:
+            raise RuntimeError("no points embedded: call Embed(points) first")
+        nPoints = len(self.embedding['points'])
+        indices = np.zeros((nPoints, self.embedding['indices'].shape[1]), dtype=int)
+        data = np.zeros(indices.shape)
+        indices[self.embedding['inside']] = self.embedding['indices']
+        data[self.embedding['inside']] = self.embedding['data']
+        return gs.ControlNetJacobian(indices, data, None, self.restControlPoints[..., 0].size, 3)
+    
+    def DeformationVectorJacobianProduct(self, cotangents):
+        """
+        Returns the gradient (shape = shape(controlPoints)) of sum(cotangents * deformed points) with respect to the
+        lattice control points, computed as one transposed sparse product without forming the Jacobian.
+        
+        Arguments:
+        cotangents -- array (shape = (number of embedded points, 3)) of sensitivities of an objective to each deformed point
+        """
+        if self.embedding is None:
+            raise RuntimeError("no points embedded: call Embed(points) first")
+        cotangents = np.asarray(cotangents, dtype=float)[self.embedding['inside']]
+        gradient = gf.SparseRowsTransposeDot(self.embedding['indices'], self.embedding['data'], cotangents, self.restControlPoints[..., 0].size)
+        return gradient.reshape(self.restControlPoints.shape)
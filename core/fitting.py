@@ -0,0 +1,171 @@
+import numpy as np
+from . import geom_functions as gf
+from . import geom_classes as gc
+
+# Global interpolation and least squares approximation of curves and surfaces to data points, after chapter 9 of
+# 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997. The collocation matrix of the basis functions at the data parameters
+# has at most degree + 1 non-zero entries per row, so the linear systems are assembled in band storage and solved by
+# gf.SolveBanded: fitting time grows linearly with the number of data points, not with its cube as for dense solves.
+# Surfaces are fitted to grids of data points as repeated curve fits, first along direction 1 and then along direction 2,
+# with every curve of a direction solved at once as extra right hand sides of the same banded system.
+
+def _Collocation(parameters, knotVector, degree):
+    # Returns the first non-zero column and non-zero values of each row of the collocation matrix N[k, i] = N_i(parameters[k]).
+    spans = gf.FindSpans(degree, parameters, knotVector)
+    return spans - degree, gf.BSplineBasisFunsBatch(spans, parameters, degree, knotVector)
+
+def _CheckParameters(parameters, nPoints, strictly):
+    # Returns parameters as a float array, checked to be ordered and one per data point. Chord length parameters of
+    # data points that all coincide (zero total chord length) are nan, and are reported as coincident points.
+    parameters = np.asarray(parameters, dtype=float)
+    if parameters.shape == (nPoints,) and nPoints > 1 and np.all(np.isnan(parameters)):
+        raise ValueError("data points all coincide: consecutive data points must not coincide")
+    if parameters.shape != (nPoints,) or np.any(np.isnan(parameters)):
+        raise ValueError("parameters must be {} numbers, one per data point".format(nPoints))
+    steps = np.diff(parameters)
+    if np.any(steps <= 0 if strictly else steps < 0):
+        raise ValueError("parameters must be {}increasing: consecutive data points must not coincide".format('strictly ' if strictly else 'non-'))
+    return parameters
+
+def _Interpolate(parameters, degree, data):
+    # Returns (knotVector, control points) of the interpolant of data (shape = (number of points, ...)) by algorithm A9.1.
+    n = len(parameters)
+    if not 1 <= degree <= n - 1:
+        raise ValueError("degree == {} is not in [1, {}] for {} data points".format(degree, n - 1, n))
+    knotVector = gf.AveragedKnotVector(parameters, degree)
+    firstColumns, B = _Collocation(parameters, knotVector, degree)
+    lower, upper, bands = gf.BandedRows(firstColumns, B, n)
+    return knotVector, gf.SolveBanded(lower, upper, bands, data)
+
+def _Approximate(parameters, degree, nControlPoints, data):
+    # Returns (knotVector, control points) of the least squares approximation of data (shape = (number of points, ...))
+    # that interpolates the first and last data points, by the normal equations of section 9.4.1.
+    m, n = len(parameters) - 1, nControlPoints - 1
+    if not 1 <= degree <= n or n > m:
+        raise ValueError("{} control points of degree {} cannot be fitted to {} data points".format(nControlPoints, degree, m + 1))
+    if n == m:
+        return _Interpolate(parameters, degree, data)
+    knotVector = gf.ApproximationKnotVector(parameters, degree, nControlPoints)
+    firstColumns, B = _Collocation(parameters, knotVector, degree)
+    columns = firstColumns[:, None] + np.arange(degree + 1)
+    data = np.asarray(data, dtype=float)
+    values = data.reshape(m + 1, -1)
+    # the end control points are the end data points, so their basis functions move to the right hand side
+    residuals = values - np.where(columns == 0, B, 0).sum(axis=1)[:, None] * values[0] - np.where(columns == n, B, 0).sum(axis=1)[:, None] * values[m]
+    B = np.where((columns == 0) | (columns == n), 0, B)
+    lower, upper, bands = gf.BandedNormalMatrix(firstColumns, B, n + 1)
+    rhs = gf.SparseRowsTransposeDot(columns, B, residuals, n + 1)
+    bands[upper, [0, n]] = 1
+    rhs[0], rhs[n] = values[0], values[m]
+    controlPoints = gf.SolveBanded(lower, upper, bands, rhs)
+    return knotVector, controlPoints.reshape((n + 1,) + data.shape[1:])
+
+def _Curve(controlPoints, degree, knotVector, rational):
+    if rational:
+        return gc.NURBSCurve(controlPoints=controlPoints, degree=degree, knotVector=knotVector)
+    return gc.BSplineCurve(controlPoints=controlPoints, degree=degree, knotVector=knotVector)
+
+def _SurfaceParameters(points, method):
+    # Returns the parameters of a grid of data points in each direction: the average of the parameters of every line of
+    # points along that direction, skipping degenerate lines, as in algorithm A9.3 on pg 377.
+    parameters = []
+    for lines in (np.swapaxes(points, 0, 1), points):
+        lineParameters = gf.FittingParameters(lines, method)
+        valid = ~np.isnan(lineParameters[:, -1])
+        if not np.any(valid):
+            raise ValueError("every line of data points has coincident points")
+        parameters.append(lineParameters[valid].mean(axis=0))
+    return parameters
+
+def InterpolateCurve(points, degree=3, method='chordlength', parameters=None, rational=False):
+    """
+    Returns the curve of the given degree that passes through every data point, with one control point per data point,
+    a knot vector averaged from the data parameters, and control points solved from the banded collocation system.
+    This is algorithm A9.1 on pg 369 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997.
+
+    Arguments:
+    points -- array (shape = (number of points, dimension)) of Cartesian coordinates, in order along the curve
+    degree -- degree of polynomial segments (default = 3)
+    method -- parameterisation of the data points: 'uniform', 'chordlength' or 'centripetal' (default = 'chordlength')
+    parameters -- strictly increasing array of data point parameters from 0 to 1, used instead of method (default = None)
+    rational -- True to return a NURBSCurve (with unit weights) instead of a BSplineCurve (default = False)
+    """
+    points = np.asarray(points, dtype=float)
+    if parameters is None:
+        parameters = gf.FittingParameters(points, method)
+    parameters = _CheckParameters(parameters, len(points), strictly=True)
+    knotVector, controlPoints = _Interpolate(parameters, degree, points)
+    return _Curve(controlPoints, degree, knotVector, rational)
+
+def ApproximateCurve(points, nControlPoints, degree=3, method='chordlength', parameters=None, rational=False):
+    """
+    Returns the curve of the given degree with nControlPoints control points that passes through the first and last data
+    points and approximates the others in the least squares sense, from the banded normal equations.
+    This is the least squares approximation of section 9.4.1 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997.
+
+    Arguments:
+    points -- array (shape = (number of points, dimension)) of Cartesian coordinates, in order along the curve
+    nControlPoints -- number of control points, from degree + 1 to the number of points
+    degree -- degree of polynomial segments (default = 3)
+    method -- parameterisation of the data points: 'uniform', 'chordlength' or 'centripetal' (default = 'chordlength')
+    parameters -- non-decreasing array of data point parameters from 0 to 1, used instead of method (default = None)
+    rational -- True to return a NURBSCurve (with unit weights) instead of a BSplineCurve (default = False)
+    """
+    points = np.asarray(points, dtype=float)
+    if parameters is None:
+        parameters = gf.FittingParameters(points, method)
+    parameters = _CheckParameters(parameters, len(points), strictly=False)
+    knotVector, controlPoints = _Approximate(parameters, degree, nControlPoints, points)
+    return _Curve(controlPoints, degree, knotVector, rational)
+
+def InterpolateSurface(points, degree1=3, degree2=3, method='chordlength', parameters=None):
+    """
+    Returns the NURBSSurface (with unit weights) that passes through every point of a grid of data points, with one
+    control point per data point. This is algorithm A9.4 on pg 380 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997.
+
+    Arguments:
+    points -- array (shape = (number of points in direction 1, number of points in direction 2, dimension)) of Cartesian
+              coordinates, indexed like the control points of a NURBSSurface
+    degree1 -- degree of polynomial segments in direction 1 (default = 3)
+    degree2 -- degree of polynomial segments in direction 2 (default = 3)
+    method -- parameterisation of the data points: 'uniform', 'chordlength' or 'centripetal' (default = 'chordlength')
+    parameters -- pair of strictly increasing arrays of data point parameters from 0 to 1 in each direction,
+                  used instead of method (default = None)
+    """
+    points = np.asarray(points, dtype=float)
+    if parameters is None:
+        parameters = _SurfaceParameters(points, method)
+    parameters1 = _CheckParameters(parameters[0], points.shape[0], strictly=True)
+    parameters2 = _CheckParameters(parameters[1], points.shape[1], strictly=True)
+    knotVector1, R = _Interpolate(parameters1, degree1, points)
+    knotVector2, controlPoints = _Interpolate(parameters2, degree2, np.swapaxes(R, 0, 1))
+    return gc.NURBSSurface(controlPoints=np.swapaxes(controlPoints, 0, 1), degree1=degree1, degree2=degree2,
+                           knotVector1=knotVector1, knotVector2=knotVector2)
+
+def ApproximateSurface(points, nControlPoints1, nControlPoints2, degree1=3, degree2=3, method='chordlength', parameters=None):
+    """
+    Returns the NURBSSurface (with unit weights) with nControlPoints1 x nControlPoints2 control points that approximates
+    a grid of data points in the least squares sense, interpolating its corner points: every line of data points along
+    direction 1 is approximated as a curve, then every line of the resulting control points along direction 2, following
+    section 9.4.1 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997.
+
+    Arguments:
+    points -- array (shape = (number of points in direction 1, number of points in direction 2, dimension)) of Cartesian
+              coordinates, indexed like the control points of a NURBSSurface
+    nControlPoints1 -- number of control points in direction 1, from degree1 + 1 to the number of points in direction 1
+    nControlPoints2 -- number of control points in direction 2, from degree2 + 1 to the number of points in direction 2
+    degree1 -- degree of polynomial segments in direction 1 (default = 3)
+    degree2 -- degree of polynomial segments in direction 2 (default = 3)
+    method -- parameterisation of the data points: 'uniform', 'chordlength' or 'centripetal' (default = 'chordlength')
+    parameters -- pair of non-decreasing arrays of data point parameters from 0 to 1 in each direction,
+                  used instead of method (default = None)
+    """
+    points = np.asarray(points, dtype=float)
+    if parameters is None:
+        parameters = _SurfaceParameters(points, method)
+    parameters1 = _CheckParameters(parameters[0], points.shape[0], strictly=False)
+    parameters2 = _CheckParameters(parameters[1], points.shape[1], strictly=False)
+    knotVector1, R = _Approximate(parameters1, degree1, nControlPoints1, points)
+    knotVector2, controlPoints = _Approximate(parameters2, degree2, nControlPoints2, np.swapaxes(R, 0, 1))
+    return gc.NURBSSurface(controlPoints=np.swapaxes(controlPoints, 0, 1), degree1=degree1, degree2=degree2,
+                           knotVector1=knotVector1, knotVector2=knotVector2)
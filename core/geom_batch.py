@@ -0,0 +1,190 @@
+import numpy as np
+from . import geom_functions as gf
+from . import geom_classes as gc
+
+# Batches of geometries of one class that share degrees and knot vectors, evaluated as one contraction of their stacked
+# control nets with the basis matrices of a single template geometry.
+
+class GeometryBatch:
+    """
+    Creates a batch of geometries of one class that share their degrees and knot vectors but have their own control
+    points and weights. The control nets are stacked into one homogeneous tensor Pw (shape = (batch, n1, ..., dimension + 1)),
+    so the whole batch is evaluated with one basis matrix per parametric direction and one contraction, instead of one
+    evaluation per geometry.
+    
+    Arguments:
+    geometries -- list of BSplineCurve, NURBSCurve, NURBSSurface or NURBSVolume objects of one class, with equal degrees,
+                  knot vectors and numbers of control points
+    """
+    _gridCounts = {1: (100,), 2: (50, 50), 3: (20, 20, 20)}
+    # directions with at most this many control points per non-zero basis function are contracted as dense matrix products
+    _denseRatio = 64
+    
+    def __init__(self, geometries):
+        geometries = list(geometries)
+        if not geometries:
+            raise ValueError("a GeometryBatch needs at least one geometry")
+        first = geometries[0]
+        cls = self._BatchClass(first)
+        for i, geometry in enumerate(geometries):
+            if not isinstance(geometry, cls):
+                raise TypeError("geometry {} is a {}, not a {}".format(i, type(geometry).__name__, cls.__name__))
+            if geometry.controlPoints.shape != first.controlPoints.shape:
+                raise ValueError("geometry {} has controlPoints of shape {}, not {}".format(i, geometry.controlPoints.shape, first.controlPoints.shape))
+            for name in cls._basisAttributes:
+                if not np.array_equal(getattr(geometry, name), getattr(first, name)):
+                    raise ValueError("geometry {} has a different {} from geometry 0".format(i, name))
+        controlPoints = np.stack([geometry.controlPoints for geometry in geometries])
+        weights = np.stack([geometry.weights for geometry in geometries]) if cls._rational else None
+        self._SetUp(cls, {name: getattr(first, name) for name in cls._basisAttributes}, controlPoints, weights)
+    
+    @classmethod
+    def FromArrays(cls, template, controlPoints, weights=None):
+        """
+        Returns a GeometryBatch with the degrees and knot vectors of template and control nets given as stacked arrays,
+        without creating a geometry object per member.
+        
+        Arguments:
+        template -- geometry whose class, degrees and knot vectors every member shares
+        controlPoints -- array (shape = (batch,) + shape(template.controlPoints)) of control points
+        weights -- array (shape = (batch,) + shape(template.weights)) of control point weights (default = ones)
+        """
+        geometryClass = cls._BatchClass(template)
+        controlPoints = np.asarray(controlPoints, dtype=float)
+        if controlPoints.shape[1:] != template.controlPoints.shape:
+            raise ValueError("controlPoints of shape {} are not a batch of control nets of shape {}".format(controlPoints.shape, template.controlPoints.shape))
+        if weights is None:
+            weights = np.ones(controlPoints.shape[:-1])
+        weights = np.asarray(weights, dtype=float)
+        if weights.shape != controlPoints.shape[:-1]:
+            raise ValueError("weights of shape {} do not match controlPoints of shape {}".format(weights.shape, controlPoints.shape))
+        batch = cls.__new__(cls)
+        batch._SetUp(geometryClass, {name: getattr(template, name) for name in geometryClass._basisAttributes}, controlPoints,
+                     weights if geometryClass._rational else None)
+        return batch
+    
+    @staticmethod
+    def _BatchClass(geometry):
+        # Returns the geometry class that members like geometry are batched as (an FFDLattice is batched as a NURBSVolume).
+        for cls in (gc.BSplineCurve, gc.NURBSCurve, gc.NURBSSurface, gc.NURBSVolume):
+            if isinstance(geometry, cls):
+                return cls
+        raise TypeError("cannot batch {} objects".format(type(geometry).__name__))
+    
+    def _SetUp(self, cls, basisAttributes, controlPoints, weights):
+        # Keeps a private template geometry (for its parametric directions and basis matrix cache) and stores the stacked
+        # control nets control point first, as (n1, ..., batch, dimension + 1), so that each row gathered by a sparse
+        # basis matrix holds the whole batch contiguously.
+        if weights is not None and np.any(weights <= 0):
+            raise ValueError("weights must be positive")
+        self._class = cls
+        templateNet = {'controlPoints': controlPoints[0]}
+        if cls._rational:
+            templateNet['weights'] = weights[0]
+        self.template = cls(**basisAttributes, **templateNet)
+        k = controlPoints.ndim - 2
+        if weights is None:
+            Pw = np.concatenate([controlPoints, np.ones(controlPoints.shape[:-1] + (1,))], axis=-1)
+        else:
+            Pw = np.concatenate([controlPoints * weights[..., None], weights[..., None]], axis=-1)
+        self._net = np.ascontiguousarray(np.moveaxis(Pw, 0, k))
+        self._net.flags.writeable = False
+        self._netCast = None
+    
+    def __len__(self):
+        return self._net.shape[-2]
+    
+    def __getitem__(self, i):
+        # Returns member i of the batch as a new geometry object.
+        net = {'controlPoints': self.controlPoints[i]}
+        if self._class._rational:
+            net['weights'] = self.weights[i]
+        return self._class(**{name: getattr(self.template, name) for name in self._class._basisAttributes}, **net)
+    
+    @property
+    def Pw(self):
+        # Returns the (read-only) stacked homogeneous control nets, shape = (batch, n1, ..., dimension + 1).
+        return np.moveaxis(self._net, -2, 0)
+    
+    @property
+    def controlPoints(self):
+        # Returns an array (shape = (batch, n1, ..., dimension)) of the control points of every member.
+        Pw = self.Pw
+        return Pw[..., :-1] / Pw[..., -1:]
+    
+    @property
+    def weights(self):
+        # Returns an array (shape = (batch, n1, ...)) of the control point weights of every member.
+        return self.Pw[..., -1]
+    
+    def _Net(self, dtype=np.float64):
+        # Returns the stacked nets as an array of dtype, keeping the last rounded copy.
+        if self._net.dtype == dtype:
+            return self._net
+        if self._netCast is None or self._netCast.dtype != dtype:
+            self._netCast = self._net.astype(dtype)
+            self._netCast.flags.writeable = False
+        return self._netCast
+    
+    def _Contract(self, bases, dtype=np.float64):
+        # Returns the stacked nets contracted with each direction's basis matrix in turn (axes as for TensorProductDot).
+        # The batch makes every row of the contraction long, so a dense basis matrix and one BLAS matrix product beat
+        # gathering degree + 1 rows per sample unless the basis matrix is very sparse.
+        result = self._Net(dtype)
+        for k, basis in enumerate(bases):
+            moved = np.moveaxis(result, k, 0)
+            if basis.shape[1] <= self._denseRatio * (basis.degree + 1):
+                result = (basis.ToDense(dtype) @ moved.reshape(len(moved), -1)).reshape((basis.shape[0],) + moved.shape[1:])
+            else:
+                result = basis.Dot(moved)
+        return result
+    
+    def _Cartesian(self, Xw):
+        # Moves the batch axis of a contracted net (shape = (..., batch, dimension + 1)) to the front and projects it.
+        Xw = np.moveaxis(Xw, -2, 0)
+        if not self._class._rational:
+            return Xw[..., :-1]
+        return Xw[..., :-1] / Xw[..., -1:]
+    
+    def Evaluate(self, *counts, **kwargs):
+        """
+        Returns an array (shape = (batch,) + shape of the members' Evaluate results) of Cartesian coordinates of every
+        member on the same grid of parameters. The basis matrices are built (and cached) once for the whole batch.
+        
+        Arguments:
+        counts -- number of points in each parametric direction, as N (curves), N1, N2 (surfaces) or N1, N2, N3 (volumes)
+                  (default = the members' Evaluate defaults; may also be given as keyword arguments)
+        
+        Keyword arguments:
+        start, stop (curves) or start1, stop1, start2, stop2, ... -- parametric range of the grid, as for the members' Evaluate
+        dtype -- floating point type of the contractions and result, as for the members' Evaluate (default = np.float64)
+        """
+        directions = self.template._directions
+        names = ['N'] if len(directions) == 1 else ['N{}'.format(k + 1) for k in range(len(directions))]
+        counts = list(counts) + [kwargs.get(name, default) for name, default in zip(names, self._gridCounts[len(directions)])][len(counts):]
+        bases = []
+        for k, ((knotVector, degree), N) in enumerate(zip(directions, counts)):
+            suffix, direction = ('', None) if len(directions) == 1 else (str(k + 1), k + 1)
+            start = kwargs.get('start' + suffix, knotVector[degree])
+            stop = kwargs.get('stop' + suffix, knotVector[-(degree + 1)])
+            bases.append(self.template._CachedBasisMatrix(knotVector, degree, start, stop, N, direction=direction))
+        return self._Cartesian(self._Contract(bases, gc._FloatType(kwargs.get('dtype', np.float64))))
+    
+    def EvaluateAt(self, parameters, dtype=np.float64):
+        """
+        Returns an array (shape = (batch, len(parameters), dimension)) of Cartesian coordinates of every member at the
+        same scattered parameters.
+        
+        Arguments:
+        parameters -- array (shape = (number of points, number of parametric directions)) of parametric coordinates
+                      (for curves, an array of parametric coordinates)
+        dtype -- floating point type of the contraction and result, as for the members' Evaluate (default = np.float64)
+        """
+        dtype = gc._FloatType(dtype)
+        directions = self.template._directions
+        parameters = np.asarray(parameters, dtype=float).reshape(-1, len(directions))
+        indices, data = gf.TensorProductBasisFunsBatch(parameters, [knotVector for knotVector, degree in directions],
+                                                       [degree for knotVector, degree in directions])
+        net = self._Net(dtype)
+        net = net.reshape((-1,) + net.shape[-2:])
+        return self._Cartesian(gf.SparseRowsDot(indices, data.astype(dtype, copy=False), net))
@@ -1,106 +1,1093 @@
-import geom_functions as gf
+from . import geom_functions as gf
 import numpy as np
+import operator
+from collections import OrderedDict
+from .geom_structures import SpatialGrid, ControlNetJacobian, Tessellation, PowerBasisPatches, ArcLengthTable
 
-class BSplineCurve:
+class BasisMatrix:
     """
-    Creates a B-Spline curve object.
+    Creates a sparse matrix of B-Spline basis functions evaluated at an array of parameters.
+    The matrix is stored CSR-style: row i has degree + 1 non-zero entries, data[i], in columns indices[i] = span[i] - degree ... span[i].
+    
+    Arguments:
+    parameters -- array of parametric coordinates (one row per parameter)
+    knotVector -- list of parametric coords that define knot locations
+    degree -- degree of polynomial segments
+    order -- highest order of basis function derivative also stored, in derivatives[1:] (default = 0)
+    """
+    def __init__(self, parameters, knotVector, degree, order=0):
+        self.parameters = np.atleast_1d(np.asarray(parameters, dtype=float))
+        self.knotVector = np.asarray(knotVector, dtype=float)
+        self.degree = degree
+        self.order = order
+        self.spans = gf.FindSpans(degree, self.parameters, self.knotVector)
+        if order == 0:
+            self.derivatives = gf.BSplineBasisFunsBatch(self.spans, self.parameters, degree, self.knotVector)[None]
+        else:
+            self.derivatives = gf.DersBasisFunsBatch(self.spans, self.parameters, degree, order, self.knotVector)
+        self.data = self.derivatives[0]
+        self.indices = self.spans[:, None] - degree + np.arange(degree + 1)
+        self.indptr = np.arange(0, self.data.size + 1, degree + 1)
+        self.shape = (len(self.parameters), len(self.knotVector) - degree - 1)
+    
+    def Values(self, derivative=0, dtype=np.float64):
+        """
+        Returns the non-zero basis functions (or their derivatives) of each row as an array of dtype. They are always
+        computed in float64; a float32 copy is rounded from them once and kept with the matrix, so a cached matrix
+        serves evaluations in either precision.
+        
+        Arguments:
+        derivative -- order of the basis function derivatives, at most order (default = 0)
+        dtype -- floating point type of the values (default = np.float64)
+        """
+        values = self.derivatives[derivative]
+        dtype = np.dtype(dtype)
+        if dtype == values.dtype:
+            return values
+        if getattr(self, '_casts', None) is None:
+            self._casts = {}
+        if (derivative, dtype) not in self._casts:
+            self._casts[derivative, dtype] = values.astype(dtype)
+        return self._casts[derivative, dtype]
+    
+    def Dot(self, controlNet, derivative=0):
+        """
+        Returns the product of this matrix (or of its derivative matrix) with a control net (contracting the first axis of the control net).
+        A float32 control net is contracted with the float32 copy of the basis functions, giving a float32 result.
+        
+        Arguments:
+        controlNet -- array of control points (or weighted control points), indexed by control point along the first axis
+        derivative -- order of the basis function derivatives used, at most order (default = 0)
+        """
+        controlNet = np.asarray(controlNet)
+        dtype = np.float32 if controlNet.dtype == np.float32 else np.float64
+        return gf.SparseBasisDot(self.indices[:, 0], self.Values(derivative, dtype), controlNet)
+    
+    def ToDense(self, dtype=np.float64):
+        # Returns the basis matrix as a dense array of dtype.
+        dense = np.zeros(self.shape, dtype=dtype)
+        np.put_along_axis(dense, self.indices, self.data, axis=1)
+        return dense
+
+def TensorProductDot(bases, controlNet, derivatives=None):
+    """
+    Returns the product of the Kronecker (tensor) product of directional basis matrices with a control net,
+    without forming the Kronecker product. For bases = (basis1, basis2) the result has shape
+    (basis2.shape[0], basis1.shape[0]) + controlNet.shape[2:], and for bases = (basis1, basis2, basis3) it has shape
+    (basis3.shape[0], basis2.shape[0], basis1.shape[0]) + controlNet.shape[3:].
+    
+    Arguments:
+    bases -- list of BasisMatrix objects, one per parametric direction
+    controlNet -- array (shape = (n1, n2, ...)) of control points (or weighted control points)
+    derivatives -- list of the order of basis function derivative used in each direction (default = no derivatives)
+    """
+    if derivatives is None:
+        derivatives = (0,) * len(bases)
+    result = controlNet
+    for k, basis in enumerate(bases):
+        result = basis.Dot(np.moveaxis(result, k, 0), derivatives[k])
+    return result
+
+class BasisMatrixCache:
+    """
+    Creates a least-recently-used cache of BasisMatrix objects.
+    
+    Arguments:
+    maxSize -- maximum number of basis matrices kept before the least recently used one is evicted (default = 8)
+    """
+    def __init__(self, maxSize=8):
+        self.maxSize = maxSize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def Get(self, key, parameters, knotVector, degree, order=0):
+        """
+        Returns the cached basis matrix for key, building (and caching) it if it is not present
+        or does not store derivatives up to the requested order.
+        
+        Arguments:
+        key -- hashable key identifying the knot vector, degree and sample grid
+        parameters -- array of parametric coordinates
+        knotVector -- list of parametric coords that define knot locations
+        degree -- degree of polynomial segments
+        order -- highest order of basis function derivative required (default = 0)
+        """
+        if key in self._entries and self._entries[key].order >= order:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        self.misses += 1
+        basis = BasisMatrix(parameters, knotVector, degree, order)
+        self._entries[key] = basis
+        if len(self._entries) > self.maxSize:
+            self._entries.popitem(last=False)
+        return basis
+    
+    def Put(self, key, basis):
+        # Caches a basis matrix that was built elsewhere (e.g. loaded from a file) under key.
+        self._entries[key] = basis
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxSize:
+            self._entries.popitem(last=False)
+    
+    def Items(self):
+        # Returns a list of the (key, basis matrix) pairs in the cache, least recently used first.
+        return list(self._entries.items())
+    
+    def Clear(self):
+        # Removes all cached basis matrices.
+        self._entries.clear()
+
+def _ReadOnlyArray(value):
+    # Returns value as a C-contiguous, read-only float64 array. Arrays that already are one (such as memory maps opened
+    # by geom_io.Load) are kept without copying; anything else is copied, so the caller cannot change it afterwards.
+    if isinstance(value, np.ndarray) and value.dtype == np.float64 and value.flags.c_contiguous and not value.flags.writeable:
+        return value
+    value = np.array(value, dtype=np.float64, order='C')
+    value.flags.writeable = False
+    return value
+
+def _FloatType(dtype):
+    # Returns dtype as a NumPy dtype, checking that it is a floating point type geometries can be evaluated in.
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError("dtype == {} is not float32 or float64".format(dtype))
+    return dtype
+
+class _GeometryCacheMixin:
+    """
+    Gives a geometry class a per-instance BasisMatrixCache, which is cleared whenever one of the attributes named in
+    _basisAttributes (knot vectors and degrees) is reassigned, and a lazily built homogeneous control net Pw.
+    controlPoints, weights and knot vectors are stored as contiguous, read-only float64 arrays (read-only float64
+    arrays, such as memory maps, are stored without a copy) and degrees as ints;
+    reassigning controlPoints or weights bumps netVersion, and Pw is only rebuilt when netVersion has changed since it
+    was last built. Geometry classes list their attributes in __slots__, so instances carry no __dict__.
+    Evaluations with dtype=np.float32 contract a float32 copy of the net, rounded once per netVersion (see _Net).
+    """
+    __slots__ = ('netVersion', '_basisCache', '_Pw', '_PwVersion', '_netCast', '_powerBasis', '_arcLengthTable', '_edits', '_evaluations')
+    _basisAttributes = ()
+    _netAttributes = ('controlPoints', 'weights')
+    _dimension = 1
+    # longest log of UpdateControlPoints edits, and most incremental grid evaluations, kept per instance
+    _maxEdits = 256
+    _maxEvaluations = 4
+    
+    def __init__(self, **kwargs):
+        # Sets the attributes given as keyword arguments; degree-only directions get a clamped uniform knot vector
+        # (gf.KnotVector), and rational geometries without weights get unit weights. Complete geometries are validated.
+        unknown = set(kwargs) - set(type(self).__slots__)
+        if unknown:
+            raise TypeError("{}() got unexpected keyword arguments {}".format(type(self).__name__, sorted(unknown)))
+        for name, value in kwargs.items():
+            setattr(self, name, value)
+        if 'controlPoints' not in kwargs:
+            return
+        if 'weights' in self._netAttributes and 'weights' not in kwargs:
+            self.weights = np.ones(self.controlPoints.shape[:-1])
+        k = len(self._basisAttributes) // 2
+        for direction in range(k):
+            knotAttribute, degreeAttribute = self._basisAttributes[direction], self._basisAttributes[k + direction]
+            if degreeAttribute in kwargs and knotAttribute not in kwargs:
+                setattr(self, knotAttribute, gf.KnotVector(self.controlPoints.shape[direction], getattr(self, degreeAttribute)))
+        if all(hasattr(self, name) for name in self._basisAttributes):
+            self.Validate()
+    
+    def Validate(self):
+        """
+        Checks the documented constraints on the control net, weights, degrees and knot vectors, raising a ValueError
+        for the first one that is violated.
+        """
+        controlPoints = self.controlPoints
+        k = len(self._basisAttributes) // 2
+        name = type(self).__name__
+        if controlPoints.ndim != k + 1:
+            raise ValueError("{} controlPoints must have {} dimensions (control point indices then coordinates), not shape {}".format(name, k + 1, controlPoints.shape))
+        if 'weights' in self._netAttributes:
+            if self.weights.shape != controlPoints.shape[:-1]:
+                raise ValueError("{} weights of shape {} do not match controlPoints of shape {}".format(name, self.weights.shape, controlPoints.shape))
+            if np.any(self.weights <= 0):
+                raise ValueError("{} weights must be positive".format(name))
+        for direction in range(k):
+            knotAttribute, degreeAttribute = self._basisAttributes[direction], self._basisAttributes[k + direction]
+            n, degree, knotVector = controlPoints.shape[direction], getattr(self, degreeAttribute), getattr(self, knotAttribute)
+            if not 1 <= degree <= n - 1:
+                raise ValueError("{} {} == {} is not in [1, {}] for {} control points".format(name, degreeAttribute, degree, n - 1, n))
+            if len(knotVector) != n + degree + 1:
+                raise ValueError("{} {} has {} knots, not number of control points + degree + 1 == {}".format(name, knotAttribute, len(knotVector), n + degree + 1))
+            if np.any(np.diff(knotVector) < 0):
+                raise ValueError("{} {} is not non-decreasing".format(name, knotAttribute))
+    
+    def __setattr__(self, name, value):
+        if name in self._netAttributes:
+            value = _ReadOnlyArray(value)
+            object.__setattr__(self, 'netVersion', getattr(self, 'netVersion', 0) + 1)
+            # reassigning the whole net is not tracked: incremental evaluations start again from scratch
+            object.__setattr__(self, '_edits', None)
+        elif name in self._basisAttributes:
+            if name.startswith('knotVector'):
+                value = _ReadOnlyArray(value)
+            else:
+                value = operator.index(value)
+        object.__setattr__(self, name, value)
+        if name in self._basisAttributes:
+            if getattr(self, '_basisCache', None) is not None:
+                self._basisCache.Clear()
+            object.__setattr__(self, '_powerBasis', None)
+            object.__setattr__(self, '_arcLengthTable', None)
+            object.__setattr__(self, '_evaluations', None)
+    
+    @property
+    def Pw(self):
+        # Returns the (cached, read-only) homogeneous control net, with weights appended as the last coordinate.
+        if getattr(self, '_PwVersion', None) != self.netVersion:
+            if 'weights' in self._netAttributes:
+                Pw = gf.WeightedControlPoints(self.controlPoints, self.weights, self._dimension)
+            else:
+                Pw = np.concatenate([self.controlPoints, np.ones(self.controlPoints.shape[:-1] + (1,))], axis=-1)
+            Pw.flags.writeable = False
+            self._Pw = Pw
+            self._PwVersion = self.netVersion
+        return self._Pw
+    
+    def _Net(self, dtype=np.float64):
+        # Returns the control net contracted by evaluations (Pw, or controlPoints if the geometry has no weights) as a
+        # read-only array of dtype. The last rounded copy is kept until netVersion changes.
+        net = self.Pw if self._rational else self.controlPoints
+        if net.dtype == dtype:
+            return net
+        if getattr(self, '_netCast', None) is None or self._netCast[0] != (self.netVersion, dtype):
+            cast = net.astype(dtype)
+            cast.flags.writeable = False
+            self._netCast = ((self.netVersion, dtype), cast)
+        return self._netCast[1]
+    
+    @property
+    def basisCache(self):
+        # Returns the BasisMatrixCache of this object, creating it on first use.
+        if getattr(self, '_basisCache', None) is None:
+            self._basisCache = BasisMatrixCache()
+        return self._basisCache
+    
+    def _CachedBasisMatrix(self, knotVector, degree, start, stop, N, direction=None, order=0):
+        # Returns the (cached) basis matrix for N equally spaced parameters between start and stop.
+        knotVector = np.asarray(knotVector, dtype=float)
+        key = (direction, degree, knotVector.tobytes(), float(start), float(stop), N)
+        return self.basisCache.Get(key, np.linspace(start, stop, N), knotVector, degree, order)
+    
+    def UpdateControlPoints(self, indices, controlPoints=None, weights=None):
+        """
+        Changes some control points (and/or their weights) and records which ones changed, so that grids evaluated
+        with incremental=True are brought up to date by recomputing only the samples those control points influence.
+        Assigning a whole new controlPoints or weights array is not tracked, and makes the next incremental evaluation a full one.
+        
+        Arguments:
+        indices -- control point index (an int for curves, a tuple for surfaces and volumes), or a list of them
+        controlPoints -- array (shape = (number of indices, dimension)) of new Cartesian coordinates (default = unchanged)
+        weights -- array (shape = (number of indices,)) of new weights (default = unchanged)
+        """
+        k = len(self._basisAttributes) // 2
+        indices = np.asarray(indices, dtype=int).reshape(-1, k)
+        index = tuple(indices.T)
+        if weights is not None and 'weights' not in self._netAttributes:
+            raise ValueError("{} has no weights".format(type(self).__name__))
+        for name, values in (('controlPoints', controlPoints), ('weights', weights)):
+            if values is not None:
+                net = np.array(getattr(self, name))
+                net[index] = values
+                if name == 'weights' and np.any(net[index] <= 0):
+                    raise ValueError("{} weights must be positive".format(type(self).__name__))
+                net.flags.writeable = False
+                object.__setattr__(self, name, net)
+        version = self.netVersion + 1
+        edits = getattr(self, '_edits', None)
+        if edits is None:
+            # edits are known from the version before this one
+            edits = (self.netVersion, [])
+        edits[1].append((version, np.unique(indices, axis=0)))
+        if len(edits[1]) > self._maxEdits:
+            edits = (edits[1][0][0], edits[1][1:])
+        object.__setattr__(self, '_edits', edits)
+        object.__setattr__(self, 'netVersion', version)
+    
+    def _EditsSince(self, version):
+        # Returns an array of the indices of control points changed since netVersion == version, or None if they are not known.
+        edits = getattr(self, '_edits', None)
+        if edits is None or edits[0] > version:
+            return None
+        changed = [indices for editVersion, indices in edits[1] if editVersion > version]
+        if not changed:
+            return np.zeros((0, len(self._basisAttributes) // 2), dtype=int)
+        return np.unique(np.concatenate(changed), axis=0)
+    
+    def _EvaluateBox(self, bases, box, dtype=np.float64):
+        # Returns Cartesian coordinates at the samples box[k] = (first, stop) of each direction's basis matrix,
+        # contracting only the control points those samples depend on.
+        net = self._Net(dtype)
+        for k, (basis, (first, stop)) in enumerate(zip(bases, box)):
+            firstColumns = basis.indices[first:stop, 0]
+            column0, column1 = firstColumns.min(), firstColumns.max() + basis.degree + 1
+            net = gf.SparseBasisDot(firstColumns - column0, basis.Values(0, dtype)[first:stop], np.moveaxis(net, k, 0)[column0:column1])
+        return net[..., :-1] / net[..., -1:] if self._rational else net
+    
+    def _PatchGrid(self, bases, result, changed):
+        # Recomputes the samples of result influenced by the changed control points, or returns False (leaving result
+        # unchanged) if that would cost as much as evaluating the whole grid.
+        boxes = []
+        for index in changed:
+            box = []
+            for basis, i in zip(bases, index):
+                # a control point influences the samples whose degree + 1 non-zero basis functions include it
+                firstColumns = basis.indices[:, 0]
+                rows = np.flatnonzero((firstColumns <= i) & (i <= firstColumns + basis.degree))
+                if len(rows) == 0:
+                    break
+                box.append((rows[0], rows[-1] + 1))
+            else:
+                boxes.append(box)
+        if sum(np.prod([stop - first for first, stop in box]) for box in boxes) >= np.prod([len(basis.parameters) for basis in bases]):
+            return False
+        for box in boxes:
+            result[tuple(slice(first, stop) for first, stop in reversed(box))] = self._EvaluateBox(bases, box, result.dtype)
+        return True
+    
+    def _EvaluateGrid(self, bases, workers=None, tile=None, backend='thread', incremental=False, dtype=np.float64):
+        """
+        Returns Cartesian coordinates (an array of dtype) on the tensor-product grid of bases, tiled over a worker pool if
+        workers or tile is given. If incremental is True, the result is kept, read-only, and returned again by later
+        incremental evaluations of the same grid and dtype, after the samples influenced by control points changed since
+        (by UpdateControlPoints) are recomputed in it in place. Untracked changes are handled by evaluating the whole
+        grid into the same array.
+        """
+        if incremental:
+            key = (np.dtype(dtype).str,) + tuple((float(basis.parameters[0]), float(basis.parameters[-1]), len(basis.parameters)) for basis in bases)
+            if getattr(self, '_evaluations', None) is None:
+                self._evaluations = OrderedDict()
+            if key in self._evaluations:
+                version, result = self._evaluations[key]
+                if version != self.netVersion:
+                    changed = self._EditsSince(version)
+                    result.flags.writeable = True
+                    if changed is None or not self._PatchGrid(bases, result, changed):
+                        result[...] = self._EvaluateGrid(bases, workers, tile, backend, dtype=dtype)
+                    result.flags.writeable = False
+                    self._evaluations[key] = (self.netVersion, result)
+                self._evaluations.move_to_end(key)
+                return result
+            result = self._EvaluateGrid(bases, workers, tile, backend, dtype=dtype)
+            if not result.flags.owndata:
+                result = result.copy()
+            result.flags.writeable = False
+            self._evaluations[key] = (self.netVersion, result)
+            if len(self._evaluations) > self._maxEvaluations:
+                self._evaluations.popitem(last=False)
+            return result
+        if not self._rational:
+            return TensorProductDot(bases, self._Net(dtype))
+        if workers is None and tile is None:
+            Xw = TensorProductDot(bases, self._Net(dtype))
+            return Xw[..., :-1] / Xw[..., -1:]
+        # the thread and process pools are only imported when a parallel evaluation asks for them
+        from . import parallel
+        return parallel.EvaluateTiled(self._Net(dtype), [(basis.indices[:, 0], basis.Values(0, dtype)) for basis in bases], tile, workers, backend)
+
+class _ParametricGeometryMixin:
+    """
+    Gives a geometry class analytic partial derivatives, control net sensitivities and batched point inversion.
+    Classes using it define _directions, a list of (knotVector, degree) pairs (one per parametric direction),
+    Pw and EvaluateAt(parameters), and set _rational = False if they have no weights.
+    """
+    __slots__ = ()
+    _rational = True
+    # most seeds Invert solves a point again from, when its first result may not be its closest point
+    _inversionSeeds = 8
+    
+    def ParametricDomain(self):
+        # Returns a tuple (lower, upper) of arrays of the parametric domain bounds in each direction.
+        lower = np.array([knotVector[degree] for knotVector, degree in self._directions], dtype=float)
+        upper = np.array([knotVector[-(degree + 1)] for knotVector, degree in self._directions], dtype=float)
+        return lower, upper
+    
+    def ClosedDirections(self, samples=11, tolerance=1e-10):
+        """
+        Returns an array of booleans, True for parametric directions in which the geometry is closed
+        (its boundaries at the start and end of the direction coincide).
+        
+        Arguments:
+        samples -- number of points compared along each boundary (default = 11)
+        tolerance -- distance below which boundary points are considered coincident (default = 1e-10)
+        """
+        lower, upper = self.ParametricDomain()
+        grids = np.meshgrid(*[np.linspace(lower[k], upper[k], samples) for k in range(len(lower))], indexing='ij')
+        parameters = np.stack([grid.ravel() for grid in grids], axis=1)
+        closed = np.zeros(len(lower), dtype=bool)
+        for k in range(len(lower)):
+            start, end = parameters.copy(), parameters.copy()
+            start[:, k], end[:, k] = lower[k], upper[k]
+            closed[k] = np.all(np.linalg.norm(self.EvaluateAt(start) - self.EvaluateAt(end), axis=1) <= tolerance)
+        return closed
+    
+    def _GridPoints(self, breaks, dtype=np.float64):
+        # Returns Cartesian coordinates (shape = (..., len(breaks[1]), len(breaks[0]), dimension)) on a tensor grid of parameters.
+        bases = [BasisMatrix(parameters, knotVector, degree) for parameters, (knotVector, degree) in zip(breaks, self._directions)]
+        Xw = TensorProductDot(bases, self.Pw.astype(dtype, copy=False))
+        return Xw[..., :-1] / Xw[..., -1:]
+    
+    def _ChordalDeviations(self, breaks):
+        # Returns (list of arrays of the largest estimated chordal deviation charged to each parameter interval of each
+        # direction, number of points evaluated). Edges are checked at their parametric midpoints; cells also at their centres
+        # against the shorter diagonal, which is the one Tessellate triangulates along.
+        midpoints = [(parameters[:-1] + parameters[1:]) / 2 for parameters in breaks]
+        P = self._GridPoints(breaks)
+        if len(breaks) == 1:
+            M = self._GridPoints(midpoints)
+            return [gf.PointSegmentDistances(M, P[:-1], P[1:])], len(P) + len(M)
+        Mu = self._GridPoints((midpoints[0], breaks[1]))
+        Mv = self._GridPoints((breaks[0], midpoints[1]))
+        C = self._GridPoints(midpoints)
+        deviationU = gf.PointSegmentDistances(Mu, P[:, :-1], P[:, 1:])
+        deviationV = gf.PointSegmentDistances(Mv, P[:-1], P[1:])
+        P00, P10, P01, P11 = P[:-1, :-1], P[:-1, 1:], P[1:, :-1], P[1:, 1:]
+        shorter = (np.linalg.norm(P11 - P00, axis=-1) <= np.linalg.norm(P01 - P10, axis=-1))[..., None]
+        deviationC = gf.PointSegmentDistances(C, np.where(shorter, P00, P10), np.where(shorter, P11, P01))
+        # a cell whose centre deviates is charged to the direction whose edges deviate most
+        cellU = np.maximum(deviationU[:-1], deviationU[1:])
+        cellV = np.maximum(deviationV[:, :-1], deviationV[:, 1:])
+        centreU = np.where(cellU >= cellV, deviationC, 0)
+        centreV = np.where(cellU >= cellV, 0, deviationC)
+        deviations = [np.maximum(deviationU.max(axis=0), centreU.max(axis=0)), np.maximum(deviationV.max(axis=1), centreV.max(axis=1))]
+        return deviations, P[..., 0].size + Mu[..., 0].size + Mv[..., 0].size + C[..., 0].size
+    
+    def Tessellate(self, tolerance=1e-3, maxIterations=20, breaks=None, dtype=np.float64):
+        """
+        Returns a Tessellation of a curve (polyline) or surface (crack-free triangle mesh) refined per knot span until
+        its estimated chordal deviation is at most tolerance. The parameters in each direction start at degree equal
+        segments per knot span; every interval whose edges or cells deviate by more than tolerance is split into
+        ceil(sqrt(deviation / tolerance)) equal pieces, so the mesh stays a conforming tensor grid, refined only in the
+        intervals where the geometry needs it. Volumes cannot be tessellated (a TypeError is raised).
+        
+        Keyword arguments:
+        tolerance -- largest allowed chordal deviation (default = 1e-3)
+        maxIterations -- largest number of refinement rounds (default = 20)
+        breaks -- list of arrays of initial parameters in each direction (default = degree segments per knot span)
+        dtype -- floating point type of the vertices: the refinement always measures deviations in float64, and with
+                 np.float32 only the final vertex grid is evaluated in float32 (default = np.float64)
+        """
+        if len(self._directions) > 2:
+            raise TypeError("cannot tessellate {} objects: Tessellate supports curves and surfaces only".format(type(self).__name__))
+        if breaks is None:
+            lower, upper = self.ParametricDomain()
+            breaks = []
+            for (knotVector, degree), start, stop in zip(self._directions, lower, upper):
+                knots = np.unique(np.clip(knotVector, start, stop))
+                t = np.linspace(0, 1, degree + 1)[:-1]
+                breaks.append(np.append((knots[:-1, None] + np.diff(knots)[:, None] * t).ravel(), knots[-1]))
+        breaks = [np.asarray(parameters, dtype=float) for parameters in breaks]
+        evaluations = 0
+        for iteration in range(maxIterations + 1):
+            deviations, count = self._ChordalDeviations(breaks)
+            evaluations += count
+            if iteration == maxIterations or all(np.all(deviation <= tolerance) for deviation in deviations):
+                break
+            # chordal deviation shrinks with the square of the interval length (5% margin avoids a second round of splits)
+            for k, (parameters, deviation) in enumerate(zip(breaks, deviations)):
+                pieces = np.maximum(np.ceil(np.sqrt(deviation / tolerance) * 1.05), 1).astype(int)
+                starts = np.repeat(parameters[:-1], pieces - 1)
+                steps = np.repeat(np.diff(parameters) / pieces, pieces - 1)
+                fractions = np.concatenate([np.arange(1, m) for m in pieces]) if pieces.size else np.zeros(0)
+                breaks[k] = np.sort(np.concatenate([parameters, starts + fractions * steps]))
+        deviation = max(float(d.max()) if d.size else 0.0 for d in deviations)
+        
+        P = self._GridPoints(breaks, _FloatType(dtype))
+        evaluations += P[..., 0].size
+        grids = np.meshgrid(*breaks[::-1], indexing='ij')[::-1]
+        parameters = np.stack([grid.ravel() for grid in grids], axis=1)
+        if len(breaks) == 1:
+            return Tessellation(breaks, parameters, P, None, deviation, evaluations)
+        
+        # two triangles per grid cell, split along the shorter diagonal
+        a, b = len(breaks[0]), len(breaks[1])
+        i, j = np.meshgrid(np.arange(a - 1), np.arange(b - 1))
+        v00, v10, v01, v11 = j * a + i, j * a + i + 1, (j + 1) * a + i, (j + 1) * a + i + 1
+        shorter = np.linalg.norm(P[1:, 1:] - P[:-1, :-1], axis=-1) <= np.linalg.norm(P[1:, :-1] - P[:-1, 1:], axis=-1)
+        first = np.where(shorter[..., None], np.stack([v00, v10, v11], axis=-1), np.stack([v00, v10, v01], axis=-1))
+        second = np.where(shorter[..., None], np.stack([v00, v11, v01], axis=-1), np.stack([v10, v11, v01], axis=-1))
+        triangles = np.stack([first, second], axis=2).reshape(-1, 3)
+        return Tessellation(breaks, parameters, P.reshape(-1, P.shape[-1]), triangles, deviation, evaluations)
+    
+    def _DirectionAttributes(self, direction):
+        # Returns the names of the (knot vector, degree) attributes of a parametric direction (1, 2 or 3).
+        k = len(self._directions)
+        return self._basisAttributes[direction - 1], self._basisAttributes[k + direction - 1]
+    
+    def _ReplaceNet(self, direction, Refine):
+        # Replaces the knot vector of a direction and the control net by Refine(degree, knotVector, Pw, axis).
+        knotAttribute, degreeAttribute = self._DirectionAttributes(direction)
+        knotVector, Pw = Refine(getattr(self, degreeAttribute), getattr(self, knotAttribute), self.Pw, direction - 1)
+        if self._rational:
+            self.weights = Pw[..., -1]
+        self.controlPoints = Pw[..., :-1] / Pw[..., -1:]
+        setattr(self, knotAttribute, knotVector)
+    
+    def InsertKnot(self, parameter, times=1, direction=1):
+        """
+        Inserts a knot (algorithm A5.1) into the knot vector of one direction, adding control points without changing the geometry.
+        
+        Arguments:
+        parameter -- parametric coordinate of the new knot
+        times -- number of times the knot is inserted (default = 1)
+        direction -- parametric direction of the knot vector (default = 1)
+        """
+        self._ReplaceNet(direction, lambda degree, knotVector, Pw, axis: gf.KnotInsertion(degree, knotVector, Pw, parameter, times, axis))
+    
+    def RefineKnots(self, knots, direction=1):
+        """
+        Inserts a list of knots (algorithm A5.4) into the knot vector of one direction without changing the geometry.
+        
+        Arguments:
+        knots -- list of parametric coordinates of the new knots
+        direction -- parametric direction of the knot vector (default = 1)
+        """
+        self._ReplaceNet(direction, lambda degree, knotVector, Pw, axis: gf.KnotRefinement(degree, knotVector, Pw, knots, axis))
+    
+    def BezierPatches(self):
+        """
+        Returns (breakpoints, patches): a list of arrays of distinct knots in each direction, and an array
+        (shape = (spans1, ..., spansk, degree1 + 1, ..., degreek + 1, dimension + 1)) of the weighted control points
+        of the Bezier curve, surface or volume on each (tensor product of) knot span(s), by algorithm A5.6.
+        """
+        patches, breakpoints = self.Pw, []
+        for direction, (knotVector, degree) in enumerate(self._directions):
+            # each decomposition prepends a span axis, so the control net axes sit after the direction spans so far
+            spans, patches = gf.BezierDecomposition(degree, knotVector, patches, axis=direction + direction)
+            breakpoints.append(spans)
+            patches = np.moveaxis(patches, 0, direction)
+        return breakpoints, patches
+    
+    def PowerBasis(self):
+        # Returns the (cached) PowerBasisPatches of this geometry, rebuilt when its knots, degrees or control net change.
+        if getattr(self, '_powerBasis', None) is None or self._powerBasis[0] != self.netVersion:
+            breakpoints, patches = self.BezierPatches()
+            k = len(breakpoints)
+            coefficients = patches
+            for direction, (knotVector, degree) in enumerate(self._directions):
+                coefficients = np.moveaxis(np.tensordot(gf.BezierToPowerMatrix(degree), coefficients, axes=(1, k + direction)), 0, k + direction)
+            self._powerBasis = (self.netVersion, PowerBasisPatches(breakpoints, coefficients))
+        return self._powerBasis[1]
+    
+    def HornerEvaluateAt(self, parameters):
+        """
+        Returns the same coordinates as EvaluateAt(parameters), computed from the cached power basis form of the geometry:
+        each point is a span lookup among the breakpoints and a Horner evaluation, with no basis function recursion.
+        
+        Arguments:
+        parameters -- array (shape = (number of points, number of directions)) of parametric coordinates
+        """
+        return self.PowerBasis().EvaluateAt(parameters)
+    
+    def PartialDerivativesAt(self, parameters, secondOrder=False):
+        """
+        Returns a tuple (points, first, second) of arrays of Cartesian points (shape = (number of points, dimension)),
+        first partial derivatives (shape = (number of points, dimension, k)) and, if secondOrder, second partial
+        derivatives (shape = (number of points, dimension, k, k), otherwise None) at scattered parametric points,
+        where k is the number of parametric directions. Rational derivatives follow the quotient rule of eqn 4.8 on pg 125
+        of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997.
+        
+        Arguments:
+        parameters -- array (shape = (number of points, k)) of parametric coordinates
+        secondOrder -- option to also return second partial derivatives (default = False)
+        """
+        k = len(self._directions)
+        parameters = np.asarray(parameters, dtype=float).reshape(-1, k)
+        unit = np.eye(k, dtype=int)
+        multiIndices = [(0,) * k] + [tuple(unit[i]) for i in range(k)]
+        if secondOrder:
+            multiIndices += [tuple(unit[i] + unit[j]) for i in range(k) for j in range(i, k)]
+        indices, data = gf.TensorProductBasisFunsBatch(parameters, [knotVector for knotVector, degree in self._directions],
+                                                       [degree for knotVector, degree in self._directions], multiIndices)
+        Pw = self.Pw
+        Pw = Pw.reshape(-1, Pw.shape[-1])
+        Aw = np.stack([gf.SparseRowsDot(indices, values, Pw) for values in data])
+        A, w = Aw[..., :-1], Aw[..., -1:]
+        points = A[0] / w[0]
+        first = (A[1:k+1] - w[1:k+1] * points) / w[0]
+        second = None
+        if secondOrder:
+            second = np.empty(points.shape + (k, k))
+            n = k + 1
+            for i in range(k):
+                for j in range(i, k):
+                    second[:, :, i, j] = (A[n] - w[n] * points - w[1+i] * first[j] - w[1+j] * first[i]) / w[0]
+                    second[:, :, j, i] = second[:, :, i, j]
+                    n += 1
+        return points, first.transpose(1, 2, 0), second
+    
+    def _RationalBasisRowsAt(self, parameters):
+        # Returns the column indices and values of the non-zero rational basis functions at scattered parametric points.
+        k = len(self._directions)
+        parameters = np.asarray(parameters, dtype=float).reshape(-1, k)
+        indices, data = gf.TensorProductBasisFunsBatch(parameters, [knotVector for knotVector, degree in self._directions],
+                                                       [degree for knotVector, degree in self._directions])
+        Pw = self.Pw
+        weights = Pw[..., -1].ravel()
+        data = data * weights[indices]
+        data /= data.sum(axis=1, keepdims=True)
+        return indices, data, Pw
+    
+    def Jacobian(self, parameters):
+        """
+        Returns a ControlNetJacobian of the points at scattered parametric points with respect to the control points
+        (and weights, for rational geometry). Each point depends on (degree1 + 1) * (degree2 + 1) * ... control points,
+        so the Jacobian is stored sparsely: dC/dP_i = R_i (the rational basis function) and dC/dw_i = R_i (P_i - C) / w_i.
+        
+        Arguments:
+        parameters -- array (shape = (number of points, k)) of parametric coordinates
+        """
+        indices, R, Pw = self._RationalBasisRowsAt(parameters)
+        Pw = Pw.reshape(-1, Pw.shape[-1])
+        weights = Pw[:, -1]
+        controlPoints = Pw[:, :-1] / weights[:, None]
+        weightData = None
+        if self._rational:
+            points = gf.SparseRowsDot(indices, R, controlPoints)
+            weightData = (R / weights[indices])[..., None] * (controlPoints[indices] - points[:, None, :])
+        return ControlNetJacobian(indices, R, weightData, len(Pw), controlPoints.shape[1])
+    
+    def VectorJacobianProduct(self, parameters, cotangents):
+        """
+        Returns a tuple (controlPointGradient, weightGradient) of the gradient of sum(cotangents * points) with respect to the
+        control points (shape = shape(controlPoints)) and weights (shape = shape(weights), or None if there are no weights),
+        where points are evaluated at scattered parametric points. This is the adjoint (reverse-mode) product, computed
+        without forming the Jacobian, at about the cost of one evaluation.
+        
+        Arguments:
+        parameters -- array (shape = (number of points, k)) of parametric coordinates
+        cotangents -- array (shape = (number of points, dimension)) of sensitivities of an objective to each point
+        """
+        return self.Jacobian(parameters).TransposeDot(cotangents, shape=self.Pw.shape[:-1])
+    
+    @staticmethod
+    def _SampleReach(samples, seedSamples):
+        # Returns an array (shape = seedSamples) of the longest chord from each sample of a grid to its neighbours, an
+        # estimate of how much closer the geometry around a sample can come to a point than the sample itself.
+        grid = samples.reshape(tuple(seedSamples) + (-1,))
+        reach = np.zeros(tuple(seedSamples))
+        for axis in range(len(seedSamples)):
+            chords = np.linalg.norm(np.diff(grid, axis=axis), axis=-1)
+            before = [(1, 0) if k == axis else (0, 0) for k in range(len(seedSamples))]
+            after = [(0, 1) if k == axis else (0, 0) for k in range(len(seedSamples))]
+            reach = np.maximum(reach, np.maximum(np.pad(chords, before), np.pad(chords, after)))
+        return reach
+    
+    @staticmethod
+    def _GridMinima(values, seedSamples):
+        # Returns a boolean array (shape = values.shape) of the values (shape = (M, number of samples)) no larger than
+        # any of their neighbours on the grid of samples.
+        grid = values.reshape((len(values),) + tuple(seedSamples))
+        minima = np.ones(grid.shape, dtype=bool)
+        for axis in range(1, grid.ndim):
+            padded = np.pad(grid, [(1, 1) if k == axis else (0, 0) for k in range(grid.ndim)], constant_values=np.inf)
+            before = np.take(padded, np.arange(grid.shape[axis]), axis=axis)
+            after = np.take(padded, np.arange(2, grid.shape[axis] + 2), axis=axis)
+            minima &= (grid <= before) & (grid <= after)
+        return minima.reshape(values.shape)
+    
+    def Invert(self, points, seedSamples=None, tolerance=1e-10, cosineTolerance=1e-8, maxIterations=20):
+        """
+        Returns a tuple (parameters, converged, iterations) with the parametric coordinates of Cartesian points
+        (projected onto the geometry for curves and surfaces), whether each point met the convergence criteria,
+        and the number of Newton iterations used for each point.
+        Each point is seeded from the nearest point of a coarse sampling of the geometry, found with a SpatialGrid.
+        Newton iteration only finds the local minimum of the distance near its seed, which can lie on the wrong part of
+        a geometry that comes back close to itself (e.g. the other branch of a curve), or next to a closer minimum that
+        the samples do not resolve. So each point projected onto a curve or surface from off it is solved again from
+        other seeds: samples at local minima of the sample distances, and neighbours of the nearest sample whose
+        Gauss-Newton step does not head for it, most promising first, while the sample distance less the sample's reach
+        (the longest chord to a neighbouring sample) is smaller than the distance found so far. The closest result is kept. A point is only reported
+        converged if its result is no farther from it than the nearest sample and no untried seed could still lead
+        closer (at most _inversionSeeds extra seeds are tried per point). Features narrower than the sample step can
+        still be missed; raise seedSamples for them.
+        
+        Arguments:
+        points -- array (shape = (number of points, dimension)) of Cartesian coordinates
+        seedSamples -- number of coarse samples per parametric direction (default = 8 per knot span, plus 1)
+        tolerance -- Euclidean distance below which a point is considered to lie on the geometry (default = 1e-10)
+        cosineTolerance -- cosine between the derivatives and the residual below which a point is considered projected (default = 1e-8)
+        maxIterations -- maximum number of Newton iterations per point (default = 20)
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        lower, upper = self.ParametricDomain()
+        if seedSamples is None:
+            seedSamples = [8 * (len(np.unique(knotVector)) - 1) + 1 for knotVector, degree in self._directions]
+        elif np.isscalar(seedSamples):
+            seedSamples = [seedSamples] * len(self._directions)
+        grids = np.meshgrid(*[np.linspace(lower[k], upper[k], n) for k, n in enumerate(seedSamples)], indexing='ij')
+        sampleParameters = np.stack([grid.ravel() for grid in grids], axis=1)
+        samples, sampleTangents, _ = self.PartialDerivativesAt(sampleParameters)
+        nearest, seedDistance = SpatialGrid(samples).Nearest(points)
+        # projection onto curves and surfaces needs second derivatives for a full Newton step
+        secondOrder = len(self._directions) < points.shape[1]
+        closed = self.ClosedDirections()
+        def Solve(targets, seeds):
+            return gf.NewtonPointInversion(lambda u: self.PartialDerivativesAt(u, secondOrder), targets, seeds, lower, upper,
+                                           tolerance, cosineTolerance, maxIterations, closed)
+        parameters, converged, iterations = Solve(points, sampleParameters[nearest])
+        distance = np.linalg.norm(self.EvaluateAt(parameters) - points, axis=1)
+        def Retry(rows, seeds):
+            # Solves again for the points rows from other seeds, keeping results closer than the ones so far.
+            u, done, count = Solve(points[rows], seeds)
+            d = np.linalg.norm(self.EvaluateAt(u) - points[rows], axis=1)
+            iterations[rows] += count
+            better = d < distance[rows]
+            parameters[rows[better]], converged[rows[better]], distance[rows[better]] = u[better], done[better], d[better]
+        reach = self._SampleReach(samples, seedSamples).ravel()
+        steps = (upper - lower) / (np.array(seedSamples) - 1)
+        # grid offsets of the neighbours of a sample
+        offsets = np.stack(np.meshgrid(*[[-1, 0, 1]] * len(steps), indexing='ij'), axis=-1).reshape(-1, len(steps))
+        neighbours = offsets[np.any(offsets != 0, axis=1)]
+        # points on the geometry are where they should be (inverting into a volume only converges there), and the points
+        # projected onto a curve or surface are checked in blocks small enough to hold the distance to every sample
+        off = np.flatnonzero(distance > tolerance) if secondOrder else np.zeros(0, dtype=int)
+        squaredNorms = np.sum(samples ** 2, axis=1)
+        block = max(1, 4000000 // len(samples))
+        for first in range(0, len(off), block):
+            rows = off[first:first + block]
+            index = np.arange(len(rows))
+            squaredDistance = np.sum(points[rows] ** 2, axis=1)[:, None] - 2 * points[rows] @ samples.T + squaredNorms
+            sampleDistance = np.sqrt(np.maximum(squaredDistance, 0))
+            # seeds are samples at local minima of the sample distances (other parts of the geometry), and neighbours of
+            # the nearest sample whose Gauss-Newton step does not head for it (a minimum the samples do not resolve)
+            seeding = self._GridMinima(sampleDistance, seedSamples)
+            cells = np.stack(np.unravel_index(nearest[rows], seedSamples), axis=1)[:, None] + neighbours
+            adjacent = np.ravel_multi_index(tuple(np.moveaxis(cells, 2, 0)), seedSamples, mode='clip')
+            J = sampleTangents[adjacent] * steps
+            JTJ = np.einsum('mndk,mndl->mnkl', J, J) + np.finfo(float).tiny * np.eye(len(steps))
+            step = -np.linalg.solve(JTJ, np.einsum('mndk,mnd->mnk', J, samples[adjacent] - points[rows, None])[..., None])[..., 0]
+            # (in units of sample steps, without the parts of the step that would leave the parametric domain)
+            at = sampleParameters[adjacent]
+            step[((at <= lower) & (step < 0) | (at >= upper) & (step > 0)) & ~closed] = 0
+            toNearest = (sampleParameters[nearest[rows], None] - at) / steps
+            norms = np.linalg.norm(step, axis=2) * np.linalg.norm(toNearest, axis=2) + np.finfo(float).tiny
+            away = np.einsum('mnk,mnk->mn', step, toNearest) / norms < 0.5
+            seeding[np.broadcast_to(index[:, None], adjacent.shape)[away], adjacent[away]] = True
+            # lower bounds on the distance to the geometry around each seed (the more negative, the more promising)
+            bounds = np.where(seeding, sampleDistance - reach, np.inf)
+            bounds[index, nearest[rows]] = np.inf
+            # points are pending while a seed could still lead closer than their result; once none can, none ever will
+            pending = index
+            for attempt in range(self._inversionSeeds + 1):
+                seeds = np.argmin(bounds[pending], axis=1)
+                closer = np.maximum(bounds[pending, seeds], 0) < distance[rows[pending]] - tolerance
+                pending, seeds = pending[closer], seeds[closer]
+                if attempt == self._inversionSeeds:
+                    # points that an untried part of the geometry could still be closer to
+                    converged[rows[pending]] = False
+                if attempt == self._inversionSeeds or len(pending) == 0:
+                    break
+                bounds[pending, seeds] = np.inf
+                Retry(rows[pending], sampleParameters[seeds])
+        converged &= distance <= seedDistance + tolerance
+        if len(self._directions) == 1:
+            parameters = parameters[:, 0]
+        return parameters, converged, iterations
+
+class _CurveArcLengthMixin:
+    """
+    Gives a curve class a cached ArcLengthTable, rebuilt when its knots, degree or control points change, and the
+    arc length lookups built on it. Classes using it define knotVector, degree and Pw.
+    """
+    __slots__ = ()
+
+    def ArcLengthTable(self):
+        # Returns the (cached) ArcLengthTable of this curve, rebuilt when its knot vector, degree or control net change.
+        if getattr(self, '_arcLengthTable', None) is None or self._arcLengthTable[0] != self.netVersion:
+            self._arcLengthTable = (self.netVersion, ArcLengthTable(self.knotVector, self.degree, self.Pw))
+        return self._arcLengthTable[1]
+
+    def ArcLength(self, parameters=None):
+        """
+        Returns the total arc length of the curve, or an array of the arc lengths from the start of the parametric
+        domain to each of the given parameters.
+
+        Keyword arguments:
+        parameters -- array of parametric coordinates (default = None, the total length)
+        """
+        table = self.ArcLengthTable()
+        if parameters is None:
+            return table.length
+        return table.LengthsAt(np.asarray(parameters, dtype=float).reshape(-1))
+
+    def ArcLengthParameters(self, N=100, **kwargs):
+        """
+        Returns an array of N parameters between start and stop at which the curve points are equally spaced in arc length.
+
+        Keyword arguments:
+        start -- parametric coordinate at which curve begins (default = start of the parametric domain)
+        stop -- parametric coordinate at which curve stops (default = end of the parametric domain)
+        N -- number of parameters (default = 100)
+        """
+        return self.ArcLengthTable().UniformParameters(N, kwargs.get('start'), kwargs.get('stop'))
+
+class BSplineCurve(_GeometryCacheMixin, _ParametricGeometryMixin, _CurveArcLengthMixin):
+    """
+    Creates a B-Spline curve object. Attributes can be given as keyword arguments or assigned afterwards; a curve
+    given all of them is validated once, when it is created (see Validate).
     
     Keyword arguments:
     controlPoints -- list of Cartesian control point coordinates
     degree -- degree of polynomial segments
-    knotVector -- list of parametric coords that define knot locations
+    knotVector -- list of parametric coords that define knot locations (default = gf.KnotVector(len(controlPoints), degree))
     
     Constraints:
     len(controlPoints) - 1 >= degree >= 1
+    len(knotVector) == len(controlPoints) + degree + 1
     """
-    def __init__(self, **kwargs):
-        pass
-        
+    __slots__ = ('controlPoints', 'degree', 'knotVector')
+    _basisAttributes = ('knotVector', 'degree')
+    _netAttributes = ('controlPoints',)
+    _rational = False
+    
     def KnotLocations(self, **kwargs):
-        # Returns a list that contains sublists of Cartesian knot coordinates.
-        return [gf.BSplineCurvePoint(x, self.knotVector, self.degree, self.controlPoints) for x in self.knotVector]
+        # Returns an array that contains the Cartesian coordinates of each knot.
+        return self.EvaluateAt(self.knotVector)
     
     def Evaluate(self, N=100, **kwargs):
         """
-        Returns a list of Cartesian curve coordinates.
+        Returns an array (shape = (N, dimension)) of Cartesian curve coordinates.
         
         Keyword arguments:
         start -- parametric coordinate at which curve begins (default value shown below)
         stop -- parametric coordinate at which curve stops (default value shown below)
         N -- number of points evaluated between start and stop (default = 100)
+        incremental -- True to keep the (read-only) result and, on later incremental calls with the same samples, update it
+                       in place for control points changed by UpdateControlPoints (default = False)
+        spacing -- 'parameter' for points equally spaced in parameter, or 'arclength' for points equally spaced in arc
+                   length along the curve (default = 'parameter')
+        dtype -- np.float32 to contract the control net and return the result in single precision, from float64 basis
+                 functions (see gf.RoundingErrorBound for the error), or np.float64 (default = np.float64)
+        """
+        start = kwargs.get('start', self.knotVector[self.degree])
+        stop = kwargs.get('stop', self.knotVector[-(self.degree + 1)])
+        spacing = kwargs.get('spacing', 'parameter')
+        dtype = _FloatType(kwargs.get('dtype', np.float64))
+        if spacing == 'arclength':
+            if kwargs.get('incremental', False):
+                raise ValueError("incremental evaluation needs spacing == 'parameter'")
+            return self.EvaluateAt(self.ArcLengthParameters(N, start=start, stop=stop), dtype)
+        if spacing != 'parameter':
+            raise ValueError("spacing == {!r} is not 'parameter' or 'arclength'".format(spacing))
+        basis = self._CachedBasisMatrix(self.knotVector, self.degree, start, stop, N)
+        if kwargs.get('incremental', False):
+            return self._EvaluateGrid((basis,), incremental=True, dtype=dtype)
+        return basis.Dot(self._Net(dtype))
+    
+    def IterEvaluate(self, N=100, chunkRows=65536, **kwargs):
+        """
+        Yields consecutive arrays (shape = (at most chunkRows, dimension)) of Cartesian curve coordinates that together
+        equal Evaluate(N, **kwargs), computing one block at a time so that memory use does not grow with N.
+        
+        Keyword arguments:
+        start, stop, N, dtype -- sample points and precision, as for Evaluate
+        chunkRows -- largest number of points in a block (default = 65536)
+        """
+        start = kwargs.get('start', self.knotVector[self.degree])
+        stop = kwargs.get('stop', self.knotVector[-(self.degree + 1)])
+        net = self._Net(_FloatType(kwargs.get('dtype', np.float64)))
+        for parameters in gf.LinspaceChunks(start, stop, N, chunkRows):
+            yield BasisMatrix(parameters, self.knotVector, self.degree).Dot(net)
+    
+    def EvaluateAt(self, parameters, dtype=np.float64):
+        """
+        Returns an array (shape = (len(parameters), dimension)) of Cartesian curve coordinates at scattered parameters.
+        
+        Arguments:
+        parameters -- array of parametric coordinates
+        dtype -- floating point type of the contraction and result, as for Evaluate (default = np.float64)
+        """
+        parameters = np.asarray(parameters, dtype=float).reshape(-1)
+        return gf.BSplineCurvePoints(parameters, self.knotVector, self.degree, self._Net(_FloatType(dtype)))
+    
+    @property
+    def _directions(self):
+        return [(self.knotVector, self.degree)]
+    
+    def Derivatives(self, order=1, N=100, **kwargs):
+        """
+        Returns an array (shape = (N, order + 1, dimension)) of curve derivatives, where [:, k] holds the k-th derivative.
+        
+        Keyword arguments:
+        order -- highest order of derivative (default = 1)
+        start -- parametric coordinate at which curve begins (default = start of the parametric domain)
+        stop -- parametric coordinate at which curve stops (default = end of the parametric domain)
+        N -- number of points evaluated between start and stop (default = 100)
         """
         start = kwargs.get('start', self.knotVector[self.degree])
         stop = kwargs.get('stop', self.knotVector[-(self.degree + 1)])
-        parameterValues = np.linspace(start, stop, N)
-        return [gf.BSplineCurvePoint(x, self.knotVector, self.degree, self.controlPoints) for x in parameterValues]
+        basis = self._CachedBasisMatrix(self.knotVector, self.degree, start, stop, N, order=order)
+        return np.stack([basis.Dot(self.controlPoints, k) for k in range(order + 1)], axis=1)
+    
+    def DerivativesAt(self, parameters, order=1):
+        """
+        Returns an array (shape = (len(parameters), order + 1, dimension)) of curve derivatives at scattered parameters.
+        
+        Arguments:
+        parameters -- array of parametric coordinates
+        order -- highest order of derivative (default = 1)
+        """
+        parameters = np.asarray(parameters, dtype=float).reshape(-1)
+        return gf.BSplineCurveDerivs(parameters, self.knotVector, self.degree, self.controlPoints, order)
 
-class NURBSCurve:
+class NURBSCurve(_GeometryCacheMixin, _ParametricGeometryMixin, _CurveArcLengthMixin):
     """
-    Creates a NURBS curve object.
+    Creates a NURBS curve object. Attributes can be given as keyword arguments or assigned afterwards; a curve
+    given all of them is validated once, when it is created (see Validate).
     
     Keyword arguments:
     controlPoints -- list of Cartesian control point coordinates
     degree -- degree of polynomial segments
-    knotVector -- list of parametric coords that define knot locations
-    weights -- list of control point weights
+    knotVector -- list of parametric coords that define knot locations (default = gf.KnotVector(len(controlPoints), degree))
+    weights -- list of control point weights (default = ones)
     
     Constraints:
     len(controlPoints) - 1 >= degree >= 1
+    len(knotVector) == len(controlPoints) + degree + 1
     len(weights) == len(controlPoints)
     """
-    def __init__(self, **kwargs):
-        pass
-        
+    __slots__ = ('controlPoints', 'weights', 'degree', 'knotVector')
+    _basisAttributes = ('knotVector', 'degree')
+    
     def KnotLocations(self, **kwargs):
-        # Returns a list that contains sublists of Cartesian knot coordinates.
-        return [gf.NURBSCurvePoint(x, self.knotVector, self.degree, self.controlPoints, self.weights) for x in self.knotVector]
+        # Returns an array that contains the Cartesian coordinates of each knot.
+        return self.EvaluateAt(self.knotVector)
     
     def Evaluate(self, N=100, **kwargs):
         """
-        Returns a list of Cartesian curve coordinates.
+        Returns an array (shape = (N, dimension)) of Cartesian curve coordinates.
         
         start -- parametric coordinate at which curve begins (default value shown below)
         stop -- parametric coordinate at which curve stops (default value shown below)
         N -- number of points evaluated between start and stop (default = 100)
+        incremental -- True to keep the (read-only) result and, on later incremental calls with the same samples, update it
+                       in place for control points changed by UpdateControlPoints (default = False)
+        spacing -- 'parameter' for points equally spaced in parameter, or 'arclength' for points equally spaced in arc
+                   length along the curve (default = 'parameter')
+        dtype -- np.float32 to contract the control net and return the result in single precision, from float64 basis
+                 functions (see gf.RoundingErrorBound for the error), or np.float64 (default = np.float64)
+        """
+        start = kwargs.get('start', self.knotVector[self.degree])
+        stop = kwargs.get('stop', self.knotVector[-(self.degree + 1)])
+        spacing = kwargs.get('spacing', 'parameter')
+        dtype = _FloatType(kwargs.get('dtype', np.float64))
+        if spacing == 'arclength':
+            if kwargs.get('incremental', False):
+                raise ValueError("incremental evaluation needs spacing == 'parameter'")
+            return self.EvaluateAt(self.ArcLengthParameters(N, start=start, stop=stop), dtype)
+        if spacing != 'parameter':
+            raise ValueError("spacing == {!r} is not 'parameter' or 'arclength'".format(spacing))
+        basis = self._CachedBasisMatrix(self.knotVector, self.degree, start, stop, N)
+        if kwargs.get('incremental', False):
+            return self._EvaluateGrid((basis,), incremental=True, dtype=dtype)
+        Cw = basis.Dot(self._Net(dtype))
+        return Cw[:, :-1] / Cw[:, -1:]
+    
+    def IterEvaluate(self, N=100, chunkRows=65536, **kwargs):
+        """
+        Yields consecutive arrays (shape = (at most chunkRows, dimension)) of Cartesian curve coordinates that together
+        equal Evaluate(N, **kwargs), computing one block at a time so that memory use does not grow with N.
+        
+        Keyword arguments:
+        start, stop, N, dtype -- sample points and precision, as for Evaluate
+        chunkRows -- largest number of points in a block (default = 65536)
+        """
+        start = kwargs.get('start', self.knotVector[self.degree])
+        stop = kwargs.get('stop', self.knotVector[-(self.degree + 1)])
+        net = self._Net(_FloatType(kwargs.get('dtype', np.float64)))
+        for parameters in gf.LinspaceChunks(start, stop, N, chunkRows):
+            Cw = BasisMatrix(parameters, self.knotVector, self.degree).Dot(net)
+            yield Cw[:, :-1] / Cw[:, -1:]
+    
+    def EvaluateAt(self, parameters, dtype=np.float64):
+        """
+        Returns an array (shape = (len(parameters), dimension)) of Cartesian curve coordinates at scattered parameters.
+        
+        Arguments:
+        parameters -- array of parametric coordinates
+        dtype -- floating point type of the contraction and result, as for Evaluate (default = np.float64)
+        """
+        parameters = np.asarray(parameters, dtype=float).reshape(-1)
+        Cw = gf.BSplineCurvePoints(parameters, self.knotVector, self.degree, self._Net(_FloatType(dtype)))
+        return Cw[:, :-1] / Cw[:, -1:]
+    
+    @property
+    def _directions(self):
+        return [(self.knotVector, self.degree)]
+    
+    def Derivatives(self, order=1, N=100, **kwargs):
+        """
+        Returns an array (shape = (N, order + 1, dimension)) of curve derivatives, where [:, k] holds the k-th derivative.
+        
+        Keyword arguments:
+        order -- highest order of derivative (default = 1)
+        start -- parametric coordinate at which curve begins (default = start of the parametric domain)
+        stop -- parametric coordinate at which curve stops (default = end of the parametric domain)
+        N -- number of points evaluated between start and stop (default = 100)
         """
         start = kwargs.get('start', self.knotVector[self.degree])
         stop = kwargs.get('stop', self.knotVector[-(self.degree + 1)])
-        parameterValues = np.linspace(start, stop, N)
-        return [gf.NURBSCurvePoint(x, self.knotVector, self.degree, self.controlPoints, self.weights) for x in parameterValues]
+        basis = self._CachedBasisMatrix(self.knotVector, self.degree, start, stop, N, order=order)
+        Pw = self.Pw
+        return gf.RationalCurveDerivs(np.stack([basis.Dot(Pw, k) for k in range(order + 1)], axis=1))
+    
+    def DerivativesAt(self, parameters, order=1):
+        """
+        Returns an array (shape = (len(parameters), order + 1, dimension)) of curve derivatives at scattered parameters.
+        
+        Arguments:
+        parameters -- array of parametric coordinates
+        order -- highest order of derivative (default = 1)
+        """
+        parameters = np.asarray(parameters, dtype=float).reshape(-1)
+        return gf.RationalCurveDerivs(gf.BSplineCurveDerivs(parameters, self.knotVector, self.degree, self.Pw, order))
 
-class NURBSSurface:
+class NURBSSurface(_GeometryCacheMixin, _ParametricGeometryMixin):
     """
-    Creates a NURBS surface object.
+    Creates a NURBS surface object. Attributes can be given as keyword arguments or assigned afterwards; a surface
+    given all of them is validated once, when it is created (see Validate).
     
     Keyword arguments:
     controlPoints -- list (structured like array) that contains Cartesian control point coordinates
     degree1 -- degree of polynomial segments in direction 1
     degree2 -- degree of polynomial segments in direction 2
-    knotVector1 -- list of parametric coords that define knot locations in direction 1
-    knotVector2 -- list of parametric coords that define knot locations in direction 2
-    weights -- list of control point weights
+    knotVector1 -- list of parametric coords that define knot locations in direction 1 (default = gf.KnotVector(len(controlPoints), degree1))
+    knotVector2 -- list of parametric coords that define knot locations in direction 2 (default = gf.KnotVector(len(controlPoints[0]), degree2))
+    weights -- list of control point weights (default = ones)
     
     Constraints:
     shape(list) = number of control points in direction 1, and shape(list[0]) = number of control points in direction 2
     len(controlPoints) - 1 >= degree1 >= 1
     len(controlPoints[0]) - 1 >= degree2 >= 1
+    len(knotVector1) == len(controlPoints) + degree1 + 1
+    len(knotVector2) == len(controlPoints[0]) + degree2 + 1
     len(weights) == len(controlPoints)
     len(weights[0]) == len(controlPoints[0])
     """
-    def __init__(self, **kwargs):
-        pass
+    __slots__ = ('controlPoints', 'weights', 'degree1', 'degree2', 'knotVector1', 'knotVector2')
+    _basisAttributes = ('knotVector1', 'knotVector2', 'degree1', 'degree2')
+    _dimension = 2
     
     def KnotLocations(self, **kwargs):
-        # Returns a list that contains sublists of Cartesian knot coordinates.
-        knots = []
-        for x in self.knotVector1:
-            for y in self.knotVector2:
-                knots.append(gf.NURBSSurfacePoint(x, y, self.knotVector1, self.knotVector2, self.degree1, self.degree2, self.controlPoints, self.weights))
-        return knots
+        # Returns an array that contains the Cartesian coordinates of each pair of knots (knotVector2 varying fastest).
+        bases = (BasisMatrix(self.knotVector1, self.knotVector1, self.degree1), BasisMatrix(self.knotVector2, self.knotVector2, self.degree2))
+        Sw = TensorProductDot(bases, self.Pw).transpose(1, 0, 2)
+        S = Sw[..., :-1] / Sw[..., -1:]
+        return S.reshape(-1, S.shape[-1])
     
     def Evaluate(self, N1=50, N2=50, **kwargs):
         """
-        Returns a list (structured like array) that contains Cartesian surface coordinates.
+        Returns an array (shape = (N2, N1, dimension)) that contains Cartesian surface coordinates.
         
         Keyword arguments:.
         start1 -- parametric coordinate at which surface begins in direction 1 (default value shown below)
@@ -109,19 +1096,193 @@ class NURBSSurface:
         stop2 -- parametric coordinate at which surface stops in direction 2 (default value shown below)
         N1 -- number of points evaluated between start and stop in direction 1 (default = 50)
         N2 -- number of points evaluated between start and stop in direction 2 (default = 50)
+        workers -- number of workers evaluating the grid in tiles (default = serial evaluation)
+        tile -- (rows, columns) size of each tile of the (N2, N1) grid (default = rows split into 4 tiles per worker)
+        backend -- 'thread' or 'process' pool of workers (default = 'thread')
+        incremental -- True to keep the (read-only) result and, on later incremental calls with the same grid, update it
+                       in place for control points changed by UpdateControlPoints (default = False)
+        dtype -- np.float32 to contract the control net and return the result in single precision, from float64 basis
+                 functions (see gf.RoundingErrorBound for the error), or np.float64 (default = np.float64)
         """
         start1 = kwargs.get('start1', self.knotVector1[self.degree1])
         stop1 = kwargs.get('stop1', self.knotVector1[-(self.degree1 + 1)])
-        parameter1values = np.linspace(start1, stop1, N1)
+        basis1 = self._CachedBasisMatrix(self.knotVector1, self.degree1, start1, stop1, N1, direction=1)
+        
+        start2 = kwargs.get('start2', self.knotVector2[self.degree2])
+        stop2 = kwargs.get('stop2', self.knotVector2[-(self.degree2 + 1)])
+        basis2 = self._CachedBasisMatrix(self.knotVector2, self.degree2, start2, stop2, N2, direction=2)
+        
+        return self._EvaluateGrid((basis1, basis2), kwargs.get('workers'), kwargs.get('tile'), kwargs.get('backend', 'thread'),
+                                 kwargs.get('incremental', False), _FloatType(kwargs.get('dtype', np.float64)))
+    
+    def IterEvaluate(self, N1=50, N2=50, chunkRows=256, **kwargs):
+        """
+        Yields consecutive arrays (shape = (at most chunkRows, N1, dimension)) of rows of Cartesian surface coordinates that
+        together equal Evaluate(N1, N2, **kwargs). The control net is contracted in direction 1 once, then each block of
+        rows in direction 2 is computed as it is requested, so that memory use does not grow with N2.
+        
+        Keyword arguments:
+        start1, stop1, start2, stop2, N1, N2, dtype -- sample grid and precision, as for Evaluate
+        chunkRows -- largest number of rows (points in direction 2) in a block (default = 256)
+        """
+        start1 = kwargs.get('start1', self.knotVector1[self.degree1])
+        stop1 = kwargs.get('stop1', self.knotVector1[-(self.degree1 + 1)])
+        basis1 = self._CachedBasisMatrix(self.knotVector1, self.degree1, start1, stop1, N1, direction=1)
+        # (N1, n2, dimension + 1) curves in direction 2 through each sample in direction 1
+        Qw = np.moveaxis(basis1.Dot(self._Net(_FloatType(kwargs.get('dtype', np.float64)))), 1, 0)
+        
+        start2 = kwargs.get('start2', self.knotVector2[self.degree2])
+        stop2 = kwargs.get('stop2', self.knotVector2[-(self.degree2 + 1)])
+        for parameters in gf.LinspaceChunks(start2, stop2, N2, chunkRows):
+            Sw = BasisMatrix(parameters, self.knotVector2, self.degree2).Dot(Qw)
+            yield Sw[..., :-1] / Sw[..., -1:]
+    
+    def EvaluateAt(self, parameters, dtype=np.float64):
+        """
+        Returns an array (shape = (len(parameters), dimension)) of Cartesian surface coordinates at scattered parametric points.
+        
+        Arguments:
+        parameters -- array (shape = (number of points, 2)) of parametric coordinates
+        dtype -- floating point type of the contraction and result, as for Evaluate (default = np.float64)
+        """
+        parameters = np.atleast_2d(np.asarray(parameters, dtype=float))
+        dtype = _FloatType(dtype)
+        indices, data = gf.TensorProductBasisFunsBatch(parameters, (self.knotVector1, self.knotVector2), (self.degree1, self.degree2))
+        Pw = self._Net(dtype)
+        Sw = gf.SparseRowsDot(indices, data.astype(dtype, copy=False), Pw.reshape(-1, Pw.shape[-1]))
+        return Sw[:, :-1] / Sw[:, -1:]
+    
+    @property
+    def _directions(self):
+        return [(self.knotVector1, self.degree1), (self.knotVector2, self.degree2)]
+    
+    def Derivatives(self, order=1, N1=50, N2=50, **kwargs):
+        """
+        Returns an array (shape = (N2, N1, order + 1, order + 1, dimension)) of surface derivatives, where [..., k, l] holds
+        the derivative k times in direction 1 and l times in direction 2 (computed for k + l <= order).
         
+        Keyword arguments:
+        order -- highest total order of derivative (default = 1)
+        start1, stop1, start2, stop2, N1, N2 -- sample grid, as for Evaluate
+        """
+        start1 = kwargs.get('start1', self.knotVector1[self.degree1])
+        stop1 = kwargs.get('stop1', self.knotVector1[-(self.degree1 + 1)])
+        basis1 = self._CachedBasisMatrix(self.knotVector1, self.degree1, start1, stop1, N1, direction=1, order=order)
         start2 = kwargs.get('start2', self.knotVector2[self.degree2])
         stop2 = kwargs.get('stop2', self.knotVector2[-(self.degree2 + 1)])
-        parameter2values = np.linspace(start2, stop2, N2)
+        basis2 = self._CachedBasisMatrix(self.knotVector2, self.degree2, start2, stop2, N2, direction=2, order=order)
+        Pw = self.Pw
+        Swders = np.zeros((N2, N1, order + 1, order + 1, Pw.shape[-1]))
+        for k in range(order + 1):
+            for l in range(order - k + 1):
+                Swders[:, :, k, l] = TensorProductDot((basis1, basis2), Pw, (k, l))
+        return gf.RationalSurfaceDerivs(Swders)
+    
+    def DerivativesAt(self, parameters, order=1):
+        """
+        Returns an array (shape = (len(parameters), order + 1, order + 1, dimension)) of surface derivatives at scattered parametric points.
+        
+        Arguments:
+        parameters -- array (shape = (number of points, 2)) of parametric coordinates
+        order -- highest total order of derivative (default = 1)
+        """
+        parameters = np.atleast_2d(np.asarray(parameters, dtype=float))
+        multiIndices = [(k, l) for k in range(order + 1) for l in range(order - k + 1)]
+        indices, data = gf.TensorProductBasisFunsBatch(parameters, (self.knotVector1, self.knotVector2), (self.degree1, self.degree2), multiIndices)
+        Pw = self.Pw
+        Pw = Pw.reshape(-1, Pw.shape[-1])
+        Swders = np.zeros((len(parameters), order + 1, order + 1, Pw.shape[-1]))
+        for (k, l), values in zip(multiIndices, data):
+            Swders[:, k, l] = gf.SparseRowsDot(indices, values, Pw)
+        return gf.RationalSurfaceDerivs(Swders)
+    
+    def Normals(self, N1=50, N2=50, **kwargs):
+        """
+        Returns an array (shape = (N2, N1, 3)) of unit surface normals, the normalised cross product of the first derivatives.
+        
+        Keyword arguments:
+        start1, stop1, start2, stop2, N1, N2 -- sample grid, as for Evaluate
+        """
+        SKL = self.Derivatives(order=1, N1=N1, N2=N2, **kwargs)
+        normals = np.cross(SKL[:, :, 1, 0], SKL[:, :, 0, 1])
+        return normals / np.linalg.norm(normals, axis=-1, keepdims=True)
+
+class NURBSVolume(_GeometryCacheMixin, _ParametricGeometryMixin):
+    """
+    Creates a NURBS volume (trivariate) object. Attributes can be given as keyword arguments or assigned afterwards;
+    a volume given all of them is validated once, when it is created (see Validate).
+    
+    Keyword arguments:
+    controlPoints -- list (structured like array) that contains Cartesian control point coordinates
+    degree1 -- degree of polynomial segments in direction 1
+    degree2 -- degree of polynomial segments in direction 2
+    degree3 -- degree of polynomial segments in direction 3
+    knotVector1 -- list of parametric coords that define knot locations in direction 1
+    knotVector2 -- list of parametric coords that define knot locations in direction 2
+    knotVector3 -- list of parametric coords that define knot locations in direction 3
+    (each knot vector defaults to gf.KnotVector(number of control points in its direction, degree))
+    weights -- list of control point weights (default = ones)
+    
+    Constraints:
+    shape(list) = number of control points in direction 1, shape(list[0]) = number of control points in direction 2,
+    and shape(list[0][0]) = number of control points in direction 3
+    len(controlPoints) - 1 >= degree1 >= 1
+    len(controlPoints[0]) - 1 >= degree2 >= 1
+    len(controlPoints[0][0]) - 1 >= degree3 >= 1
+    shape(weights) == shape(controlPoints)[:3]
+    """
+    __slots__ = ('controlPoints', 'weights', 'degree1', 'degree2', 'degree3', 'knotVector1', 'knotVector2', 'knotVector3')
+    _basisAttributes = ('knotVector1', 'knotVector2', 'knotVector3', 'degree1', 'degree2', 'degree3')
+    _dimension = 3
+    
+    def KnotLocations(self, **kwargs):
+        # Returns an array that contains Cartesian knot coordinates.
+        bases = [BasisMatrix(knotVector, knotVector, degree) for knotVector, degree in
+                 ((self.knotVector1, self.degree1), (self.knotVector2, self.degree2), (self.knotVector3, self.degree3))]
+        Vw = TensorProductDot(bases, self.Pw)
+        V = Vw[..., :-1] / Vw[..., -1:]
+        return V.reshape(-1, V.shape[-1])
+    
+    def Evaluate(self, N1=20, N2=20, N3=20, **kwargs):
+        """
+        Returns an array (shape = (N3, N2, N1, dimension)) that contains Cartesian volume coordinates.
         
-        parameter1mesh, parameter2mesh = np.meshgrid(parameter1values, parameter2values)
-        S = np.nan * np.ones((len(parameter1mesh), len(parameter1mesh[0])), dtype=np.ndarray)
-        for i in range(len(parameter1mesh)):
-            for j in range(len(parameter1mesh[0])):
-                S[i][j] = gf.NURBSSurfacePoint(parameter1mesh[i][j], parameter2mesh[i][j], self.knotVector1, self.knotVector2, self.degree1, self.degree2, self.controlPoints, self.weights)
-        return S
+        Keyword arguments:
+        start1, start2, start3 -- parametric coordinates at which volume begins in directions 1, 2, 3 (default = start of the parametric domain)
+        stop1, stop2, stop3 -- parametric coordinates at which volume stops in directions 1, 2, 3 (default = end of the parametric domain)
+        N1, N2, N3 -- number of points evaluated between start and stop in directions 1, 2, 3 (default = 20)
+        workers -- number of workers evaluating the grid in tiles (default = serial evaluation)
+        tile -- size of each tile along the leading (N3, N2, ...) grid axes (default = N3 split into 4 tiles per worker)
+        backend -- 'thread' or 'process' pool of workers (default = 'thread')
+        incremental -- True to keep the (read-only) result and, on later incremental calls with the same grid, update it
+                       in place for control points changed by UpdateControlPoints (default = False)
+        dtype -- np.float32 to contract the control net and return the result in single precision, from float64 basis
+                 functions (see gf.RoundingErrorBound for the error), or np.float64 (default = np.float64)
+        """
+        bases = []
+        for direction, N, knotVector, degree in ((1, N1, self.knotVector1, self.degree1), (2, N2, self.knotVector2, self.degree2), (3, N3, self.knotVector3, self.degree3)):
+            start = kwargs.get('start{}'.format(direction), knotVector[degree])
+            stop = kwargs.get('stop{}'.format(direction), knotVector[-(degree + 1)])
+            bases.append(self._CachedBasisMatrix(knotVector, degree, start, stop, N, direction=direction))
+        return self._EvaluateGrid(bases, kwargs.get('workers'), kwargs.get('tile'), kwargs.get('backend', 'thread'),
+                                 kwargs.get('incremental', False), _FloatType(kwargs.get('dtype', np.float64)))
+    
+    def EvaluateAt(self, parameters, dtype=np.float64):
+        """
+        Returns an array (shape = (len(parameters), dimension)) of Cartesian coordinates at scattered parametric points.
+        
+        Arguments:
+        parameters -- array (shape = (number of points, 3)) of parametric coordinates
+        dtype -- floating point type of the contraction and result, as for Evaluate (default = np.float64)
+        """
+        parameters = np.atleast_2d(np.asarray(parameters, dtype=float))
+        dtype = _FloatType(dtype)
+        indices, data = gf.TensorProductBasisFunsBatch(parameters, (self.knotVector1, self.knotVector2, self.knotVector3),
+                                                       (self.degree1, self.degree2, self.degree3))
+        Pw = self._Net(dtype)
+        Vw = gf.SparseRowsDot(indices, data.astype(dtype, copy=False), Pw.reshape(-1, Pw.shape[-1]))
+        return Vw[:, :-1] / Vw[:, -1:]
     
+    @property
+    def _directions(self):
+        return [(self.knotVector1, self.degree1), (self.knotVector2, self.degree2), (self.knotVector3, self.degree3)]
@@ -1,4 +1,5 @@
 import numpy as np
+from math import comb
 
 def KnotVector(nControlPoints, degree):
     """
@@ -53,7 +54,8 @@ def FindSpan(degree, parameter, knotVector):
 
 def WeightedControlPoints(controlPoints, weights, dimension):
     """
-    Returns weight control point tensor with each 
+    Returns weighted control point tensor Pw, in which each control point is multiplied by its weight
+    and the weight is appended as an extra (homogeneous) coordinate.
     
     Arguments:
     controlPoints -- list of control point coordinates
@@ -66,21 +68,11 @@ def WeightedControlPoints(controlPoints, weights, dimension):
     dimension = 2 for surface
     dimension = 3 for volume
     """
-    if dimension == 1:
-        Pw = np.zeros((len(controlPoints), len(controlPoints[0]) + 1))
-        for i in range(len(controlPoints)):
-            Pw[i][len(controlPoints[0])] = weights[i]    
-            for j in range(len(controlPoints[0])):
-                Pw[i][j] = weights[i] * controlPoints[i][j]
-    
-    if dimension == 2:
-        Pw = np.zeros((len(controlPoints), len(controlPoints[0]), len(controlPoints[0][0]) + 1))
-        for i in range(len(controlPoints)):
-            for j in range(len(controlPoints[0])):
-                Pw[i][j][-1] = weights[i][j]
-                for k in range(len(controlPoints[0][0])):
-                    Pw[i][j][k] = weights[i][j] * np.array(controlPoints[i][j][k])
-    return Pw
+    controlPoints = np.asarray(controlPoints, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    if dimension not in (1, 2, 3) or controlPoints.ndim != dimension + 1 or weights.shape != controlPoints.shape[:-1]:
+        raise ValueError("controlPoints of shape {} and weights of shape {} do not describe a control net of dimension {}".format(controlPoints.shape, weights.shape, dimension))
+    return np.concatenate([controlPoints * weights[..., None], weights[..., None]], axis=-1)
 
 def BSplineBasisFuns(i, parameter, degree, knotVector):
     """
@@ -184,3 +176,853 @@ def NURBSSurfacePoint(parameter1, parameter2, knotVector1, knotVector2, degree1,
     return S
 
 
+
+def FindSpans(degree, parameters, knotVector):
+    """
+    Returns an array of knot spans, one for each parameter in an array of parameters.
+    This is a vectorised version of algorithm A2.1 on pg 68 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997.
+    
+    Arguments:
+    degree -- degree of polynomial segments
+    parameters -- array of parametric coordinates of B-Spline
+    knotVector -- list of parametric coords that define knot locations
+    """
+    parameters = np.asarray(parameters, dtype=float)
+    knotVector = np.asarray(knotVector, dtype=float)
+    outOfRange = (parameters < knotVector[0]) | (parameters > knotVector[-1])
+    if np.any(outOfRange):
+        parameter = parameters[outOfRange].flat[0]
+        raise IndexError("parameter == {} out of range: [{}, {}]".format(parameter, knotVector[0], knotVector[-1]))
+    m = len(knotVector) - 1
+    n = m - degree - 1
+    # knotVector[span] <= parameter < knotVector[span+1], with parameter == knotVector[n+1] mapped to n
+    spans = np.searchsorted(knotVector, parameters, side='right') - 1
+    return np.clip(spans, degree, n)
+
+def BSplineBasisFunsBatch(spans, parameters, degree, knotVector):
+    """
+    Returns an array (shape = (len(parameters), degree + 1)) of all non-zero B-Spline basis functions at each parameter.
+    This is a vectorised version of algorithm A2.2 on pg 70 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997.
+    
+    Arguments:
+    spans -- array of knot spans returned by FindSpans
+    parameters -- array of parametric coordinates
+    degree -- degree of polynomial segments
+    knotVector -- list of parametric coords that define knot locations
+    """
+    parameters = np.asarray(parameters, dtype=float)
+    knotVector = np.asarray(knotVector, dtype=float)
+    B = np.empty((len(parameters), degree + 1))
+    B[:, 0] = 1.0
+    left = np.empty_like(B)
+    right = np.empty_like(B)
+    for j in range(1, degree + 1):
+        left[:, j] = parameters - knotVector[spans+1-j]
+        right[:, j] = knotVector[spans+j] - parameters
+        saved = 0.0
+        for r in range(j):
+            temp = B[:, r] / (right[:, r+1] + left[:, j-r])
+            B[:, r] = saved + right[:, r+1] * temp
+            saved = left[:, j-r] * temp
+        B[:, j] = saved
+    return B
+
+def DersBasisFunsBatch(spans, parameters, degree, n, knotVector):
+    """
+    Returns an array (shape = (n + 1, len(parameters), degree + 1)) of the non-zero B-Spline basis functions and their
+    derivatives up to order n at each parameter, so that ders[k] holds the k-th derivatives.
+    This is a vectorised version of algorithm A2.3 on pg 72 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997.
+    
+    Arguments:
+    spans -- array of knot spans returned by FindSpans
+    parameters -- array of parametric coordinates
+    degree -- degree of polynomial segments
+    n -- highest order of derivative (derivatives of order > degree are zero)
+    knotVector -- list of parametric coords that define knot locations
+    """
+    parameters = np.asarray(parameters, dtype=float)
+    knotVector = np.asarray(knotVector, dtype=float)
+    nPoints = len(parameters)
+    ders = np.zeros((n + 1, nPoints, degree + 1))
+    # ndu[:, j, r] holds basis functions (upper triangle) and knot differences (lower triangle)
+    ndu = np.empty((nPoints, degree + 1, degree + 1))
+    ndu[:, 0, 0] = 1.0
+    left = np.empty((nPoints, degree + 1))
+    right = np.empty((nPoints, degree + 1))
+    for j in range(1, degree + 1):
+        left[:, j] = parameters - knotVector[spans+1-j]
+        right[:, j] = knotVector[spans+j] - parameters
+        saved = 0.0
+        for r in range(j):
+            ndu[:, j, r] = right[:, r+1] + left[:, j-r]
+            temp = ndu[:, r, j-1] / ndu[:, j, r]
+            ndu[:, r, j] = saved + right[:, r+1] * temp
+            saved = left[:, j-r] * temp
+        ndu[:, j, j] = saved
+    ders[0] = ndu[:, :, degree]
+    a = np.empty((2, nPoints, degree + 1))
+    for r in range(degree + 1):
+        s1, s2 = 0, 1
+        a[0, :, 0] = 1.0
+        for k in range(1, min(n, degree) + 1):
+            d = np.zeros(nPoints)
+            rk = r - k
+            pk = degree - k
+            if r >= k:
+                a[s2, :, 0] = a[s1, :, 0] / ndu[:, pk+1, rk]
+                d = a[s2, :, 0] * ndu[:, rk, pk]
+            j1 = 1 if rk >= -1 else -rk
+            j2 = k - 1 if r - 1 <= pk else degree - r
+            for j in range(j1, j2 + 1):
+                a[s2, :, j] = (a[s1, :, j] - a[s1, :, j-1]) / ndu[:, pk+1, rk+j]
+                d = d + a[s2, :, j] * ndu[:, rk+j, pk]
+            if r <= pk:
+                a[s2, :, k] = -a[s1, :, k-1] / ndu[:, pk+1, r]
+                d = d + a[s2, :, k] * ndu[:, r, pk]
+            ders[k, :, r] = d
+            s1, s2 = s2, s1
+    factor = degree
+    for k in range(1, min(n, degree) + 1):
+        ders[k] *= factor
+        factor *= degree - k
+    return ders
+
+def SparseBasisDot(firstColumns, B, controlNet):
+    """
+    Returns the product of a sparse basis matrix with a control net, contracting the first axis of the control net.
+    Row i of the basis matrix holds the non-zero basis functions B[i] in columns firstColumns[i] ... firstColumns[i] + degree,
+    so the result has shape (len(B),) + controlNet.shape[1:].
+    
+    Arguments:
+    firstColumns -- array of the first non-zero column in each row (span - degree)
+    B -- array (shape = (number of rows, degree + 1)) of non-zero basis functions
+    controlNet -- array of control points (or weighted control points), indexed by control point along the first axis
+    """
+    indices = np.asarray(firstColumns)[:, None] + np.arange(B.shape[1])
+    return SparseRowsDot(indices, B, controlNet)
+
+def BSplineCurvePoints(parameters, knotVector, degree, controlPoints):
+    """
+    Returns an array (shape = (len(parameters), dimension)) of Cartesian coordinates on a B-Spline curve.
+    This is a vectorised version of algorithm A3.1 on pg 82 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997.
+    The basis functions are computed in float64; float32 control points are contracted in float32.
+    
+    Arguments:
+    parameters -- array of parameteric coordinates
+    knotVector -- list of parametric coords that define knot locations
+    degree -- degree of polynomial segments
+    controlPoints -- list of control point coordinates
+    """
+    parameters = np.atleast_1d(np.asarray(parameters, dtype=float))
+    controlPoints = np.asarray(controlPoints)
+    controlPoints = controlPoints.astype(np.result_type(controlPoints, np.float32), copy=False)
+    spans = FindSpans(degree, parameters, knotVector)
+    B = BSplineBasisFunsBatch(spans, parameters, degree, knotVector)
+    return SparseBasisDot(spans - degree, B.astype(controlPoints.dtype, copy=False), controlPoints)
+
+def NURBSCurvePoints(parameters, knotVector, degree, controlPoints, weights):
+    """
+    Returns an array (shape = (len(parameters), dimension)) of Cartesian coordinates on a NURBS curve.
+    This is a vectorised version of algorithm A4.1 on pg 124 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997.
+    
+    Arguments:
+    parameters -- array of parameteric coordinates
+    knotVector -- list of parametric coords that define knot locations
+    degree -- degree of polynomial segments
+    controlPoints -- list of control point coordinates
+    weights -- list of control point weights
+    """
+    dimension = 1
+    Pw = WeightedControlPoints(controlPoints, weights, dimension)
+    Cw = BSplineCurvePoints(parameters, knotVector, degree, Pw)
+    return Cw[:, :-1] / Cw[:, -1:]
+
+def NURBSSurfacePoints(parameters1, parameters2, knotVector1, knotVector2, degree1, degree2, controlPoints, weights):
+    """
+    Returns an array (shape = (len(parameters2), len(parameters1), dimension)) of Cartesian coordinates on a NURBS surface,
+    evaluated on the grid formed by parameters1 and parameters2 (ordered like np.meshgrid(parameters1, parameters2)).
+    This is a vectorised version of algorithm A4.3 on pg 134 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997.
+    
+    Arguments:
+    parameters1 -- array of parametric coordinates in direction 1
+    parameters2 -- array of parametric coordinates in direction 2
+    knotVector1 -- list of parametric coords that define knot locations in direction 1
+    knotVector2 -- list of parametric coords that define knot locations in direction 2
+    degree1 -- degree of polynomial segments in direction 1
+    degree2 -- degree of polynomial segments in direction 2
+    controlPoints -- list (structured like array) that contains Cartesian control point coordinates
+    weights -- list of control point weights
+    """
+    dimension = 2
+    Pw = WeightedControlPoints(controlPoints, weights, dimension)
+    parameters1 = np.atleast_1d(np.asarray(parameters1, dtype=float))
+    parameters2 = np.atleast_1d(np.asarray(parameters2, dtype=float))
+    spans1 = FindSpans(degree1, parameters1, knotVector1)
+    B1 = BSplineBasisFunsBatch(spans1, parameters1, degree1, knotVector1)
+    spans2 = FindSpans(degree2, parameters2, knotVector2)
+    B2 = BSplineBasisFunsBatch(spans2, parameters2, degree2, knotVector2)
+    # contract direction 1 to (N1, n2, dimension + 1), then direction 2 to (N2, N1, dimension + 1)
+    temp = SparseBasisDot(spans1 - degree1, B1, Pw)
+    Sw = SparseBasisDot(spans2 - degree2, B2, temp.transpose(1, 0, 2))
+    return Sw[:, :, :-1] / Sw[:, :, -1:]
+
+def BSplineCurveDerivs(parameters, knotVector, degree, controlPoints, order):
+    """
+    Returns an array (shape = (len(parameters), order + 1, dimension)) of B-Spline curve derivatives, where
+    CK[:, k] holds the k-th derivative (CK[:, 0] is the curve point).
+    This is a vectorised version of algorithm A3.2 on pg 93 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997.
+    
+    Arguments:
+    parameters -- array of parameteric coordinates
+    knotVector -- list of parametric coords that define knot locations
+    degree -- degree of polynomial segments
+    controlPoints -- list of control point coordinates
+    order -- highest order of derivative
+    """
+    parameters = np.atleast_1d(np.asarray(parameters, dtype=float))
+    controlPoints = np.asarray(controlPoints, dtype=float)
+    spans = FindSpans(degree, parameters, knotVector)
+    ders = DersBasisFunsBatch(spans, parameters, degree, order, knotVector)
+    return np.stack([SparseBasisDot(spans - degree, ders[k], controlPoints) for k in range(order + 1)], axis=1)
+
+def RationalCurveDerivs(Cwders):
+    """
+    Returns an array (shape = (..., order + 1, dimension)) of NURBS curve derivatives from the derivatives of the
+    curve in homogeneous coordinates, using the rational quotient rule.
+    This is a vectorised version of algorithm A4.2 on pg 127 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997.
+    
+    Arguments:
+    Cwders -- array (shape = (..., order + 1, dimension + 1)) of homogeneous curve derivatives (weight derivatives last)
+    """
+    Aders, wders = Cwders[..., :-1], Cwders[..., -1:]
+    CK = np.empty_like(Aders)
+    for k in range(Cwders.shape[-2]):
+        v = Aders[..., k, :].copy()
+        for i in range(1, k + 1):
+            v -= comb(k, i) * wders[..., i, :] * CK[..., k-i, :]
+        CK[..., k, :] = v / wders[..., 0, :]
+    return CK
+
+def NURBSCurveDerivs(parameters, knotVector, degree, controlPoints, weights, order):
+    """
+    Returns an array (shape = (len(parameters), order + 1, dimension)) of NURBS curve derivatives, where
+    CK[:, k] holds the k-th derivative (CK[:, 0] is the curve point).
+    This is a vectorised version of algorithms A3.2 and A4.2 on pgs 93 & 127 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997.
+    
+    Arguments:
+    parameters -- array of parameteric coordinates
+    knotVector -- list of parametric coords that define knot locations
+    degree -- degree of polynomial segments
+    controlPoints -- list of control point coordinates
+    weights -- list of control point weights
+    order -- highest order of derivative
+    """
+    dimension = 1
+    Pw = WeightedControlPoints(controlPoints, weights, dimension)
+    return RationalCurveDerivs(BSplineCurveDerivs(parameters, knotVector, degree, Pw, order))
+
+def CurveSpeeds(parameters, knotVector, degree, Pw):
+    """
+    Returns an array of the lengths of the first derivative |C'(u)| of a (rational) curve at each parameter.
+
+    Arguments:
+    parameters -- array of parameteric coordinates
+    knotVector -- list of parametric coords that define knot locations
+    degree -- degree of polynomial segments
+    Pw -- array (shape = (number of control points, dimension + 1)) of weighted control points (weights last)
+    """
+    return np.linalg.norm(RationalCurveDerivs(BSplineCurveDerivs(parameters, knotVector, degree, Pw, 1))[:, 1], axis=-1)
+
+def RationalSurfaceDerivs(Swders):
+    """
+    Returns an array (shape = (..., order + 1, order + 1, dimension)) of NURBS surface derivatives from the derivatives
+    of the surface in homogeneous coordinates, using the rational quotient rule. SKL[..., k, l] holds the derivative
+    k times in direction 1 and l times in direction 2, and is only computed for k + l <= order.
+    This is a vectorised version of algorithm A4.4 on pg 137 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997.
+    
+    Arguments:
+    Swders -- array (shape = (..., order + 1, order + 1, dimension + 1)) of homogeneous surface derivatives (weight derivatives last)
+    """
+    Aders, wders = Swders[..., :-1], Swders[..., -1:]
+    order = Swders.shape[-2] - 1
+    SKL = np.zeros_like(Aders)
+    for k in range(order + 1):
+        for l in range(order - k + 1):
+            v = Aders[..., k, l, :].copy()
+            for j in range(1, l + 1):
+                v -= comb(l, j) * wders[..., 0, j, :] * SKL[..., k, l-j, :]
+            for i in range(1, k + 1):
+                v -= comb(k, i) * wders[..., i, 0, :] * SKL[..., k-i, l, :]
+                v2 = 0.0
+                for j in range(1, l + 1):
+                    v2 = v2 + comb(l, j) * wders[..., i, j, :] * SKL[..., k-i, l-j, :]
+                v -= comb(k, i) * v2
+            SKL[..., k, l, :] = v / wders[..., 0, 0, :]
+    return SKL
+
+def NURBSSurfaceDerivs(parameters1, parameters2, knotVector1, knotVector2, degree1, degree2, controlPoints, weights, order):
+    """
+    Returns an array (shape = (len(parameters2), len(parameters1), order + 1, order + 1, dimension)) of NURBS surface
+    derivatives on the grid formed by parameters1 and parameters2 (ordered like np.meshgrid(parameters1, parameters2)).
+    SKL[..., k, l] holds the derivative k times in direction 1 and l times in direction 2, for k + l <= order.
+    This is a vectorised version of algorithms A3.6 and A4.4 on pgs 111 & 137 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997.
+    
+    Arguments:
+    parameters1 -- array of parametric coordinates in direction 1
+    parameters2 -- array of parametric coordinates in direction 2
+    knotVector1 -- list of parametric coords that define knot locations in direction 1
+    knotVector2 -- list of parametric coords that define knot locations in direction 2
+    degree1 -- degree of polynomial segments in direction 1
+    degree2 -- degree of polynomial segments in direction 2
+    controlPoints -- list (structured like array) that contains Cartesian control point coordinates
+    weights -- list of control point weights
+    order -- highest total order of derivative
+    """
+    dimension = 2
+    Pw = WeightedControlPoints(controlPoints, weights, dimension)
+    parameters1 = np.atleast_1d(np.asarray(parameters1, dtype=float))
+    parameters2 = np.atleast_1d(np.asarray(parameters2, dtype=float))
+    spans1 = FindSpans(degree1, parameters1, knotVector1)
+    ders1 = DersBasisFunsBatch(spans1, parameters1, degree1, order, knotVector1)
+    spans2 = FindSpans(degree2, parameters2, knotVector2)
+    ders2 = DersBasisFunsBatch(spans2, parameters2, degree2, order, knotVector2)
+    Swders = np.zeros((len(parameters2), len(parameters1), order + 1, order + 1, Pw.shape[-1]))
+    for k in range(order + 1):
+        temp = SparseBasisDot(spans1 - degree1, ders1[k], Pw).transpose(1, 0, 2)
+        for l in range(order - k + 1):
+            Swders[:, :, k, l] = SparseBasisDot(spans2 - degree2, ders2[l], temp)
+    return RationalSurfaceDerivs(Swders)
+
+def SparseRowsDot(indices, data, controlNet):
+    """
+    Returns the product of a sparse matrix, with the same number of non-zero entries in every row, and a control net.
+    Row i of the matrix holds the values data[i] in columns indices[i], so the result has shape (len(data),) + controlNet.shape[1:].
+    
+    Arguments:
+    indices -- array (shape = (number of rows, non-zeros per row)) of column indices
+    data -- array (shape = (number of rows, non-zeros per row)) of non-zero values
+    controlNet -- array of control points (or displacements), indexed by (flattened) control point along the first axis
+    """
+    controlNet = np.asarray(controlNet)
+    values = controlNet.reshape(len(controlNet), -1)
+    if values.shape[1] <= data.shape[1]:
+        # few columns (e.g. coordinates): one gather and row-wise dot product per column
+        result = np.empty((len(data), values.shape[1]), dtype=np.result_type(data, values))
+        for k in range(values.shape[1]):
+            result[:, k] = np.einsum('ij,ij->i', data, values[:, k][indices])
+    else:
+        # many columns (e.g. a partially contracted control net): accumulate one non-zero per row at a time
+        result = data[:, 0, None] * values[indices[:, 0]]
+        for j in range(1, data.shape[1]):
+            result += data[:, j, None] * values[indices[:, j]]
+    return result.reshape((len(data),) + controlNet.shape[1:])
+
+def SparseRowsTransposeDot(indices, data, values, nColumns):
+    """
+    Returns the product of the transpose of a sparse matrix, with the same number of non-zero entries in every row,
+    and an array of values (e.g. the adjoint of SparseRowsDot). The result has shape (nColumns,) + values.shape[1:].
+    
+    Arguments:
+    indices -- array (shape = (number of rows, non-zeros per row)) of column indices
+    data -- array (shape = (number of rows, non-zeros per row)) of non-zero values
+    values -- array with one entry (or row of entries) per row of the matrix
+    nColumns -- number of columns of the matrix
+    """
+    values = np.asarray(values)
+    columns = values.reshape(len(values), -1)
+    result = np.empty((nColumns, columns.shape[1]), dtype=np.result_type(data, values))
+    for k in range(columns.shape[1]):
+        result[:, k] = np.bincount(indices.ravel(), weights=(data * columns[:, k, None]).ravel(), minlength=nColumns)
+    return result.reshape((nColumns,) + values.shape[1:])
+
+def RoundingErrorBound(degrees, rational=True, dtype=np.float32):
+    """
+    Returns a bound on the error of evaluating a B-Spline or NURBS geometry with its control net, contractions and result
+    in dtype (and its basis functions computed in float64, then rounded to dtype), relative to the largest absolute
+    control point coordinate: every evaluated coordinate x satisfies |x - exact x| <= bound * max(abs(controlPoints)).
+    Basis functions are non-negative and sum to one, so the contraction in a direction of degree d adds at most d + 2 unit
+    roundoffs u of the largest coordinate (d + 1 for the products and sums, 1 for rounding the basis functions), and
+    storing the control net adds one: 1 + sum(d + 2) = t. A rational geometry rounds its weighted coordinates and its weight
+    sum separately before dividing them, which gives 2t + 1, whatever its weights (the point lies in the convex hull of
+    its control points). The bound is worst case and first order in u = 2**-24 = 6.0e-8 for float32; a cubic float32
+    surface is within 11u = 6.6e-7 (B-Spline) or 23u = 1.4e-6 (NURBS) of the largest coordinate, so geometry far from
+    the origin loses precision and is better evaluated in float32 relative to a nearby origin.
+
+    Arguments:
+    degrees -- list of the degree in each parametric direction
+    rational -- True for weighted (NURBS) geometries (default = True)
+    dtype -- floating point type of the evaluation (default = np.float32)
+    """
+    u = np.finfo(dtype).eps / 2
+    t = 1 + sum(degree + 2 for degree in degrees)
+    return (2 * t + 1) * u if rational else t * u
+
+def PointSegmentDistances(points, starts, ends):
+    """
+    Returns an array of distances from each point to the line segment between the corresponding start and end points.
+    
+    Arguments:
+    points -- array (shape = (..., dimension)) of Cartesian coordinates
+    starts -- array (shape = (..., dimension)) of segment start points
+    ends -- array (shape = (..., dimension)) of segment end points
+    """
+    direction = ends - starts
+    lengthSquared = np.sum(direction * direction, axis=-1)
+    t = np.sum((points - starts) * direction, axis=-1) / np.where(lengthSquared > 0, lengthSquared, 1)
+    closest = starts + np.clip(t, 0, 1)[..., None] * direction
+    return np.linalg.norm(points - closest, axis=-1)
+
+def LinspaceChunks(start, stop, N, chunkSize):
+    """
+    Yields consecutive blocks of at most chunkSize parameters that together equal np.linspace(start, stop, N),
+    without creating the full array.
+    
+    Arguments:
+    start -- first parameter
+    stop -- last parameter
+    N -- total number of parameters
+    chunkSize -- largest number of parameters in a block
+    """
+    if N == 1:
+        yield np.array([float(start)])
+        return
+    step = (stop - start) / (N - 1)
+    for first in range(0, N, chunkSize):
+        last = min(first + chunkSize, N)
+        chunk = np.arange(first, last, dtype=float) * step + start
+        if last == N:
+            chunk[-1] = stop
+        yield chunk
+
+def TensorProductBasisFunsBatch(parameters, knotVectors, degrees, derivatives=None):
+    """
+    Returns the column indices and values of all non-zero tensor-product B-Spline basis functions
+    N1(parameters[i, 0]) * N2(parameters[i, 1]) * ... at each of a set of scattered parametric points.
+    Both arrays have shape (len(parameters), (degree1 + 1) * (degree2 + 1) * ...), and column indices refer to
+    control points flattened in C order from an (n1, n2, ...) control net.
+    If derivatives is given, the values array instead has shape (len(derivatives), len(parameters), ...) and holds the
+    partial derivatives of the basis functions for each multi-index in derivatives.
+    
+    Arguments:
+    parameters -- array (shape = (number of points, number of parametric directions)) of parametric coordinates
+    knotVectors -- list of knot vectors, one per parametric direction
+    degrees -- list of degrees of polynomial segments, one per parametric direction
+    derivatives -- list of multi-indices (tuples with one derivative order per direction), e.g. [(0, 0), (1, 0), (0, 1)] (default = None)
+    """
+    parameters = np.atleast_2d(np.asarray(parameters, dtype=float))
+    nPoints = len(parameters)
+    multiIndices = [(0,) * len(degrees)] if derivatives is None else [tuple(d) for d in derivatives]
+    indices = np.zeros((nPoints, 1), dtype=int)
+    data = np.ones((len(multiIndices), nPoints, 1))
+    for k, (knotVector, degree) in enumerate(zip(knotVectors, degrees)):
+        spans = FindSpans(degree, parameters[:, k], knotVector)
+        ders = DersBasisFunsBatch(spans, parameters[:, k], degree, max(m[k] for m in multiIndices), knotVector)
+        n = len(knotVector) - degree - 1
+        nonZeros = indices.shape[1] * (degree + 1)
+        indices = (indices[:, :, None] * n + (spans[:, None] - degree + np.arange(degree + 1))[:, None, :]).reshape(nPoints, nonZeros)
+        B = ders[[m[k] for m in multiIndices]]
+        data = (data[:, :, :, None] * B[:, :, None, :]).reshape(len(multiIndices), nPoints, nonZeros)
+    if derivatives is None:
+        data = data[0]
+    return indices, data
+
+def _WrapOrClip(parameters, lower, upper, closed):
+    # Returns parameters wrapped into the domain in closed directions and clipped to it in open directions.
+    return np.where(closed, lower + np.mod(parameters - lower, upper - lower), np.clip(parameters, lower, upper))
+
+def NewtonPointInversion(derivatives, points, seeds, lower, upper, tolerance=1e-10, cosineTolerance=1e-8, maxIterations=20, closed=None):
+    """
+    Returns a tuple (parameters, converged, iterations) of the parametric coordinates of Cartesian points, found by
+    batched Newton-Raphson iteration from seed parameters, with per-point convergence status and iteration counts.
+    Curves and surfaces are inverted by projecting each point onto the geometry (eqns 6.3 & 6.6 on pgs 231 & 232), using the
+    convergence criteria of section 6.1 on pg 230 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997. Where the Newton matrix
+    is not positive definite (far from the solution) the Gauss-Newton approximation is used instead. A projection that reaches
+    a bound of the parametric domain with the distance still decreasing out of it stays on that bound, and converges
+    when the residual is perpendicular to the remaining partial derivatives (a closest point on the boundary).
+    For volumes the Jacobian is square and the iteration is plain Newton-Raphson.
+    
+    Arguments:
+    derivatives -- function mapping an array (shape = (M, k)) of parameters to a tuple (points, first, second) of arrays of points
+                   (shape = (M, dimension)), first partial derivatives (shape = (M, dimension, k)) and second partial
+                   derivatives (shape = (M, dimension, k, k), or None to use the Gauss-Newton approximation)
+    points -- array (shape = (number of points, dimension)) of Cartesian coordinates to invert
+    seeds -- array (shape = (number of points, k)) of starting parameters
+    lower -- array (shape = (k,)) of lower bounds of the parametric domain
+    upper -- array (shape = (k,)) of upper bounds of the parametric domain
+    tolerance -- Euclidean distance below which a point is considered to lie on the geometry (default = 1e-10)
+    cosineTolerance -- cosine between the derivatives and the residual below which a point is considered projected (default = 1e-8)
+    maxIterations -- maximum number of Newton iterations per point (default = 20)
+    closed -- array (shape = (k,)) of booleans, True for directions in which the geometry is closed, so that
+              parameters leaving the domain wrap around to the other end instead of being clamped (default = none closed)
+    """
+    points = np.atleast_2d(np.asarray(points, dtype=float))
+    parameters = np.array(seeds, dtype=float).reshape(len(points), -1)
+    lower = np.asarray(lower, dtype=float)
+    upper = np.asarray(upper, dtype=float)
+    closed = np.zeros(len(lower), dtype=bool) if closed is None else np.asarray(closed, dtype=bool)
+    projection = points.shape[1] > len(lower)
+    converged = np.zeros(len(points), dtype=bool)
+    stagnant = np.zeros(len(points), dtype=bool)
+    iterations = np.zeros(len(points), dtype=int)
+    active = np.arange(len(points))
+    for iteration in range(maxIterations + 1):
+        if len(active) == 0:
+            break
+        u = parameters[active]
+        C, J, H = derivatives(u)
+        residual = C - points[active]
+        distance = np.linalg.norm(residual, axis=1)
+        gradient = np.einsum('aik,ai->ak', J, residual)
+        # a projection onto a bound of the domain, with the gradient pointing out of it, stays there in that direction
+        fixed = projection & ~closed & (((u <= lower) & (gradient > 0)) | ((u >= upper) & (gradient < 0)))
+        # zero cosine between every other partial derivative and the residual
+        cosine = np.abs(gradient) / (np.linalg.norm(J, axis=1) * distance[:, None] + np.finfo(float).tiny)
+        done = (distance <= tolerance) | np.all((cosine <= cosineTolerance) | fixed, axis=1)
+        converged[active[done]] = True
+        if iteration == maxIterations:
+            break
+        # points whose parameters stopped changing get one last convergence check, but no further steps
+        stepping = ~done & ~stagnant[active]
+        active, u, J, gradient, free = active[stepping], u[stepping], J[stepping], gradient[stepping], ~fixed[stepping]
+        if len(active) == 0:
+            break
+        # directions that stay on a bound take no step: their rows and columns are those of the identity
+        mask, identity = free[:, :, None] & free[:, None, :], ~free[:, :, None] * np.eye(J.shape[2])
+        JTJ = np.where(mask, np.einsum('aik,ail->akl', J, J), identity)
+        if H is not None:
+            newton = np.where(mask, JTJ + np.einsum('ai,aikl->akl', residual[stepping], H[stepping]), identity)
+            positive = np.linalg.eigvalsh(newton)[:, 0] > 0
+            JTJ[positive] = newton[positive]
+        JTJ += 1e-14 * np.trace(JTJ, axis1=1, axis2=2)[:, None, None] * np.eye(J.shape[2])
+        step = -np.linalg.solve(JTJ, (gradient * free)[..., None])[..., 0]
+        uNew = _WrapOrClip(u + step, lower, upper, closed)
+        # halve steps that move further away from the point (e.g. overshooting near a knot)
+        target, oldDistance = points[active], distance[stepping]
+        for halving in range(4):
+            worse = np.linalg.norm(derivatives(uNew)[0] - target, axis=1) > oldDistance
+            if not np.any(worse):
+                break
+            step[worse] *= 0.5
+            uNew[worse] = _WrapOrClip(u[worse] + step[worse], lower, upper, closed)
+        iterations[active] += 1
+        parameters[active] = uNew
+        moved = np.linalg.norm(np.einsum('aik,ak->ai', J, uNew - u), axis=1)
+        stagnant[active[moved <= tolerance]] = True
+    return parameters, converged, iterations
+
+def KnotInsertion(degree, knotVector, Pw, parameter, r=1, axis=0):
+    """
+    Returns (knot vector, weighted control points) after inserting a knot r times.
+    This is algorithm A5.1 on pg 151 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997, applied to every row of
+    control points along one axis of a control net, so that it also inserts knots into surfaces and volumes.
+    
+    Arguments:
+    degree -- degree of polynomial segments
+    knotVector -- list of parametric coords that define knot locations
+    Pw -- array of weighted control points, indexed by control point along axis
+    parameter -- parametric coordinate of the new knot
+    r -- number of times the knot is inserted (default = 1)
+    axis -- axis of Pw along the knot vector's direction (default = 0)
+    """
+    knotVector = np.asarray(knotVector, dtype=float)
+    P = np.moveaxis(np.asarray(Pw, dtype=float), axis, 0)
+    p = degree
+    n = len(P) - 1
+    k = int(FindSpans(p, parameter, knotVector))
+    s = int(np.sum(knotVector == parameter))
+    if r < 1 or r + s > p:
+        raise ValueError("cannot insert knot {} {} times: it already has multiplicity {} and degree == {}".format(parameter, r, s, p))
+    UQ = np.concatenate([knotVector[:k + 1], np.full(r, float(parameter)), knotVector[k + 1:]])
+    Q = np.empty((n + r + 1,) + P.shape[1:])
+    Q[:k - p + 1] = P[:k - p + 1]
+    Q[k - s + r:] = P[k - s:]
+    Rw = P[k - p:k - s + 1].copy()
+    for j in range(1, r + 1):
+        L = k - p + j
+        i = np.arange(p - j - s + 1)
+        alpha = ((parameter - knotVector[L + i]) / (knotVector[i + k + 1] - knotVector[L + i])).reshape((-1,) + (1,) * (P.ndim - 1))
+        Rw[:len(i)] = alpha * Rw[1:len(i) + 1] + (1 - alpha) * Rw[:len(i)]
+        Q[L] = Rw[0]
+        Q[k + r - j - s] = Rw[p - j - s]
+    L = k - p + r
+    Q[L + 1:k - s] = Rw[1:k - s - L]
+    return UQ, np.moveaxis(Q, 0, axis)
+
+def KnotRefinement(degree, knotVector, Pw, knots, axis=0):
+    """
+    Returns (knot vector, weighted control points) after inserting a sorted list of knots.
+    This is algorithm A5.4 on pg 164 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997, applied to every row of
+    control points along one axis of a control net.
+    
+    Arguments:
+    degree -- degree of polynomial segments
+    knotVector -- list of parametric coords that define knot locations
+    Pw -- array of weighted control points, indexed by control point along axis
+    knots -- sorted list of parametric coordinates of the new knots
+    axis -- axis of Pw along the knot vector's direction (default = 0)
+    """
+    U = np.asarray(knotVector, dtype=float)
+    X = np.sort(np.asarray(knots, dtype=float).reshape(-1))
+    P = np.moveaxis(np.asarray(Pw, dtype=float), axis, 0)
+    if len(X) == 0:
+        return U.copy(), np.moveaxis(P.copy(), 0, axis)
+    p = degree
+    n = len(P) - 1
+    m = n + p + 1
+    r = len(X) - 1
+    a = int(FindSpans(p, X[0], U))
+    b = int(FindSpans(p, X[r], U)) + 1
+    Q = np.empty((n + r + 2,) + P.shape[1:])
+    Ubar = np.empty(m + r + 2)
+    Q[:a - p + 1] = P[:a - p + 1]
+    Q[b + r:] = P[b - 1:]
+    Ubar[:a + 1] = U[:a + 1]
+    Ubar[b + p + r + 1:] = U[b + p:]
+    i = b + p - 1
+    k = b + p + r
+    for j in range(r, -1, -1):
+        while X[j] <= U[i] and i > a:
+            Q[k - p - 1] = P[i - p - 1]
+            Ubar[k] = U[i]
+            k -= 1
+            i -= 1
+        Q[k - p - 1] = Q[k - p]
+        for l in range(1, p + 1):
+            ind = k - p + l
+            alpha = Ubar[k + l] - X[j]
+            if alpha == 0:
+                Q[ind - 1] = Q[ind]
+            else:
+                alpha = alpha / (Ubar[k + l] - U[i - p + l])
+                Q[ind - 1] = alpha * Q[ind - 1] + (1 - alpha) * Q[ind]
+        Ubar[k] = X[j]
+        k -= 1
+    return Ubar, np.moveaxis(Q, 0, axis)
+
+def BezierDecomposition(degree, knotVector, Pw, axis=0):
+    """
+    Returns (breakpoints, segments), where segments (shape = (number of knot spans,) + shape(Pw) with degree + 1 control
+    points along axis + 1) holds the weighted control points of the Bezier segment on each non-zero knot span, which
+    lies between consecutive breakpoints.
+    This is algorithm A5.6 on pg 173 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997, applied to every row of
+    control points along one axis of a control net. The knot vector must be clamped (end knots of multiplicity degree + 1).
+    
+    Arguments:
+    degree -- degree of polynomial segments
+    knotVector -- list of parametric coords that define knot locations
+    Pw -- array of weighted control points, indexed by control point along axis
+    axis -- axis of Pw along the knot vector's direction (default = 0)
+    """
+    U = np.asarray(knotVector, dtype=float)
+    P = np.moveaxis(np.asarray(Pw, dtype=float), axis, 0)
+    p = degree
+    m = len(U) - 1
+    breakpoints = np.unique(U[p:m - p + 1])
+    segments = np.empty((len(breakpoints) - 1, p + 1) + P.shape[1:])
+    a = p
+    b = p + 1
+    nb = 0
+    segments[0] = P[:p + 1]
+    while b < m:
+        i = b
+        while b < m and U[b + 1] == U[b]:
+            b += 1
+        mult = b - i + 1
+        if mult < p:
+            numer = U[b] - U[a]
+            alphas = numer / (U[a + np.arange(mult + 1, p + 1)] - U[a])
+            r = p - mult
+            for j in range(1, r + 1):
+                save = r - j
+                s = mult + j
+                alpha = alphas[:p - s + 1].reshape((-1,) + (1,) * (P.ndim - 1))
+                segments[nb, s:] = alpha * segments[nb, s:] + (1 - alpha) * segments[nb, s - 1:p]
+                if b < m:
+                    segments[nb + 1, save] = segments[nb, p]
+        nb += 1
+        if b < m:
+            segments[nb, p - mult:] = P[b - mult:b + 1]
+            a = b
+            b += 1
+    return breakpoints, np.moveaxis(segments, 1, axis + 1)
+
+def BezierToPowerMatrix(degree):
+    """
+    Returns the matrix M (shape = (degree + 1, degree + 1)) that maps the control points Q of a Bezier segment on t in
+    [0, 1] to the coefficients a = M Q of its power basis form sum(a[j] * t**j).
+    This is Eqn 6.80 on pg 269 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997.
+    
+    Arguments:
+    degree -- degree of the Bezier segment
+    """
+    M = np.zeros((degree + 1, degree + 1))
+    for j in range(degree + 1):
+        for i in range(j + 1):
+            M[j, i] = (-1) ** (j - i) * comb(degree, j) * comb(j, i)
+    return M
+
+def HornerPowerBasis(coefficients, t):
+    """
+    Returns the values of tensor-product power basis polynomials, evaluated by nested Horner's rule.
+    This is algorithm A1.1 on pg 7 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997, applied in each direction in turn.
+    
+    Arguments:
+    coefficients -- array (shape = (number of points, degree1 + 1, ..., degreek + 1, dimension)) of the coefficients of the
+                    polynomial each point lies on
+    t -- array (shape = (number of points, k)) of local parametric coordinates of the points
+    """
+    result = coefficients
+    for direction in range(t.shape[1] - 1, -1, -1):
+        # the direction being contracted is always the second to last axis of result
+        local = t[:, direction].reshape((-1,) + (1,) * (result.ndim - 2))
+        value = result[..., -1, :]
+        for j in range(result.shape[-2] - 2, -1, -1):
+            value = value * local + result[..., j, :]
+        result = value
+    return result
+
+def FittingParameters(points, method='chordlength'):
+    """
+    Returns an array of parameters in [0, 1] for a sequence of data points, one per point, for curve fitting.
+    These are Eqns 9.4 - 9.6 on pgs 364 & 365 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997.
+    Points may have leading axes (e.g. the rows of a grid of surface data), which are parameterised separately;
+    a sequence of points that all coincide gets nan parameters.
+    
+    Arguments:
+    points -- array (shape = (..., number of points, dimension)) of Cartesian coordinates
+    method -- 'uniform' (equally spaced), 'chordlength' or 'centripetal' (square root of chord length) (default = 'chordlength')
+    """
+    points = np.asarray(points, dtype=float)
+    if method == 'uniform':
+        return np.broadcast_to(np.linspace(0, 1, points.shape[-2]), points.shape[:-1]).copy()
+    if method not in ('chordlength', 'centripetal'):
+        raise ValueError("method == {} is not 'uniform', 'chordlength' or 'centripetal'".format(method))
+    chords = np.linalg.norm(np.diff(points, axis=-2), axis=-1)
+    if method == 'centripetal':
+        chords = np.sqrt(chords)
+    cumulative = np.concatenate([np.zeros(chords.shape[:-1] + (1,)), np.cumsum(chords, axis=-1)], axis=-1)
+    total = cumulative[..., -1:]
+    parameters = cumulative / np.where(total > 0, total, np.nan)
+    parameters[..., -1] = np.where(total[..., 0] > 0, 1, np.nan)
+    return parameters
+
+def AveragedKnotVector(parameters, degree):
+    """
+    Returns a clamped knot vector whose internal knots average degree consecutive parameters, for interpolating one
+    data point per parameter. This is Eqn 9.8 on pg 365 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997.
+    
+    Arguments:
+    parameters -- non-decreasing array of data point parameters, from 0 to 1
+    degree -- degree of polynomial segments
+    """
+    parameters = np.asarray(parameters, dtype=float)
+    n = len(parameters) - 1
+    windows = np.cumsum(np.concatenate([[0], parameters]))
+    internal = (windows[1 + degree:n + 1] - windows[1:n + 1 - degree]) / degree
+    return np.concatenate([np.zeros(degree + 1), internal, np.ones(degree + 1)])
+
+def ApproximationKnotVector(parameters, degree, nControlPoints):
+    """
+    Returns a clamped knot vector for a least squares fit of nControlPoints control points to data points with the
+    given parameters, placed so that every knot span contains at least one parameter.
+    These are Eqns 9.68 & 9.69 on pg 412 of 'The NURBS Book' - Les Piegl & Wayne Tiller, 1997.
+    
+    Arguments:
+    parameters -- non-decreasing array of data point parameters, from 0 to 1
+    degree -- degree of polynomial segments
+    nControlPoints -- number of control points, at least degree + 1 and at most the number of parameters
+    """
+    parameters = np.asarray(parameters, dtype=float)
+    m, n = len(parameters) - 1, nControlPoints - 1
+    d = (m + 1) / (n - degree + 1)
+    jd = d * np.arange(1, n - degree + 1)
+    i = jd.astype(int)
+    alpha = jd - i
+    internal = (1 - alpha) * parameters[i - 1] + alpha * parameters[i]
+    return np.concatenate([np.zeros(degree + 1), internal, np.ones(degree + 1)])
+
+def BandedRows(firstColumns, B, nColumns):
+    """
+    Returns a tuple (lower, upper, bands) that stores the square matrix with rows of non-zero entries B[i] in columns
+    firstColumns[i] ... firstColumns[i] + degree (e.g. a collocation matrix of basis functions) in LAPACK band storage,
+    bands[upper + i - j, j] = A[i, j], where lower and upper are the numbers of non-zero diagonals below and above the main one.
+    
+    Arguments:
+    firstColumns -- array of the first non-zero column in each row
+    B -- array (shape = (nColumns, degree + 1)) of non-zero values
+    nColumns -- number of rows and columns of the matrix
+    """
+    rows = np.arange(len(B))[:, None]
+    columns = np.asarray(firstColumns)[:, None] + np.arange(B.shape[1])
+    nonZero = B != 0
+    offsets = np.where(nonZero, rows - columns, 0)
+    lower, upper = max(int(offsets.max()), 0), max(int(-offsets.min()), 0)
+    bands = np.zeros((lower + upper + 1, nColumns))
+    bands[(upper + rows - columns)[nonZero], columns[nonZero]] = B[nonZero]
+    return lower, upper, bands
+
+def BandedNormalMatrix(firstColumns, B, nColumns):
+    """
+    Returns the symmetric matrix N^T N for the sparse matrix N with rows of non-zero entries B[i] in columns
+    firstColumns[i] ... firstColumns[i] + degree, in LAPACK band storage with degree diagonals on each side of the main one
+    (see BandedRows). Its cost grows linearly with the number of rows.
+    
+    Arguments:
+    firstColumns -- array of the first non-zero column in each row
+    B -- array (shape = (number of rows, degree + 1)) of non-zero values
+    nColumns -- number of columns of N
+    """
+    p = B.shape[1] - 1
+    firstColumns = np.asarray(firstColumns)
+    bands = np.zeros((2 * p + 1, nColumns))
+    for i in range(p + 1):
+        for j in range(p + 1):
+            # N[:, first + i] . N[:, first + j] lands in band row p + i - j of column first + j
+            bands[p + i - j] += np.bincount(firstColumns + j, weights=B[:, i] * B[:, j], minlength=nColumns)
+    return p, p, bands
+
+def SolveBanded(lower, upper, bands, rhs, blockSize=None):
+    """
+    Returns the solution x of A x = rhs for a banded matrix A in LAPACK band storage, bands[upper + i - j, j] = A[i, j].
+    The matrix is split into square blocks at least as wide as its bands, which makes it block tridiagonal, and solved by
+    block forward elimination and back substitution (the block Thomas algorithm): O(n blockSize^2) operations for n
+    unknowns instead of O(n^3), in about n / blockSize dense block solves. Elimination without pivoting between blocks is
+    stable for the matrices of curve and surface fitting, since B-Spline collocation matrices are totally positive and
+    least squares normal matrices are symmetric positive definite.
+    
+    Arguments:
+    lower -- number of non-zero diagonals below the main diagonal
+    upper -- number of non-zero diagonals above the main diagonal
+    bands -- array (shape = (lower + upper + 1, n)) of the diagonals of A
+    rhs -- array (shape = (n, ...)) of right hand sides
+    blockSize -- number of rows per block, at least max(lower, upper) (default = max(lower, upper, 16))
+    """
+    n = bands.shape[1]
+    rhs = np.asarray(rhs, dtype=float)
+    b = max(lower, upper, blockSize or 16)
+    nBlocks = -(-n // b)
+    # row r of A, restricted to the blocks before, of and after its own block (padded with identity rows)
+    windows = np.zeros((nBlocks * b, 3 * b))
+    windows[np.arange(n, nBlocks * b), b + np.arange(n, nBlocks * b) % b] = 1
+    bandRows, columns = np.meshgrid(np.arange(lower + upper + 1), np.arange(n), indexing='ij')
+    rows = bandRows - upper + columns
+    inside = (rows >= 0) & (rows < n)
+    rows, columns, values = rows[inside], columns[inside], bands[inside]
+    windows[rows, columns - (rows // b - 1) * b] = values
+    windows = windows.reshape(nBlocks, b, 3 * b)
+    L, D, U = windows[:, :, :b], windows[:, :, b:2 * b], windows[:, :, 2 * b:]
+    y = np.zeros((nBlocks * b, int(np.prod(rhs.shape[1:]))))
+    y[:n] = rhs.reshape(n, -1)
+    y = y.reshape(nBlocks, b, -1)
+    X = np.zeros((nBlocks, b, b))
+    for i in range(nBlocks):
+        if i == 0:
+            pivot, right = D[0], np.concatenate([U[0], y[0]], axis=1)
+        else:
+            pivot = D[i] - L[i] @ X[i - 1]
+            right = np.concatenate([U[i], y[i] - L[i] @ y[i - 1]], axis=1)
+        solved = np.linalg.solve(pivot, right)
+        X[i], y[i] = solved[:, :b], solved[:, b:]
+    for i in range(nBlocks - 2, -1, -1):
+        y[i] -= X[i] @ y[i + 1]
+    return y.reshape(nBlocks * b, -1)[:n].reshape(rhs.shape)
@@ -0,0 +1,174 @@
+import json
+import numpy as np
+from . import geom_classes as gc
+from . import geom_structures as gs
+from . import ffd_lattice
+
+# Binary files of geometries, tessellations and point clouds that open as memory maps, so arrays are paged in from
+# disk when they are used instead of being read (or unpickled) when the file is opened.
+#
+# File layout:
+#   8 bytes   MAGIC
+#   8 bytes   length of the header, unsigned little-endian integer
+#   header    UTF-8 JSON: {'format', 'type', 'values': {name: scalar}, 'blocks': {name: [dtype, shape, offset]},
+#             'basisMatrices': [cache key fields]}, padded with spaces
+#   blocks    raw C-order arrays, little-endian float64 ('<f8'), float32 ('<f4') or int64 ('<i8'), each starting at a
+#             multiple of ALIGNMENT bytes
+
+MAGIC = b'FFDGEOM\x00'
+FORMAT = 1
+ALIGNMENT = 64
+GEOMETRY_CLASSES = {cls.__name__: cls for cls in (gc.BSplineCurve, gc.NURBSCurve, gc.NURBSSurface, gc.NURBSVolume, ffd_lattice.FFDLattice)}
+FFD_ATTRIBUTES = ('origin', 'axes', 'restControlPoints')
+EMBEDDING_ARRAYS = ('points', 'inside', 'localCoordinates', 'indices', 'data', 'controlPoints')
+
+def _Aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def _LittleEndian(array):
+    # Returns an array as little-endian float64, float32 if it is float32 (e.g. a single precision evaluation or
+    # embedding), or int64 if it holds integers (or booleans).
+    array = np.asarray(array)
+    dtype = '<i8' if array.dtype.kind in 'biu' else '<f4' if array.dtype == np.float32 else '<f8'
+    return np.ascontiguousarray(array, dtype=dtype)
+
+def _Contents(obj, basisMatrices):
+    # Returns the type name, scalar values, arrays and basis matrix keys that describe obj.
+    values, arrays, keys = {}, {}, []
+    if isinstance(obj, np.ndarray):
+        arrays['array'] = obj
+        return 'ndarray', values, arrays, keys
+    if isinstance(obj, gs.Tessellation):
+        for k, breaks in enumerate(obj.breaks):
+            arrays['breaks.{}'.format(k)] = breaks
+        arrays['parameters'], arrays['vertices'] = obj.parameters, obj.vertices
+        if obj.triangles is not None:
+            arrays['triangles'] = obj.triangles
+        values = {'directions': len(obj.breaks), 'deviation': float(obj.deviation), 'evaluations': int(obj.evaluations)}
+        return 'Tessellation', values, arrays, keys
+    typeName = type(obj).__name__
+    if typeName not in GEOMETRY_CLASSES:
+        raise TypeError("cannot save {} objects".format(typeName))
+    for name in obj._netAttributes + obj._basisAttributes:
+        value = getattr(obj, name)
+        if isinstance(value, np.ndarray):
+            arrays[name] = value
+        else:
+            values[name] = value
+    if isinstance(obj, ffd_lattice.FFDLattice):
+        for name in FFD_ATTRIBUTES:
+            arrays[name] = getattr(obj, name)
+        if obj.embedding is not None:
+            for name in EMBEDDING_ARRAYS:
+                arrays['embedding.' + name] = obj.embedding[name]
+    if basisMatrices:
+        for k, (key, basis) in enumerate(obj.basisCache.Items()):
+            direction, degree, knotBytes, start, stop, N = key
+            keys.append({'direction': direction, 'degree': degree, 'start': start, 'stop': stop, 'N': N, 'order': basis.order})
+            for name in ('parameters', 'knotVector', 'spans', 'indices', 'derivatives'):
+                arrays['basis.{}.{}'.format(k, name)] = getattr(basis, name)
+    return typeName, values, arrays, keys
+
+def Save(path, obj, basisMatrices=False):
+    """
+    Writes a geometry, tessellation or array (e.g. an evaluated point cloud) to a binary file that Load opens as memory maps.
+
+    Arguments:
+    path -- file name
+    obj -- BSplineCurve, NURBSCurve, NURBSSurface, NURBSVolume or FFDLattice (with its embedded points, if any),
+           Tessellation, or numpy array
+    basisMatrices -- True to also write the geometry's cached basis matrices, so that evaluating the loaded geometry
+                     on the same grids does not rebuild them (default = False)
+    """
+    typeName, values, arrays, keys = _Contents(obj, basisMatrices)
+    arrays = {name: _LittleEndian(array) for name, array in arrays.items()}
+    blocks = {name: [array.dtype.str, list(array.shape), 0] for name, array in arrays.items()}
+    header = {'format': FORMAT, 'type': typeName, 'values': values, 'blocks': blocks, 'basisMatrices': keys}
+    # block offsets depend on the header length, which depends on the offsets: size the header with generous offsets first
+    for block in blocks.values():
+        block[2] = 2 ** 62
+    start = _Aligned(16 + len(json.dumps(header).encode()))
+    offset = start
+    for name, array in arrays.items():
+        blocks[name][2] = offset
+        offset = _Aligned(offset + array.nbytes)
+    text = json.dumps(header).encode().ljust(start - 16)
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.array(len(text), dtype='<u8').tobytes())
+        f.write(text)
+        for name, array in arrays.items():
+            f.seek(blocks[name][2])
+            array.tofile(f)
+        f.truncate(max(offset, start))
+
+def ReadHeader(path):
+    # Returns the header dictionary of a file written by Save, without mapping its arrays.
+    with open(path, 'rb') as f:
+        if f.read(8) != MAGIC:
+            raise ValueError("{} is not a geometry file".format(path))
+        length = f.read(8)
+        text = f.read(int(np.frombuffer(length, dtype='<u8')[0])) if len(length) == 8 else b''
+    try:
+        header = json.loads(text.decode())
+    except ValueError:
+        raise ValueError("{} is truncated or corrupt: its header cannot be read".format(path)) from None
+    if header['format'] > FORMAT:
+        raise ValueError("{} has format {}, newer than the supported format {}".format(path, header['format'], FORMAT))
+    return header
+
+def _BasisMatrix(arrays, k, degree, order):
+    # Returns a BasisMatrix made from loaded arrays, without recomputing its basis functions.
+    basis = gc.BasisMatrix.__new__(gc.BasisMatrix)
+    basis.parameters = arrays['basis.{}.parameters'.format(k)]
+    basis.knotVector = arrays['basis.{}.knotVector'.format(k)]
+    basis.degree = degree
+    basis.order = order
+    basis.spans = arrays['basis.{}.spans'.format(k)]
+    basis.indices = arrays['basis.{}.indices'.format(k)]
+    basis.derivatives = arrays['basis.{}.derivatives'.format(k)]
+    basis.data = basis.derivatives[0]
+    basis.indptr = np.arange(0, basis.data.size + 1, degree + 1)
+    basis.shape = (len(basis.parameters), len(basis.knotVector) - degree - 1)
+    return basis
+
+def Load(path):
+    """
+    Returns the geometry, tessellation or array saved in a file by Save. Its arrays are read-only views of one memory map
+    of the file, so opening the file reads only its header, and array data is paged in from disk as it is used.
+    Geometry arrays are used without copying them (a geometry's homogeneous control net Pw is still built in memory
+    when it is first evaluated); assigning new control points to a loaded geometry replaces the mapped array.
+
+    Arguments:
+    path -- file name
+    """
+    header = ReadHeader(path)
+    raw = np.memmap(path, dtype=np.uint8, mode='r')
+    arrays = {}
+    for name, (dtype, shape, offset) in header['blocks'].items():
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        if offset + nbytes > len(raw):
+            raise ValueError("{} is truncated: block {} ends at byte {} of a {} byte file".format(path, name, offset + nbytes, len(raw)))
+        arrays[name] = raw[offset:offset + nbytes].view(np.ndarray).view(dtype).reshape(shape)
+    values = header['values']
+    typeName = header['type']
+    if typeName == 'ndarray':
+        return arrays['array']
+    if typeName == 'Tessellation':
+        breaks = [arrays['breaks.{}'.format(k)] for k in range(values['directions'])]
+        return gs.Tessellation(breaks, arrays['parameters'], arrays['vertices'], arrays.get('triangles'), values['deviation'], values['evaluations'])
+    cls = GEOMETRY_CLASSES[typeName]
+    geometry = cls.__new__(cls)
+    for name in cls._netAttributes + cls._basisAttributes:
+        setattr(geometry, name, arrays[name] if name in arrays else values[name])
+    if cls is ffd_lattice.FFDLattice:
+        for name in FFD_ATTRIBUTES:
+            setattr(geometry, name, arrays[name])
+        geometry.embedding = None
+        if 'embedding.points' in arrays:
+            geometry.embedding = {name: arrays['embedding.' + name] for name in EMBEDDING_ARRAYS}
+    for k, key in enumerate(header['basisMatrices']):
+        basis = _BasisMatrix(arrays, k, key['degree'], key['order'])
+        geometry.basisCache.Put((key['direction'], key['degree'], basis.knotVector.tobytes(), key['start'], key['stop'], key['N']), basis)
+    return geometry
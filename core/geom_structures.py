@@ -0,0 +1,359 @@
+import numpy as np
+from . import geom_functions as gf
+
+# Data structures that the geometry classes of geom_classes build and return: a spatial hash of sample points for
+# nearest-neighbour seeds, sparse Jacobians with respect to a control net, tessellations, power basis (Horner) patches
+# and arc length tables. They hold arrays only and depend on the geometry kernels, not on the geometry classes.
+
+class SpatialGrid:
+    """
+    Creates a uniform grid (spatial hash) over a cloud of sample points for batched nearest-neighbour queries.
+    
+    Arguments:
+    points -- array (shape = (number of points, dimension)) of Cartesian coordinates
+    cellSize -- edge length of the cubic grid cells (default gives about one cell per point along the longest axis)
+    """
+    def __init__(self, points, cellSize=None):
+        self.points = np.atleast_2d(np.asarray(points, dtype=float))
+        self.lower = self.points.min(axis=0)
+        extent = self.points.max(axis=0) - self.lower
+        if cellSize is None:
+            cellSize = max(extent.max(), np.finfo(float).eps) / max(1.0, len(self.points) ** (1 / self.points.shape[1]))
+        self.cellSize = cellSize
+        self.shape = tuple((extent // cellSize).astype(int) + 1)
+        cellIds = np.ravel_multi_index(self._Cells(self.points).T, self.shape)
+        self.order = np.argsort(cellIds, kind='stable')
+        self.cellStart = np.searchsorted(cellIds[self.order], np.arange(np.prod(self.shape) + 1))
+    
+    def _Cells(self, points):
+        # Returns the (clipped) integer grid cell of each point.
+        cells = np.floor((points - self.lower) / self.cellSize).astype(int)
+        return np.clip(cells, 0, np.array(self.shape) - 1)
+    
+    def Nearest(self, queries, maxRings=2):
+        """
+        Returns a tuple (indices, distances) of the nearest sample point to each query point.
+        Grid cells are searched in rings around each query until the nearest candidate is provably nearest;
+        queries still unresolved after maxRings rings are resolved by a brute force search.
+        
+        Arguments:
+        queries -- array (shape = (number of queries, dimension)) of Cartesian coordinates
+        maxRings -- number of rings of neighbouring cells searched before falling back to brute force (default = 2)
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=float))
+        cells = self._Cells(queries)
+        best = np.full(len(queries), np.inf)
+        bestIndex = np.full(len(queries), -1)
+        pending = np.arange(len(queries))
+        dimension = queries.shape[1]
+        for ring in range(maxRings + 1):
+            offsets = np.array(np.meshgrid(*[np.arange(-ring, ring + 1)] * dimension, indexing='ij')).reshape(dimension, -1).T
+            offsets = offsets[np.abs(offsets).max(axis=1) == ring]
+            for offset in offsets:
+                neighbours = cells[pending] + offset
+                valid = np.all((neighbours >= 0) & (neighbours < self.shape), axis=1)
+                query = pending[valid]
+                ids = np.ravel_multi_index(neighbours[valid].T, self.shape)
+                start = self.cellStart[ids]
+                count = self.cellStart[ids + 1] - start
+                for k in range(count.max(initial=0)):
+                    has = count > k
+                    candidate = self.order[start[has] + k]
+                    distance = np.linalg.norm(self.points[candidate] - queries[query[has]], axis=1)
+                    better = distance < best[query[has]]
+                    best[query[has][better]] = distance[better]
+                    bestIndex[query[has][better]] = candidate[better]
+            # every unsearched cell is at least ring * cellSize away from the query
+            pending = pending[best[pending] > ring * self.cellSize]
+            if len(pending) == 0:
+                break
+        for chunk in np.array_split(pending, max(1, len(pending) // 1024)):
+            if len(chunk):
+                distance = np.linalg.norm(queries[chunk, None, :] - self.points[None, :, :], axis=2)
+                bestIndex[chunk] = np.argmin(distance, axis=1)
+                best[chunk] = distance[np.arange(len(chunk)), bestIndex[chunk]]
+        return bestIndex, best
+
+class ControlNetJacobian:
+    """
+    Creates a sparse Jacobian of points on a geometry with respect to its (flattened) control points and weights.
+    Row i has the same non-zero columns, indices[i], for both: the derivative of point i with respect to control point
+    indices[i, j] is controlPointData[i, j] times the identity, and with respect to weight indices[i, j] it is weightData[i, j].
+    
+    Arguments:
+    indices -- array (shape = (number of points, non-zeros per row)) of flattened control point indices
+    controlPointData -- array (shape = (number of points, non-zeros per row)) of derivatives with respect to control points
+    weightData -- array (shape = (number of points, non-zeros per row, dimension)) of derivatives with respect to weights (or None)
+    nControlPoints -- total number of control points
+    dimension -- number of Cartesian coordinates of each point
+    """
+    def __init__(self, indices, controlPointData, weightData, nControlPoints, dimension):
+        self.indices = indices
+        self.controlPointData = controlPointData
+        self.weightData = weightData
+        self.nControlPoints = nControlPoints
+        self.dimension = dimension
+    
+    def Dot(self, controlPointTangents, weightTangents=None):
+        """
+        Returns an array (shape = (number of points, dimension)) of the change in each point for small changes of the
+        control points (and weights) - the forward (tangent) product of the Jacobian.
+        
+        Arguments:
+        controlPointTangents -- array (shape = (nControlPoints, dimension), or shape(controlPoints)) of control point changes
+        weightTangents -- array (nControlPoints values) of weight changes (default = None)
+        """
+        controlPointTangents = np.asarray(controlPointTangents, dtype=float)
+        controlPointTangents = controlPointTangents.reshape(self.nControlPoints, -1)
+        result = gf.SparseRowsDot(self.indices, self.controlPointData, controlPointTangents)
+        if weightTangents is not None and self.weightData is not None:
+            weightTangents = np.asarray(weightTangents, dtype=float).ravel()
+            result += np.einsum('ijk,ij->ik', self.weightData, weightTangents[self.indices])
+        return result
+    
+    def TransposeDot(self, cotangents, shape=None):
+        """
+        Returns a tuple (controlPointGradient, weightGradient) of the product of the transposed Jacobian with
+        cotangents - the reverse (adjoint) product, i.e. the gradient of sum(cotangents * points).
+        
+        Arguments:
+        cotangents -- array (shape = (number of points, dimension)) of sensitivities of an objective to each point
+        shape -- shape of the control net (without the coordinate axis) used to reshape the gradients (default = flat)
+        """
+        cotangents = np.asarray(cotangents, dtype=float)
+        shape = (self.nControlPoints,) if shape is None else tuple(shape)
+        controlPointGradient = gf.SparseRowsTransposeDot(self.indices, self.controlPointData, cotangents, self.nControlPoints)
+        weightGradient = None
+        if self.weightData is not None:
+            weightGradient = np.bincount(self.indices.ravel(), weights=np.einsum('ijk,ik->ij', self.weightData, cotangents).ravel(),
+                                         minlength=self.nControlPoints).reshape(shape)
+        return controlPointGradient.reshape(shape + cotangents.shape[1:]), weightGradient
+    
+    def ToDense(self):
+        """
+        Returns a tuple of dense arrays: the derivatives of the points with respect to the control points
+        (shape = (number of points, dimension, nControlPoints, dimension)) and with respect to the weights
+        (shape = (number of points, dimension, nControlPoints), or None).
+        """
+        nPoints = len(self.indices)
+        dense = np.zeros((nPoints, self.nControlPoints))
+        np.add.at(dense, (np.arange(nPoints)[:, None], self.indices), self.controlPointData)
+        controlPointJacobian = np.einsum('ij,ab->iajb', dense, np.eye(self.dimension))
+        weightJacobian = None
+        if self.weightData is not None:
+            weightJacobian = np.zeros((nPoints, self.dimension, self.nControlPoints))
+            np.add.at(weightJacobian, (np.arange(nPoints)[:, None], slice(None), self.indices), self.weightData)
+        return controlPointJacobian, weightJacobian
+
+class Tessellation:
+    """
+    Stores a polyline (curve) or triangle mesh (surface) approximation of a geometry on a tensor grid of parameters.
+    
+    Attributes:
+    breaks -- list of arrays of parameters in each parametric direction
+    parameters -- array (shape = (number of vertices, number of directions)) of vertex parameters (direction 1 varying fastest)
+    vertices -- array (shape = (number of vertices, dimension)) of Cartesian vertex coordinates
+    triangles -- array (shape = (number of triangles, 3)) of vertex indices, or None for a curve
+    deviation -- largest estimated chordal deviation between the geometry and the tessellation
+    evaluations -- number of geometry points evaluated to build the tessellation
+    """
+    def __init__(self, breaks, parameters, vertices, triangles, deviation, evaluations):
+        self.breaks = breaks
+        self.parameters = parameters
+        self.vertices = vertices
+        self.triangles = triangles
+        self.deviation = deviation
+        self.evaluations = evaluations
+    
+    @property
+    def nVertices(self):
+        return len(self.vertices)
+    
+    @property
+    def nTriangles(self):
+        return 0 if self.triangles is None else len(self.triangles)
+    
+    def __repr__(self):
+        return 'Tessellation(vertices={}, triangles={}, deviation={:.3g}, evaluations={})'.format(
+            self.nVertices, self.nTriangles, self.deviation, self.evaluations)
+
+class PowerBasisPatches:
+    """
+    Stores a geometry as piecewise polynomials: the homogeneous power basis coefficients of every knot span (or tensor
+    product of knot spans) in local parametric coordinates t in [0, 1], so that evaluating a point needs only a lookup
+    of its span among the breakpoints and a Horner evaluation, with no basis function recursion.
+    
+    Arguments:
+    breakpoints -- list of arrays of distinct knots bounding the spans in each parametric direction
+    coefficients -- array (shape = (spans1, ..., spansk, degree1 + 1, ..., degreek + 1, dimension + 1)) of coefficients
+    """
+    def __init__(self, breakpoints, coefficients):
+        self.breakpoints = breakpoints
+        self.coefficients = coefficients
+    
+    def EvaluateAt(self, parameters):
+        """
+        Returns an array (shape = (len(parameters), dimension)) of Cartesian coordinates at scattered parametric points.
+        
+        Arguments:
+        parameters -- array (shape = (number of points, number of directions)) of parametric coordinates
+        """
+        k = len(self.breakpoints)
+        parameters = np.asarray(parameters, dtype=float).reshape(-1, k)
+        spans, t = [], np.empty(parameters.shape)
+        for direction, breakpoints in enumerate(self.breakpoints):
+            span = np.clip(np.searchsorted(breakpoints, parameters[:, direction], side='right') - 1, 0, len(breakpoints) - 2)
+            t[:, direction] = (parameters[:, direction] - breakpoints[span]) / (breakpoints[span + 1] - breakpoints[span])
+            spans.append(span)
+        Xw = gf.HornerPowerBasis(self.coefficients[tuple(spans)], t)
+        return Xw[:, :-1] / Xw[:, -1:]
+
+class ArcLengthTable:
+    """
+    Stores the arc length of a curve as a piecewise polynomial of its parameter. On every parameter segment the speed
+    |C'(u)| is evaluated analytically at the Gauss-Legendre points and its interpolating polynomial is integrated, so the
+    length of a whole segment is its Gauss-Legendre quadrature and lengths inside it are values of the integral. The table
+    starts from segments equal parts of every knot span, and halves each segment whose halves (or whose length up to its
+    midpoint) differ from its own integral by more than tolerance times the total length. Lengths at parameters and
+    parameters at lengths are then found from the polynomials alone, without evaluating the curve, vectorised over any
+    number of points.
+    
+    Arguments:
+    knotVector -- list of parametric coords that define knot locations
+    degree -- degree of polynomial segments
+    Pw -- array (shape = (number of control points, dimension + 1)) of weighted control points (weights last)
+    segments -- number of initial table segments per knot span (default = 4)
+    points -- number of Gauss-Legendre points per segment (default = 8)
+    tolerance -- largest estimated arc length error of a segment, relative to the total length (default = 1e-12)
+    maxLevels -- largest number of times a segment is halved (default = 20)
+    """
+    def __init__(self, knotVector, degree, Pw, segments=4, points=8, tolerance=1e-12, maxLevels=20):
+        knotVector = np.asarray(knotVector, dtype=float)
+        self.points = points
+        nodes = np.polynomial.legendre.leggauss(points)[0]
+        # maps speeds at the Gauss-Legendre points to the Legendre coefficients of the polynomial interpolating them
+        interpolation = np.linalg.inv(np.polynomial.legendre.legvander(nodes, points - 1))
+        
+        def Coefficients(starts, stops):
+            # Returns the Legendre coefficients (in t in [-1, 1] across each segment) of the speed and of the length from the segment start.
+            halfWidths = (stops - starts) / 2
+            u = (starts + halfWidths)[..., None] + halfWidths[..., None] * nodes
+            speeds = gf.CurveSpeeds(u.ravel(), knotVector, degree, Pw).reshape(u.shape) @ interpolation.T
+            return speeds, np.polynomial.legendre.legint(speeds, lbnd=-1, axis=-1) * halfWidths[..., None]
+        
+        knots = np.unique(knotVector[degree:len(knotVector) - degree])
+        t = np.linspace(0, 1, segments + 1)[:-1]
+        parameters = np.append((knots[:-1, None] + np.diff(knots)[:, None] * t).ravel(), knots[-1])
+        speeds, lengths = Coefficients(parameters[:-1], parameters[1:])
+        settled = np.zeros(len(lengths), dtype=bool)
+        atMidpoint = np.polynomial.legendre.legvander(0.0, points)[0]
+        for level in range(maxLevels + 1):
+            check = np.flatnonzero(~settled)
+            if len(check) == 0:
+                break
+            midpoints = (parameters[check] + parameters[check + 1]) / 2
+            childSpeeds, childLengths = Coefficients(np.stack([parameters[check], midpoints], axis=1),
+                                                     np.stack([midpoints, parameters[check + 1]], axis=1))
+            # a Legendre series sums its coefficients at t = 1, the end of the segment
+            halves = childLengths.sum(axis=-1)
+            allowed = tolerance * lengths.sum()
+            split = ((np.abs(halves.sum(axis=1) - lengths[check].sum(axis=-1)) > allowed) |
+                     (np.abs(lengths[check] @ atMidpoint - halves[:, 0]) > allowed)) & (level < maxLevels)
+            settled[check[~split]] = True
+            if not np.any(split):
+                break
+            # split segments are replaced by their (unsettled) halves
+            split = check[split]
+            childIndex = np.searchsorted(check, split)
+            counts = np.ones(len(lengths), dtype=int)
+            counts[split] = 2
+            firsts = np.cumsum(counts) - counts
+            parameters = np.insert(parameters, split + 1, (parameters[split] + parameters[split + 1]) / 2)
+            refinedSpeeds, refinedLengths = np.repeat(speeds, counts, axis=0), np.repeat(lengths, counts, axis=0)
+            refinedSpeeds[firsts[split]], refinedSpeeds[firsts[split] + 1] = childSpeeds[childIndex, 0], childSpeeds[childIndex, 1]
+            refinedLengths[firsts[split]], refinedLengths[firsts[split] + 1] = childLengths[childIndex, 0], childLengths[childIndex, 1]
+            speeds, lengths, settled = refinedSpeeds, refinedLengths, np.repeat(settled, counts)
+        self.parameters = parameters
+        self.lengths = np.concatenate([[0.0], np.cumsum(lengths.sum(axis=-1))])
+        self._speedCoefficients = speeds
+        self._lengthCoefficients = lengths
+    
+    @property
+    def length(self):
+        # Total arc length of the curve over its parametric domain.
+        return self.lengths[-1]
+    
+    def _Local(self, segments, parameters):
+        # Returns the coordinates t in [-1, 1] of parameters across their segments.
+        lower, upper = self.parameters[segments], self.parameters[segments + 1]
+        return np.clip(2 * (parameters - lower) / (upper - lower) - 1, -1, 1)
+    
+    def _LengthsInSegments(self, segments, t):
+        return self.lengths[segments] + np.einsum('ij,ij->i', np.polynomial.legendre.legvander(t, self.points), self._lengthCoefficients[segments])
+    
+    def _SpeedsInSegments(self, segments, t):
+        return np.einsum('ij,ij->i', np.polynomial.legendre.legvander(t, self.points - 1), self._speedCoefficients[segments])
+    
+    def LengthsAt(self, parameters):
+        """
+        Returns an array of the arc lengths from the start of the parametric domain to each parameter.
+        
+        Arguments:
+        parameters -- array of parametric coordinates
+        """
+        parameters = np.asarray(parameters, dtype=float)
+        flat = parameters.reshape(-1)
+        segments = np.clip(np.searchsorted(self.parameters, flat, side='right') - 1, 0, len(self.parameters) - 2)
+        return self._LengthsInSegments(segments, self._Local(segments, flat)).reshape(parameters.shape)
+    
+    def ParametersAt(self, lengths, tolerance=1e-13, maxIterations=50):
+        """
+        Returns an array of the parameters at which the arc length from the start of the parametric domain equals each length.
+        Each parameter starts from linear interpolation in the table and is refined by Newton steps on the length polynomial
+        of its segment, bisecting whenever a step leaves the bracket (which also handles points where the speed vanishes).
+        
+        Arguments:
+        lengths -- array of arc lengths (clipped to [0, length])
+        tolerance -- largest arc length error, relative to the total length (default = 1e-13)
+        maxIterations -- maximum number of Newton steps (default = 50)
+        """
+        lengths = np.asarray(lengths, dtype=float)
+        shape = lengths.shape
+        lengths = np.clip(lengths.reshape(-1), 0, self.length)
+        segments = np.clip(np.searchsorted(self.lengths, lengths, side='right') - 1, 0, len(self.lengths) - 2)
+        segmentLengths = self.lengths[segments + 1] - self.lengths[segments]
+        fractions = (lengths - self.lengths[segments]) / np.where(segmentLengths > 0, segmentLengths, np.inf)
+        t, lower, upper = 2 * fractions - 1, -np.ones(len(lengths)), np.ones(len(lengths))
+        active = np.arange(len(lengths))
+        for iteration in range(maxIterations):
+            residuals = self._LengthsInSegments(segments[active], t[active]) - lengths[active]
+            unconverged = np.abs(residuals) > tolerance * self.length
+            active, residuals = active[unconverged], residuals[unconverged]
+            if len(active) == 0:
+                break
+            lower[active] = np.where(residuals < 0, t[active], lower[active])
+            upper[active] = np.where(residuals > 0, t[active], upper[active])
+            # dlength/dt = speed * (segment width) / 2
+            slopes = self._SpeedsInSegments(segments[active], t[active]) * np.diff(self.parameters)[segments[active]] / 2
+            steps = t[active] - residuals / np.where(slopes > 0, slopes, np.inf)
+            inside = (steps > lower[active]) & (steps < upper[active])
+            t[active] = np.where(inside, steps, (lower[active] + upper[active]) / 2)
+        lower, upper = self.parameters[segments], self.parameters[segments + 1]
+        return (lower + (upper - lower) * (t + 1) / 2).reshape(shape)
+    
+    def UniformParameters(self, N, start=None, stop=None):
+        """
+        Returns an array of N parameters between start and stop that are equally spaced in arc length.
+        
+        Arguments:
+        N -- number of parameters
+        start -- first parameter (default = start of the parametric domain)
+        stop -- last parameter (default = end of the parametric domain)
+        """
+        start = self.parameters[0] if start is None else float(start)
+        stop = self.parameters[-1] if stop is None else float(stop)
+        first, last = self.LengthsAt(np.array([start, stop]))
+        parameters = self.ParametersAt(np.linspace(first, last, N))
+        if N > 1:
+            parameters[0], parameters[-1] = start, stop
+        return parameters
@@ -0,0 +1,201 @@
+import contextlib
+import inspect
+import threading
+import time
+from . import geom_functions as gf
+from . import geom_classes as gc
+from . import ffd_lattice
+# imported before any kernel is wrapped, so that backends records the unwrapped NumPy kernels
+from . import backends
+
+# Opt-in instrumentation of the geometry kernels and class methods. Enable() replaces every public function of
+# geom_functions and every public method of the geometry classes by a wrapper that counts calls and accumulates time;
+# Disable() puts the original functions back, so instrumentation costs nothing while it is disabled.
+# Kernel times are inclusive (a kernel that calls another kernel includes its time). Kernel calls are also attributed
+# to the outermost instrumented method running in the same thread, e.g. 'NURBSSurface.Evaluate'.
+
+CLASSES = (gc.BSplineCurve, gc.NURBSCurve, gc.NURBSSurface, gc.NURBSVolume, ffd_lattice.FFDLattice)
+
+_lock = threading.Lock()
+_local = threading.local()
+_enabled = False
+# (owner, name, original, wrapper, owner had its own attribute) for every replaced attribute
+_patches = []
+_kernels = {}
+_methods = {}
+_caches = {}
+
+def Reset():
+    # Clears all counters and timers.
+    with _lock:
+        _kernels.clear()
+        _methods.clear()
+        _caches.clear()
+        _caches['basisMatrix'] = {'hits': 0, 'misses': 0}
+        _caches['Pw'] = {'hits': 0, 'misses': 0}
+
+Reset()
+
+def IsEnabled():
+    return _enabled
+
+def _KernelWrapper(name, function):
+    def Wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            method = getattr(_local, 'method', None)
+            with _lock:
+                record = _kernels.setdefault(name, {'calls': 0, 'seconds': 0.0})
+                record['calls'] += 1
+                record['seconds'] += elapsed
+                if method in _methods:
+                    kernelCalls = _methods[method]['kernelCalls']
+                    kernelCalls[name] = kernelCalls.get(name, 0) + 1
+    Wrapper.__wrapped__ = function
+    Wrapper.__name__ = function.__name__
+    Wrapper.__doc__ = function.__doc__
+    return Wrapper
+
+def _MethodWrapper(name, function):
+    def Wrapper(*args, **kwargs):
+        outermost = getattr(_local, 'method', None) is None
+        if outermost:
+            with _lock:
+                _methods.setdefault(name, {'calls': 0, 'seconds': 0.0, 'kernelCalls': {}})
+            _local.method = name
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            if outermost:
+                _local.method = None
+                with _lock:
+                    _methods[name]['calls'] += 1
+                    _methods[name]['seconds'] += elapsed
+    Wrapper.__wrapped__ = function
+    Wrapper.__name__ = function.__name__
+    Wrapper.__doc__ = function.__doc__
+    return Wrapper
+
+def _CountedGet(function):
+    def Get(self, key, *args, **kwargs):
+        hits = self.hits
+        try:
+            return function(self, key, *args, **kwargs)
+        finally:
+            with _lock:
+                _caches['basisMatrix']['hits' if self.hits > hits else 'misses'] += 1
+    Get.__wrapped__ = function
+    return Get
+
+def _CountedPw(getter):
+    def Pw(self):
+        hit = getattr(self, '_PwVersion', None) == getattr(self, 'netVersion', None)
+        with _lock:
+            _caches['Pw']['hits' if hit else 'misses'] += 1
+        return getter(self)
+    return property(Pw)
+
+def _Patch(owner, name, wrapper):
+    # Replaces an attribute of a module or class, remembering how to undo it.
+    if isinstance(owner, type):
+        original, ownAttribute = owner.__dict__.get(name), name in owner.__dict__
+    else:
+        original, ownAttribute = getattr(owner, name), True
+    _patches.append((owner, name, original, wrapper, ownAttribute))
+    setattr(owner, name, wrapper)
+
+def Enable():
+    # Starts counting calls and time in the geometry kernels and methods (counters keep running totals until Reset).
+    global _enabled
+    if _enabled:
+        return
+    for name, function in list(vars(gf).items()):
+        if inspect.isfunction(function) and not name.startswith('_'):
+            _Patch(gf, name, _KernelWrapper(name, function))
+    for cls in CLASSES:
+        for name in dir(cls):
+            if name.startswith('_'):
+                continue
+            # methods inherited from a class patched earlier are wrapped once, under this class's name
+            function = inspect.getattr_static(cls, name)
+            function = getattr(function, '__wrapped__', function)
+            if inspect.isfunction(function):
+                _Patch(cls, name, _MethodWrapper('{}.{}'.format(cls.__name__, name), function))
+    _Patch(gc.BasisMatrixCache, 'Get', _CountedGet(gc.BasisMatrixCache.Get))
+    _Patch(gc._GeometryCacheMixin, 'Pw', _CountedPw(gc._GeometryCacheMixin.Pw.fget))
+    _enabled = True
+
+def Disable():
+    # Stops counting and restores the original functions; counters are kept until Reset.
+    global _enabled
+    while _patches:
+        owner, name, original, wrapper, ownAttribute = _patches.pop()
+        if isinstance(owner, type):
+            if inspect.getattr_static(owner, name) is not wrapper:
+                continue
+            if ownAttribute:
+                setattr(owner, name, original)
+            else:
+                delattr(owner, name)
+        elif getattr(owner, name) is wrapper:
+            # a kernel backend selected while instrumented has already replaced the wrapper
+            setattr(owner, name, original)
+    _enabled = False
+
+def Report():
+    """
+    Returns a dictionary of the counters so far:
+    'kernels' -- {kernel name: {'calls', 'seconds'}}
+    'methods' -- {'Class.Method': {'calls', 'seconds', 'kernelCalls': {kernel name: calls}, 'kernelCallsPerCall': {...}}}
+    'caches' -- {'basisMatrix' or 'Pw': {'hits', 'misses', 'hitRate'}}
+    """
+    with _lock:
+        kernels = {name: dict(record) for name, record in _kernels.items()}
+        methods = {}
+        for name, record in _methods.items():
+            methods[name] = {'calls': record['calls'], 'seconds': record['seconds'], 'kernelCalls': dict(record['kernelCalls']),
+                             'kernelCallsPerCall': {kernel: calls / max(record['calls'], 1) for kernel, calls in record['kernelCalls'].items()}}
+        caches = {}
+        for name, record in _caches.items():
+            total = record['hits'] + record['misses']
+            caches[name] = {'hits': record['hits'], 'misses': record['misses'], 'hitRate': record['hits'] / total if total else None}
+    return {'kernels': kernels, 'methods': methods, 'caches': caches}
+
+def FormatReport(report):
+    # Returns a report from Report() as a text table, slowest kernels and methods first.
+    lines = ['{:40s} {:>10s} {:>12s}'.format('kernel', 'calls', 'seconds')]
+    for name, record in sorted(report['kernels'].items(), key=lambda item: -item[1]['seconds']):
+        lines.append('{:40s} {:10d} {:12.6f}'.format(name, record['calls'], record['seconds']))
+    lines.append('{:40s} {:>10s} {:>12s}  {}'.format('method', 'calls', 'seconds', 'kernel calls per call'))
+    for name, record in sorted(report['methods'].items(), key=lambda item: -item[1]['seconds']):
+        perCall = ', '.join('{} {:g}'.format(kernel, calls) for kernel, calls in sorted(record['kernelCallsPerCall'].items()))
+        lines.append('{:40s} {:10d} {:12.6f}  {}'.format(name, record['calls'], record['seconds'], perCall))
+    for name, record in report['caches'].items():
+        hitRate = 'n/a' if record['hitRate'] is None else '{:.1%}'.format(record['hitRate'])
+        lines.append('{} cache: {} hits, {} misses, hit rate {}'.format(name, record['hits'], record['misses'], hitRate))
+    return '\n'.join(lines)
+
+@contextlib.contextmanager
+def Profile():
+    """
+    Context manager that instruments the code inside it and fills the dictionary it returns with Report() on exit:
+
+    with instrumentation.Profile() as report:
+        surface.Evaluate(N1=500, N2=500)
+    print(instrumentation.FormatReport(report))
+    """
+    wasEnabled = _enabled
+    Reset()
+    Enable()
+    report = {}
+    try:
+        yield report
+    finally:
+        report.update(Report())
+        if not wasEnabled:
+            Disable()
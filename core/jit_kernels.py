@@ -0,0 +1,197 @@
+import numpy as np
+import numba
+
+# JIT-compiled versions of the batched kernels in geom_functions, with the same signatures and results.
+# Each kernel loops over points and allocates its work arrays once per call, not once per point.
+# This module imports numba, so it is only imported (by backends.SetBackend('numba')) when numba is installed.
+
+@numba.njit(cache=True)
+def _FindSpans(degree, parameters, knotVector, spans):
+    n = len(knotVector) - degree - 2
+    for i in range(len(parameters)):
+        u = parameters[i]
+        if u >= knotVector[n + 1]:
+            spans[i] = n
+            continue
+        # knotVector[low] <= u < knotVector[high], searching for knotVector[span] <= u < knotVector[span+1]
+        low = degree
+        high = n + 1
+        while high - low > 1:
+            mid = (low + high) // 2
+            if u < knotVector[mid]:
+                high = mid
+            else:
+                low = mid
+        spans[i] = low
+
+@numba.njit(cache=True)
+def _BSplineBasisFuns(spans, parameters, degree, knotVector, B):
+    left = np.empty(degree + 1)
+    right = np.empty(degree + 1)
+    for i in range(len(parameters)):
+        u = parameters[i]
+        span = spans[i]
+        B[i, 0] = 1.0
+        for j in range(1, degree + 1):
+            left[j] = u - knotVector[span + 1 - j]
+            right[j] = knotVector[span + j] - u
+            saved = 0.0
+            for r in range(j):
+                temp = B[i, r] / (right[r + 1] + left[j - r])
+                B[i, r] = saved + right[r + 1] * temp
+                saved = left[j - r] * temp
+            B[i, j] = saved
+
+@numba.njit(cache=True)
+def _DersBasisFuns(spans, parameters, degree, n, knotVector, ders):
+    ndu = np.empty((degree + 1, degree + 1))
+    a = np.empty((2, degree + 1))
+    left = np.empty(degree + 1)
+    right = np.empty(degree + 1)
+    for i in range(len(parameters)):
+        u = parameters[i]
+        span = spans[i]
+        ndu[0, 0] = 1.0
+        for j in range(1, degree + 1):
+            left[j] = u - knotVector[span + 1 - j]
+            right[j] = knotVector[span + j] - u
+            saved = 0.0
+            for r in range(j):
+                ndu[j, r] = right[r + 1] + left[j - r]
+                temp = ndu[r, j - 1] / ndu[j, r]
+                ndu[r, j] = saved + right[r + 1] * temp
+                saved = left[j - r] * temp
+            ndu[j, j] = saved
+        for j in range(degree + 1):
+            ders[0, i, j] = ndu[j, degree]
+        for r in range(degree + 1):
+            s1 = 0
+            s2 = 1
+            a[0, 0] = 1.0
+            for k in range(1, min(n, degree) + 1):
+                d = 0.0
+                rk = r - k
+                pk = degree - k
+                if r >= k:
+                    a[s2, 0] = a[s1, 0] / ndu[pk + 1, rk]
+                    d = a[s2, 0] * ndu[rk, pk]
+                j1 = 1 if rk >= -1 else -rk
+                j2 = k - 1 if r - 1 <= pk else degree - r
+                for j in range(j1, j2 + 1):
+                    a[s2, j] = (a[s1, j] - a[s1, j - 1]) / ndu[pk + 1, rk + j]
+                    d += a[s2, j] * ndu[rk + j, pk]
+                if r <= pk:
+                    a[s2, k] = -a[s1, k - 1] / ndu[pk + 1, r]
+                    d += a[s2, k] * ndu[r, pk]
+                ders[k, i, r] = d
+                s1, s2 = s2, s1
+        factor = degree
+        for k in range(1, min(n, degree) + 1):
+            for j in range(degree + 1):
+                ders[k, i, j] *= factor
+            factor *= degree - k
+
+@numba.njit(cache=True)
+def _SparseRowsDot(indices, data, values, result):
+    for i in range(data.shape[0]):
+        for k in range(values.shape[1]):
+            result[i, k] = 0.0
+        for j in range(data.shape[1]):
+            weight = data[i, j]
+            row = indices[i, j]
+            for k in range(values.shape[1]):
+                result[i, k] += weight * values[row, k]
+
+@numba.njit(cache=True)
+def _SparseBasisDot(firstColumns, B, values, result):
+    for i in range(B.shape[0]):
+        for k in range(values.shape[1]):
+            result[i, k] = 0.0
+        for j in range(B.shape[1]):
+            weight = B[i, j]
+            row = firstColumns[i] + j
+            for k in range(values.shape[1]):
+                result[i, k] += weight * values[row, k]
+
+def FindSpans(degree, parameters, knotVector):
+    # JIT version of geom_functions.FindSpans (algorithm A2.1): a binary search per parameter.
+    parameters = np.asarray(parameters, dtype=float)
+    knotVector = np.ascontiguousarray(knotVector, dtype=float)
+    outOfRange = (parameters < knotVector[0]) | (parameters > knotVector[-1])
+    if np.any(outOfRange):
+        parameter = parameters[outOfRange].flat[0]
+        raise IndexError("parameter == {} out of range: [{}, {}]".format(parameter, knotVector[0], knotVector[-1]))
+    spans = np.empty(parameters.shape, dtype=np.intp)
+    _FindSpans(degree, np.ascontiguousarray(parameters).reshape(-1), knotVector, spans.reshape(-1))
+    return spans
+
+def BSplineBasisFunsBatch(spans, parameters, degree, knotVector):
+    # JIT version of geom_functions.BSplineBasisFunsBatch (algorithm A2.2).
+    parameters = np.ascontiguousarray(parameters, dtype=float)
+    B = np.empty((len(parameters), degree + 1))
+    _BSplineBasisFuns(np.ascontiguousarray(spans, dtype=np.intp), parameters, degree, np.ascontiguousarray(knotVector, dtype=float), B)
+    return B
+
+def DersBasisFunsBatch(spans, parameters, degree, n, knotVector):
+    # JIT version of geom_functions.DersBasisFunsBatch (algorithm A2.3).
+    parameters = np.ascontiguousarray(parameters, dtype=float)
+    ders = np.zeros((n + 1, len(parameters), degree + 1))
+    _DersBasisFuns(np.ascontiguousarray(spans, dtype=np.intp), parameters, degree, n, np.ascontiguousarray(knotVector, dtype=float), ders)
+    return ders
+
+def _ResultType(data, controlNet):
+    # Returns float32 if both operands are float32 (the kernels are compiled for each precision), float64 otherwise.
+    return np.result_type(data, controlNet, np.float32)
+
+def SparseRowsDot(indices, data, controlNet):
+    # JIT version of geom_functions.SparseRowsDot.
+    controlNet = np.asarray(controlNet)
+    dtype = _ResultType(data, controlNet)
+    values = np.ascontiguousarray(controlNet.reshape(len(controlNet), -1), dtype=dtype)
+    result = np.empty((len(data), values.shape[1]), dtype=dtype)
+    _SparseRowsDot(np.ascontiguousarray(indices, dtype=np.intp), np.ascontiguousarray(data, dtype=dtype), values, result)
+    return result.reshape((len(data),) + controlNet.shape[1:])
+
+def SparseBasisDot(firstColumns, B, controlNet):
+    # JIT version of geom_functions.SparseBasisDot.
+    controlNet = np.asarray(controlNet)
+    dtype = _ResultType(B, controlNet)
+    values = np.ascontiguousarray(controlNet.reshape(len(controlNet), -1), dtype=dtype)
+    result = np.empty((len(B), values.shape[1]), dtype=dtype)
+    _SparseBasisDot(np.ascontiguousarray(firstColumns, dtype=np.intp), np.ascontiguousarray(B, dtype=dtype), values, result)
+    return result.reshape((len(B),) + controlNet.shape[1:])
+
+@numba.njit(cache=True)
+def _SolveBanded(lower, upper, ab, x):
+    # Returns the column of the first zero pivot met during elimination, or -1 once x holds the solution.
+    n = ab.shape[1]
+    for j in range(n):
+        pivot = ab[upper, j]
+        if pivot == 0.0 or not np.isfinite(pivot):
+            return j
+        for r in range(1, min(lower, n - 1 - j) + 1):
+            multiplier = ab[upper + r, j] / pivot
+            if multiplier == 0.0:
+                continue
+            for c in range(1, min(upper, n - 1 - j) + 1):
+                ab[upper + r - c, j + c] -= multiplier * ab[upper - c, j + c]
+            for k in range(x.shape[1]):
+                x[j + r, k] -= multiplier * x[j, k]
+    for j in range(n - 1, -1, -1):
+        for c in range(1, min(upper, n - 1 - j) + 1):
+            for k in range(x.shape[1]):
+                x[j, k] -= ab[upper - c, j + c] * x[j + c, k]
+        for k in range(x.shape[1]):
+            x[j, k] /= ab[upper, j]
+    return -1
+
+def SolveBanded(lower, upper, bands, rhs, blockSize=None):
+    # JIT version of geom_functions.SolveBanded: Gaussian elimination without pivoting on the band storage.
+    # blockSize is accepted for the same signature and ignored: the elimination is row by row, not in blocks.
+    rhs = np.asarray(rhs, dtype=float)
+    ab = np.array(bands, dtype=float)
+    x = np.ascontiguousarray(rhs.reshape(len(rhs), -1)).copy()
+    column = _SolveBanded(lower, upper, ab, x)
+    if column >= 0:
+        raise np.linalg.LinAlgError("zero pivot in column {} of the banded matrix".format(column))
+    return x.reshape(rhs.shape)
@@ -0,0 +1,121 @@
+import itertools
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from . import geom_functions as gf
+
+# state of a process pool worker, set once per worker by _InitialiseWorker
+_worker = {}
+
+def TileBounds(shape, tile):
+    """
+    Returns a list of tuples of slices that split the leading axes of an array into tiles.
+
+    Arguments:
+    shape -- shape of the array
+    tile -- list of tile sizes, one for each leading axis to split
+    """
+    ranges = [[slice(start, min(start + size, n)) for start in range(0, n, size)] for n, size in zip(shape, tile)]
+    return list(itertools.product(*ranges))
+
+def EvaluateTile(Pw, bases, output, bounds):
+    """
+    Evaluates one tile of a tensor-product grid and writes its Cartesian coordinates into output[bounds].
+    The grid axes of output are in reverse order of the parametric directions (e.g. (N2, N1, dimension) for a surface).
+
+    Arguments:
+    Pw -- array (shape = (n1, n2, ..., dimension + 1)) of weighted control points
+    bases -- list of (firstColumns, B) pairs of sparse basis matrices (see gf.SparseBasisDot), one per parametric direction
+    output -- array (shape = (..., N2, N1, dimension)) the tile is written into
+    bounds -- tuple of slices selecting the tile along the leading axes of output
+    """
+    k = len(bases)
+    tileBases = list(bases)
+    for axis, bound in enumerate(bounds):
+        firstColumns, B = bases[k - 1 - axis]
+        tileBases[k - 1 - axis] = (firstColumns[bound], B[bound])
+    result = Pw
+    for direction, (firstColumns, B) in enumerate(tileBases):
+        result = gf.SparseBasisDot(firstColumns, B, np.moveaxis(result, direction, 0))
+    output[bounds] = result[..., :-1] / result[..., -1:]
+
+def _InitialiseWorker(name, shape, Pw, bases):
+    # Attaches a process pool worker to the shared output array; called once per worker. Pool workers share the
+    # parent's resource tracker, so attaching here does not hand the block's lifetime to the worker.
+    _worker['shm'] = shared_memory.SharedMemory(name=name)
+    _worker['output'] = np.ndarray(shape, dtype=Pw.dtype, buffer=_worker['shm'].buf)
+    _worker['Pw'] = Pw
+    _worker['bases'] = bases
+
+def _EvaluateTileInWorker(bounds):
+    EvaluateTile(_worker['Pw'], _worker['bases'], _worker['output'], bounds)
+
+def _ReleaseSharedMemory(shm):
+    try:
+        shm.close()
+    except BufferError:
+        # still mapped by an array alive at interpreter exit; the mapping goes with the process
+        pass
+    shm.unlink()
+
+def EvaluateTiled(Pw, bases, tile=None, workers=None, backend='thread'):
+    """
+    Returns an array (shape = (..., N2, N1, dimension)) of Cartesian coordinates on a tensor-product grid, evaluated
+    tile by tile on a pool of workers. Every tile is written straight into one preallocated output array (shared memory
+    for the process backend), so no per-tile results are pickled or copied. The output has the dtype of Pw, so a float32
+    net (with float32 basis functions) halves the memory the workers write.
+
+    Arguments:
+    Pw -- array (shape = (n1, n2, ..., dimension + 1)) of weighted control points
+    bases -- list of (firstColumns, B) pairs of sparse basis matrices (see gf.SparseBasisDot), one per parametric direction
+    tile -- list of tile sizes along the leading grid axes (default = the first axis split into 4 tiles per worker)
+    workers -- number of workers (default = os.cpu_count())
+    backend -- 'thread' for a thread pool (NumPy releases the GIL in the contractions) or 'process' for a process pool
+    """
+    shape = tuple(len(B) for firstColumns, B in reversed(bases)) + (Pw.shape[-1] - 1,)
+    workers = workers or os.cpu_count()
+    if tile is None:
+        tile = (max(1, -(-shape[0] // (4 * workers))),)
+    bounds = TileBounds(shape, tile)
+    if backend == 'thread':
+        output = np.empty(shape, dtype=Pw.dtype)
+        with ThreadPoolExecutor(workers) as pool:
+            list(pool.map(lambda b: EvaluateTile(Pw, bases, output, b), bounds))
+        return output
+    if backend == 'process':
+        nbytes = max(1, int(np.prod(shape)) * Pw.dtype.itemsize)
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        try:
+            with ProcessPoolExecutor(workers, initializer=_InitialiseWorker, initargs=(shm.name, shape, Pw, bases)) as pool:
+                list(pool.map(_EvaluateTileInWorker, bounds, chunksize=max(1, len(bounds) // (4 * workers))))
+        except BaseException:
+            _ReleaseSharedMemory(shm)
+            raise
+        output = np.ndarray(shape, dtype=Pw.dtype, buffer=shm.buf)
+        # the shared memory block lives exactly as long as the returned array
+        weakref.finalize(output, _ReleaseSharedMemory, shm)
+        return output
+    raise ValueError("backend == {} is not 'thread' or 'process'".format(backend))
+
+def SparseRowsDotChunked(indices, data, controlNet, workers=None, chunkRows=65536):
+    """
+    Returns the same product as gf.SparseRowsDot, computed in blocks of rows on a thread pool and written into one
+    preallocated output array.
+
+    Arguments:
+    indices -- array (shape = (number of rows, non-zeros per row)) of column indices
+    data -- array (shape = (number of rows, non-zeros per row)) of non-zero values
+    controlNet -- array of control points (or displacements), indexed by (flattened) control point along the first axis
+    workers -- number of threads (default = os.cpu_count())
+    chunkRows -- number of rows per block (default = 65536)
+    """
+    controlNet = np.asarray(controlNet)
+    output = np.empty((len(data),) + controlNet.shape[1:], dtype=np.result_type(data, controlNet))
+    def Chunk(start):
+        stop = min(start + chunkRows, len(data))
+        output[start:stop] = gf.SparseRowsDot(indices[start:stop], data[start:stop], controlNet)
+    with ThreadPoolExecutor(workers or os.cpu_count()) as pool:
+        list(pool.map(Chunk, range(0, len(data), chunkRows)))
+    return output
@@ -1,163 +1,182 @@
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
 import numpy as np
-import geom_functions as gf
-import geom_classes as gc
+from . import geom_functions as gf
+from . import geom_classes as gc
+
+# Plots take evaluated points as dense arrays and draw them with one matplotlib call per artist. Plots with more
+# points than maxPoints (curves) or grid lines than maxLines (surfaces) are decimated to that level of detail, and
+# plots given a filename are drawn on a figure without a window (no pyplot state), so they render on headless servers.
+# matplotlib is imported by the first plot, not by importing this module, and pyplot only by plots shown in a window.
+
+def _DecimationIndices(n, maxCount):
+    # Returns about maxCount evenly spread indices into range(n), always including the first and last.
+    if maxCount is None or n <= maxCount:
+        return slice(None)
+    return np.unique(np.linspace(0, n - 1, max(maxCount, 2)).round().astype(int))
+
+def _Figure(filename, figure=None):
+    # Returns the figure to draw on: the given one (cleared), a window-less figure when saving to a file, or a pyplot figure.
+    # importing mplot3d registers the '3d' projection
+    import mpl_toolkits.mplot3d
+    if figure is not None:
+        figure.clear()
+        return figure
+    if filename is not None:
+        from matplotlib.figure import Figure
+        return Figure()
+    import matplotlib.pyplot as plt
+    return plt.figure()
+
+def _Finish(figure, filename, dpi):
+    # Saves the figure to filename, or shows it if there is no filename.
+    if filename is not None:
+        figure.savefig(filename, dpi=dpi)
+    else:
+        import matplotlib.pyplot as plt
+        plt.show()
 
 def CurvePlot(curve, showControlPoints=True, showKnots=True, showControlPolygon=True, dimension='3D', N=100, **kwargs):
     """
     Produces a plot of a given curve.
-    
+
     Arguments & Keyword Arguments:
     curve -- a curve object defined by a class from geom_classes.py
     showControlPoints -- option to plot control points (default = True)
     showKnots -- option to plot knots (default = True)
     showControlPolygon -- option to plot control polygon (default = True)
     dimension -- dimension of plot (either '2D' or '3D', default = '3D')
-    N -- number of points evaluated along curve (deafult = 100)
+    N -- number of points evaluated along curve, reduced to maxPoints (default = 100)
+    start, stop -- parametric range plotted (default = the parametric domain)
+    points -- array (shape = (number of points, dimension)) of already evaluated curve points to plot instead (default = None)
+    maxPoints -- largest number of curve points drawn; longer arrays are decimated (default = 10000)
+    filename -- image file the plot is saved to, without opening a window (default = show the plot)
+    dpi -- resolution of the saved image (default = 100)
+    figure -- matplotlib figure to clear and draw on (default = a new figure)
     """
-    start = kwargs.get('start', curve.knotVector[curve.degree])
-    stop = kwargs.get('stop', curve.knotVector[-(curve.degree + 1)])
-    curvePoints = curve.Evaluate(start=start, stop=stop, N=N)
-    
-    # evaluting points along the curve
-    curvePointXs, curvePointYs = [], []
-    for i in range(len(curvePoints)):
-        curvePointXs.append(curvePoints[i][0])
-        curvePointYs.append(curvePoints[i][1])
-    
+    if dimension not in ('2D', '3D'):
+        raise ValueError("dimension == {} is not '2D' or '3D'".format(dimension))
+    k = 2 if dimension == '2D' else 3
+    maxPoints = kwargs.get('maxPoints', 10000)
+    curvePoints = kwargs.get('points')
+    if curvePoints is None:
+        start = kwargs.get('start', curve.knotVector[curve.degree])
+        stop = kwargs.get('stop', curve.knotVector[-(curve.degree + 1)])
+        # evaluate no more points than are drawn
+        if maxPoints is not None:
+            N = min(N, max(maxPoints, 2))
+        curvePoints = curve.Evaluate(start=start, stop=stop, N=N)
+    curvePoints = np.asarray(curvePoints)[_DecimationIndices(len(curvePoints), maxPoints), :k]
+
     # plot curve
-    fig = plt.figure()
-    if dimension == '2D':
-        plt.axes()
-        plt.plot(curvePointXs, curvePointYs,'k', label='Curve')
-    elif dimension == '3D':
-        curvePointZs = [curvePoints[i][2] for i in range(len(curvePoints))]
-        ax = plt.axes(projection='3d')
-        ax.plot(curvePointXs, curvePointYs, curvePointZs, 'k', label='Curve')
-    else:
-        print('Invalid plot dimension specified.')
-    
+    filename = kwargs.get('filename')
+    fig = _Figure(filename, kwargs.get('figure'))
+    ax = fig.add_subplot(projection=None if k == 2 else '3d')
+    ax.plot(*curvePoints.T, 'k', label='Curve')
+
+    controlPoints = curve.controlPoints[:, :k]
     # plot control points if desired
-    if showControlPoints == True:
-        controlPointXs, controlPointYs = [], []
-        for i in range(len(curve.controlPoints)):
-            controlPointXs.append(curve.controlPoints[i][0])
-            controlPointYs.append(curve.controlPoints[i][1])
-        if dimension == '2D':
-            plt.plot(controlPointXs, controlPointYs, 'ro', label='Control Points')
-            
-        elif dimension == '3D':
-            controlPointZs = [curve.controlPoints[i][2] for i in range(len(curve.controlPoints))]
-            ax.plot(controlPointXs, controlPointYs, controlPointZs, 'ro', label='Control Points')
-            
+    if showControlPoints:
+        ax.plot(*controlPoints.T, 'ro', label='Control Points')
+
     # plot control polygon if desired
-    if showControlPolygon == True:
-        if dimension == '2D':
-            plt.plot(controlPointXs, controlPointYs, 'b-', alpha=0.3, label='Control Polygon')
-        if dimension == '3D':
-            ax.plot(controlPointXs, controlPointYs, controlPointZs, 'b-', alpha=0.3, label='Control Polygon')
-    
+    if showControlPolygon:
+        ax.plot(*controlPoints.T, 'b-', alpha=0.3, label='Control Polygon')
+
     # plot knots if desired
-    if showKnots == True:
-        knotLocations = curve.KnotLocations()
-        knotXs, knotYs = [], []
-        for i in range(len(knotLocations)):
-            knotXs.append(knotLocations[i][0])
-            knotYs.append(knotLocations[i][1])
-        if dimension == '2D':
-            plt.plot(knotXs, knotYs, 'gx', label='Knots')
-        elif dimension == '3D':
-            knotZs = [knotLocations[i][2] for i in range(len(knotLocations))]
-            ax.plot(knotXs, knotYs, knotZs, 'gx', label='Knots')
-    
-    if dimension == '2D':
-        plt.xlabel('$x$')
-        plt.ylabel('$y$')
-        plt.axis('equal')
-        plt.grid()
-    elif dimension == '3D':
-        ax.set_xlabel("$x$")
-        ax.set_ylabel("$y$")
-        ax.set_zlabel("$z$")
-    
-    plt.legend()
-    plt.show()
+    if showKnots:
+        ax.plot(*curve.KnotLocations()[:, :k].T, 'gx', label='Knots')
+
+    ax.set_xlabel('$x$')
+    ax.set_ylabel('$y$')
+    if k == 2:
+        ax.axis('equal')
+        ax.grid()
+    else:
+        ax.set_zlabel('$z$')
+
+    ax.legend()
+    _Finish(fig, filename, kwargs.get('dpi', 100))
+    return fig
 
 def SurfacePlot(surface, showControlPoints=True, showKnots=True, showControlPolygon=True, N1=50, N2=50, **kwargs):
     """
     Produces a plot of a given surface.
-    
+
     Arguments & Keyword Arguments:
     surface -- a surface object defined by a class from geom_classes.py
     showControlPoints -- option to plot control points (default = True)
     showKnots -- option to plot knots (default = True)
     showControlPolygon -- option to plot control polygon (default = True)
-    dimension -- dimension of plot (either '2D' or '3D', default = '3D')
-    N1 -- number of points evaluated along surface in direction 1 (deafult = 50)
-    N2 -- number of points evaluated along surface in direction 2 (deafult = 50)
+    N1 -- number of points evaluated along surface in direction 1, reduced to maxLines (default = 50)
+    N2 -- number of points evaluated along surface in direction 2, reduced to maxLines (default = 50)
+    start1, stop1, start2, stop2 -- parametric range plotted (default = the parametric domain)
+    points -- array (shape = (N2, N1, 3)) of already evaluated surface points to plot instead (default = None)
+    maxLines -- largest number of wireframe lines drawn in each direction; larger grids are decimated (default = 100)
+    filename -- image file the plot is saved to, without opening a window (default = show the plot)
+    dpi -- resolution of the saved image (default = 100)
+    figure -- matplotlib figure to clear and draw on (default = a new figure)
+    """
+    maxLines = kwargs.get('maxLines', 100)
+    surfacePoints = kwargs.get('points')
+    if surfacePoints is None:
+        start1 = kwargs.get('start1', surface.knotVector1[surface.degree1])
+        stop1 = kwargs.get('stop1', surface.knotVector1[-(surface.degree1 + 1)])
+
+        start2 = kwargs.get('start2', surface.knotVector2[surface.degree2])
+        stop2 = kwargs.get('stop2', surface.knotVector2[-(surface.degree2 + 1)])
+
+        # evaluate no more grid lines than are drawn
+        if maxLines is not None:
+            N1, N2 = min(N1, max(maxLines, 2)), min(N2, max(maxLines, 2))
+        surfacePoints = surface.Evaluate(start1=start1, stop1=stop1, N1=N1, start2=start2, stop2=stop2, N2=N2)
+    surfacePoints = np.asarray(surfacePoints)
+    rows, columns = _DecimationIndices(surfacePoints.shape[0], maxLines), _DecimationIndices(surfacePoints.shape[1], maxLines)
+    surfacePoints = surfacePoints[rows][:, columns]
+
+    filename = kwargs.get('filename')
+    fig = _Figure(filename, kwargs.get('figure'))
+    ax = fig.add_subplot(projection='3d')
+    ax.plot_wireframe(surfacePoints[..., 0], surfacePoints[..., 1], surfacePoints[..., 2], rstride=1, cstride=1, color='black', label='Surface')
+
+    controlPoints = surface.controlPoints
+    if showControlPoints:
+        ax.scatter3D(*controlPoints.reshape(-1, 3).T, color='red', label='Control Points')
+
+    if showControlPolygon:
+        # control polygons in directions 1 and 2, drawn as one collection of lines
+        from mpl_toolkits.mplot3d.art3d import Line3DCollection
+        lines = list(controlPoints) + list(controlPoints.transpose(1, 0, 2))
+        ax.add_collection3d(Line3DCollection(lines, colors='blue', alpha=0.3, label='Control Polygon'))
+
+    if showKnots:
+        ax.plot(*surface.KnotLocations().T, 'gx', label='Knots')
+
+    ax.set_xlabel('$x$')
+    ax.set_ylabel('$y$')
+    ax.set_zlabel('$z$')
+    ax.legend()
+    _Finish(fig, filename, kwargs.get('dpi', 100))
+    return fig
+
+def RenderToFiles(geometries, filenames, **kwargs):
+    """
+    Renders many curves and surfaces to image files without opening any window, reusing one figure.
+
+    Arguments:
+    geometries -- list of curve and surface objects defined by classes from geom_classes.py
+    filenames -- list of image file names, one per geometry (the extension selects the format, e.g. '.png' or '.svg')
+
+    Keyword arguments:
+    any keyword argument of CurvePlot (for curves) or SurfacePlot (for surfaces), except filename and figure
     """
-    start1 = kwargs.get('start1', surface.knotVector1[surface.degree1])
-    stop1 = kwargs.get('stop1', surface.knotVector1[-(surface.degree1 + 1)])
-
-    start2 = kwargs.get('start2', surface.knotVector2[surface.degree2])
-    stop2 = kwargs.get('stop2', surface.knotVector2[-(surface.degree2 + 1)])
-    
-    surfacePoints = surface.Evaluate(start1=start1, stop1=stop1, N1=N1, start2=start2, stop2=stop2, N2=N2)
-    surfacePointXs, surfacePointYs, surfacePointZs = np.zeros((N2, N1)), np.zeros((N2, N1)), np.zeros((N2, N1))
-    for i in range(len(surfacePoints)):
-        for j in range(len(surfacePoints[0])):
-            surfacePointXs[i][j] = surfacePoints[i][j][0]
-            surfacePointYs[i][j] = surfacePoints[i][j][1]
-            surfacePointZs[i][j] = surfacePoints[i][j][2]
-    
-    fig = plt.figure()
-    ax = plt.axes(projection='3d')
-    ax.plot_wireframe(surfacePointXs, surfacePointYs, surfacePointZs, color='black', label='Surface')
-    
-    if showControlPoints == True:
-        controlPointXs, controlPointYs, controlPointZs = [], [], []
-        Pw = gf.WeightedControlPoints(surface.controlPoints, surface.weights, dimension=2)
-        for i in range(len(Pw)):
-            for j in range(len(Pw[0])):
-                controlPointXs.append(surface.controlPoints[i][j][0])
-                controlPointYs.append(surface.controlPoints[i][j][1])
-                controlPointZs.append(surface.controlPoints[i][j][2])
-        ax.scatter3D(controlPointXs, controlPointYs, controlPointZs, color='red', label='Control Points')
-    
-    if showControlPolygon == True:
-        # plotting control polygon 1
-        for i in range(len(surface.controlPoints)):
-            tempXs, tempYs, tempZs = [], [], []
-            for j in range(len(surface.controlPoints[0])):
-                tempXs.append(surface.controlPoints[i][j][0])
-                tempYs.append(surface.controlPoints[i][j][1])
-                tempZs.append(surface.controlPoints[i][j][2])
-            if i == 0:
-                ax.plot(tempXs, tempYs, tempZs, color='blue', alpha=0.3, label='Control Polygon')
-            else:
-                ax.plot(tempXs, tempYs, tempZs, color='blue', alpha=0.3)
-        
-        # plotting control polygon 2
-        for j in range(len(surface.controlPoints[0])):
-            tempXs, tempYs, tempZs = [], [], []
-            for i in range(len(surface.controlPoints)):
-                tempXs.append(surface.controlPoints[i][j][0])
-                tempYs.append(surface.controlPoints[i][j][1])
-                tempZs.append(surface.controlPoints[i][j][2])
-            ax.plot(tempXs, tempYs, tempZs, color='blue', alpha=0.3)
-    
-    if showKnots == True:
-        knotLocations = surface.KnotLocations()
-        knotXs, knotYs, knotZs = [], [], []
-        for i in range(len(knotLocations)):
-            knotXs.append(knotLocations[i][0])
-            knotYs.append(knotLocations[i][1])
-            knotZs.append(knotLocations[i][2])
-        ax.plot(knotXs, knotYs, knotZs, 'gx', label='Knots')
-     
-    ax.set_xlabel("$x$")
-    ax.set_ylabel("$y$")
-    ax.set_zlabel("$z$")
-    plt.legend()
-    plt.show()
+    geometries, filenames = list(geometries), list(filenames)
+    if len(geometries) != len(filenames):
+        raise ValueError("{} geometries but {} filenames".format(len(geometries), len(filenames)))
+    from matplotlib.figure import Figure
+    figure = Figure()
+    for geometry, filename in zip(geometries, filenames):
+        if isinstance(geometry, (gc.BSplineCurve, gc.NURBSCurve)):
+            CurvePlot(geometry, filename=filename, figure=figure, **kwargs)
+        elif isinstance(geometry, gc.NURBSSurface):
+            SurfacePlot(geometry, filename=filename, figure=figure, **kwargs)
+        else:
+            raise TypeError("cannot plot {} objects".format(type(geometry).__name__))
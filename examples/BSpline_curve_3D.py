@@ -1,22 +1,14 @@
-import sys
-import os
-parentPath = os.path.dirname(os.getcwd()) + '/core'
-sys.path.insert(0, parentPath)
-import geom_classes as gc
-import geom_functions as gf
-import visualisation as visual
+from freeformdeformation import geom_classes as gc
+from freeformdeformation import geom_functions as gf
+from freeformdeformation import visualisation as visual
 
-curve = gc.BSplineCurve()
+# define control points, degree of curve and knot vector
+controlPoints = [[1, -3, 2], [1, 2, 1], [2, 1, 0], [3, 3, -2]]
+degree = 3
+knotVector = gf.KnotVector(len(controlPoints), degree)
 
-# define control points
-curve.controlPoints = [[1, -3, 2], [1, 2, 1], [2, 1, 0], [3, 3, -2]]
-
-# define degree of curve
-curve.degree = 3
-
-# define knot vector
-nControlPoints = len(curve.controlPoints)
-curve.knotVector = gf.KnotVector(nControlPoints, curve.degree)
+# create the curve (its inputs are converted to float64 arrays and validated once, here)
+curve = gc.BSplineCurve(controlPoints=controlPoints, degree=degree, knotVector=knotVector)
 
 # create 3D curve plot
 visual.CurvePlot(curve, showControlPoints=True, showKnots=True, dimension='3D', start=0.1, stop=0.9, N=100)
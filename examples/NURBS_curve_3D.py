@@ -1,25 +1,15 @@
-import sys
-import os
-parentPath = os.path.dirname(os.getcwd()) + '/core'
-sys.path.insert(0, parentPath)
-import geom_classes as gc
-import geom_functions as gf
-import visualisation as visual
+from freeformdeformation import geom_classes as gc
+from freeformdeformation import geom_functions as gf
+from freeformdeformation import visualisation as visual
 
-curve = gc.NURBSCurve()
+# define control points, control point weightings, degree of curve and knot vector
+controlPoints = [[1, 1, 2], [1, 4, -2], [2, 5, 0], [3, 3, 1]]
+weights = [1, 3, 1, 8]
+degree = 2
+knotVector = gf.KnotVector(len(controlPoints), degree)
 
-# define control points
-curve.controlPoints = [[1, 1, 2], [1, 4, -2], [2, 5, 0], [3, 3, 1]]
-
-# define control point weightings
-curve.weights = [1, 3, 1, 8]
-
-# define degree of curve
-curve.degree = 2
-
-# define knot vector
-nControlPoints = len(curve.controlPoints)
-curve.knotVector = gf.KnotVector(nControlPoints, curve.degree)
+# create the curve (its inputs are converted to float64 arrays and validated once, here)
+curve = gc.NURBSCurve(controlPoints=controlPoints, weights=weights, degree=degree, knotVector=knotVector)
 
 # create 3D curve plot
 visual.CurvePlot(curve, dimension='3D', start=0.0, stop=1.8)
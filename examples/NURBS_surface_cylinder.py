@@ -1,29 +1,19 @@
-import sys
-import os
-parentPath = os.path.dirname(os.getcwd()) + '/core'
-sys.path.insert(0, parentPath)
-import geom_classes as gc
-import geom_functions as gf
-import visualisation as visual
+from freeformdeformation import geom_classes as gc
+from freeformdeformation import geom_functions as gf
+from freeformdeformation import visualisation as visual
 from math import sqrt
 
-surface = gc.NURBSSurface()
-
 # define control points
-surface.controlPoints = [[[0, 1, 0], [1, 1, 0], [1, 0, 0], [1, -1, 0], [0, -1, 0], [-1, -1, 0], [-1, 0, 0], [-1, 1, 0], [0, 1, 0]],
-                         [[0, 1, 1], [1, 1, 1], [1, 0, 1], [1, -1, 1], [0, -1, 1], [-1, -1, 1], [-1, 0, 1], [-1, 1, 1], [0, 1, 1]]]
+controlPoints = [[[0, 1, 0], [1, 1, 0], [1, 0, 0], [1, -1, 0], [0, -1, 0], [-1, -1, 0], [-1, 0, 0], [-1, 1, 0], [0, 1, 0]],
+                 [[0, 1, 1], [1, 1, 1], [1, 0, 1], [1, -1, 1], [0, -1, 1], [-1, -1, 1], [-1, 0, 1], [-1, 1, 1], [0, 1, 1]]]
 
 # define control point weightings
-surface.weights = [[1, sqrt(2)/2, 1, sqrt(2)/2, 1, sqrt(2)/2, 1, sqrt(2)/2, 1],
-                   [1, sqrt(2)/2, 1, sqrt(2)/2, 1, sqrt(2)/2, 1, sqrt(2)/2, 1]]
-
-# define order of polynomial segments
-surface.degree1 = 1
-surface.degree2 = 2
+weights = [[1, sqrt(2)/2, 1, sqrt(2)/2, 1, sqrt(2)/2, 1, sqrt(2)/2, 1],
+           [1, sqrt(2)/2, 1, sqrt(2)/2, 1, sqrt(2)/2, 1, sqrt(2)/2, 1]]
 
-# calculate knot vectors
-surface.knotVector1 = gf.KnotVector(len(surface.controlPoints), surface.degree1)
-surface.knotVector2 = [0, 0, 0, 1/4, 1/4, 1/2, 1/2, 3/4, 3/4, 1, 1, 1]
+# create the surface: degree 1 along the axis (default knot vector) and degree 2 around it, with double knots at each quarter
+surface = gc.NURBSSurface(controlPoints=controlPoints, weights=weights, degree1=1, degree2=2,
+                          knotVector2=[0, 0, 0, 1/4, 1/4, 1/2, 1/2, 3/4, 3/4, 1, 1, 1])
 
 # create surface plot
 visual.SurfacePlot(surface, N1=50, N2=50)
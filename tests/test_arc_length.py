@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from freeformdeformation import geom_classes as gc
+
+def _Curves():
+    rng = np.random.default_rng(0)
+    controlPoints = np.cumsum(rng.standard_normal((9, 3)), axis=0)
+    return [gc.BSplineCurve(controlPoints=controlPoints, degree=3),
+            gc.NURBSCurve(controlPoints=controlPoints, weights=0.2 + 3 * rng.random(9), degree=4,
+                          knotVector=[0, 0, 0, 0, 0, 0.1, 0.15, 0.7, 0.7, 1, 1, 1, 1, 1])]
+
+def _PolylineLength(curve, start, stop, N=200001):
+    points = curve.EvaluateAt(np.linspace(start, stop, N))
+    return np.sum(np.linalg.norm(np.diff(points, axis=0), axis=1))
+
+@pytest.mark.parametrize('curve', _Curves(), ids=['bspline', 'nurbs'])
+def test_arc_length_matches_a_fine_polyline(curve):
+    lower, upper = curve.ParametricDomain()
+    length = curve.ArcLength()
+    assert abs(length - _PolylineLength(curve, lower[0], upper[0])) <= 1e-8 * length
+    parameters = np.array([lower[0], 0.3, 0.62, upper[0]])
+    expected = [_PolylineLength(curve, lower[0], u) for u in parameters]
+    assert np.allclose(curve.ArcLength(parameters), expected, rtol=1e-8, atol=1e-12)
+
+@pytest.mark.parametrize('curve', _Curves(), ids=['bspline', 'nurbs'])
+@pytest.mark.parametrize('start, stop', [(None, None), (0.2, 0.9)])
+def test_arc_length_parameters_enclose_equal_lengths(curve, start, stop):
+    kwargs = {} if start is None else {'start': start, 'stop': stop}
+    parameters = curve.ArcLengthParameters(21, **kwargs)
+    lower, upper = curve.ParametricDomain()
+    assert np.isclose(parameters[0], lower[0] if start is None else start) and np.isclose(parameters[-1], upper[0] if stop is None else stop)
+    assert np.all(np.diff(parameters) > 0)
+    lengths = np.array([_PolylineLength(curve, a, b, 20001) for a, b in zip(parameters[:-1], parameters[1:])])
+    assert np.allclose(lengths, lengths.mean(), rtol=1e-7, atol=0)
+    assert np.allclose(curve.Evaluate(21, spacing='arclength', **kwargs), curve.EvaluateAt(parameters), rtol=0, atol=1e-14)
+
+def test_arc_length_follows_control_point_changes():
+    curve = _Curves()[1]
+    length = curve.ArcLength()
+    curve.UpdateControlPoints(3, controlPoints=curve.controlPoints[3:4] + 5)
+    assert curve.ArcLength() != length
+    lower, upper = curve.ParametricDomain()
+    assert abs(curve.ArcLength() - _PolylineLength(curve, lower[0], upper[0])) <= 1e-8 * curve.ArcLength()
+    with pytest.raises(ValueError, match='spacing'):
+        curve.Evaluate(10, spacing='chord')
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from freeformdeformation import backends
+
+numba = pytest.importorskip('numba')
+from freeformdeformation import jit_kernels
+
+def _Bands(A, lower, upper):
+    # Returns A in LAPACK band storage, bands[upper + i - j, j] = A[i, j].
+    n = len(A)
+    bands = np.zeros((lower + upper + 1, n))
+    for i in range(n):
+        for j in range(max(0, i - lower), min(n, i + upper + 1)):
+            bands[upper + i - j, j] = A[i, j]
+    return bands
+
+def test_jit_solve_banded_accepts_block_size():
+    rng = np.random.default_rng(0)
+    A = np.diag(4 + rng.random(40)) + np.diag(rng.random(39), 1) + np.diag(rng.random(39), -1)
+    rhs = rng.random((40, 2))
+    x = jit_kernels.SolveBanded(1, 1, _Bands(A, 1, 1), rhs, blockSize=8)
+    assert np.allclose(A @ x, rhs)
+    assert np.allclose(x, backends.ReferenceKernel('SolveBanded')(1, 1, _Bands(A, 1, 1), rhs, blockSize=8))
+
+def test_jit_solve_banded_raises_on_eliminated_zero_pivot():
+    # the diagonal has no zeros, but eliminating the first row leaves a zero pivot in the second
+    A = np.array([[1.0, 1.0, 0.0], [1.0, 1.0, 1.0], [0.0, 1.0, 2.0]])
+    with pytest.raises(np.linalg.LinAlgError):
+        jit_kernels.SolveBanded(1, 1, _Bands(A, 1, 1), np.ones(3))
@@ -0,0 +1,16 @@
+import numpy as np
+from freeformdeformation import geom_classes as gc
+from freeformdeformation.bvh import BoundingVolumeHierarchy
+
+def test_closest_points_match_invert():
+    rng = np.random.default_rng(0)
+    grid = np.stack(np.meshgrid(np.linspace(0, 1, 8), np.linspace(0, 1, 8), indexing='ij'), axis=-1)
+    controlPoints = np.concatenate([grid, 0.3 * rng.random((8, 8, 1))], axis=-1)
+    surface = gc.NURBSSurface(controlPoints=controlPoints, weights=0.5 + rng.random((8, 8)), degree1=3, degree2=3)
+    points = np.concatenate([rng.random((1000, 2)), 0.6 * rng.random((1000, 1)) - 0.15], axis=1)
+    parameters, closest, distances = BoundingVolumeHierarchy(surface).ClosestPoints(points)
+    inverted, converged, iterations = surface.Invert(points)
+    assert converged.mean() > 0.95
+    invertedDistances = np.linalg.norm(surface.EvaluateAt(inverted) - points, axis=1)
+    assert np.allclose(distances[converged], invertedDistances[converged], rtol=0, atol=1e-12)
+    assert np.allclose(parameters[converged], inverted[converged], rtol=0, atol=1e-6)
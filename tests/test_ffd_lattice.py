@@ -0,0 +1,15 @@
+import numpy as np
+import pytest
+from freeformdeformation.ffd_lattice import FFDLattice
+
+def test_ffd_lattice_rejects_degrees_without_enough_control_points():
+    with pytest.raises(ValueError, match='degree1 == 3'):
+        FFDLattice(nControlPoints=(3, 3, 3), degrees=(3, 3, 3))
+
+def test_ffd_lattice_rejects_singular_axes():
+    with pytest.raises(ValueError, match='linearly independent'):
+        FFDLattice(axes=np.zeros((3, 3)))
+
+def test_ffd_lattice_rejects_unknown_keyword_arguments():
+    with pytest.raises(TypeError, match='nControlPionts'):
+        FFDLattice(nControlPionts=(3, 3, 3))
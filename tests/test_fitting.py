@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+from freeformdeformation import fitting
+from freeformdeformation import geom_functions as gf
+
+def _SurfaceData(n1, n2):
+    u, v = np.meshgrid(np.linspace(0, 1, n1), np.linspace(0, 1, n2), indexing='ij')
+    return np.stack([u, v, np.sin(3 * u) * np.cos(2 * v)], axis=-1)
+
+@pytest.mark.parametrize('method', ['uniform', 'chordlength', 'centripetal'])
+def test_interpolated_curve_passes_through_the_data(method):
+    t = np.linspace(0, 2 * np.pi, 40)
+    points = np.stack([np.cos(t), np.sin(2 * t), t], axis=1)
+    curve = fitting.InterpolateCurve(points, degree=3, method=method)
+    assert np.allclose(curve.EvaluateAt(gf.FittingParameters(points, method)), points, rtol=0, atol=1e-10)
+
+def test_approximated_curve_fixes_its_end_points():
+    rng = np.random.default_rng(0)
+    t = np.linspace(0, 1, 200)
+    points = np.stack([t, np.sin(4 * t) + 0.01 * rng.standard_normal(200)], axis=1)
+    curve = fitting.ApproximateCurve(points, 12, degree=3)
+    assert len(curve.controlPoints) == 12
+    assert np.allclose(curve.controlPoints[[0, -1]], points[[0, -1]], rtol=0, atol=1e-12)
+    assert np.max(np.abs(curve.EvaluateAt(gf.FittingParameters(points)) - points)) < 0.05
+
+def test_interpolated_surface_passes_through_the_data():
+    points = _SurfaceData(9, 7)
+    surface = fitting.InterpolateSurface(points, degree1=3, degree2=2)
+    parameters1, parameters2 = fitting._SurfaceParameters(points, 'chordlength')
+    grid = np.stack(np.meshgrid(parameters1, parameters2, indexing='ij'), axis=-1).reshape(-1, 2)
+    assert np.allclose(surface.EvaluateAt(grid), points.reshape(-1, 3), rtol=0, atol=1e-10)
+
+def test_approximated_surface_fixes_its_corner_points():
+    points = _SurfaceData(30, 25)
+    surface = fitting.ApproximateSurface(points, 8, 6)
+    assert surface.controlPoints.shape == (8, 6, 3)
+    corners = np.array([[0, 0], [0, 1], [1, 0], [1, 1]], dtype=float)
+    assert np.allclose(surface.EvaluateAt(corners), points[[0, 0, -1, -1], [0, -1, 0, -1]], rtol=0, atol=1e-12)
+
+def test_solve_banded_matches_a_dense_solve():
+    rng = np.random.default_rng(1)
+    n, lower, upper = 50, 3, 2
+    A = np.zeros((n, n))
+    for offset in range(-lower, upper + 1):
+        A += np.diag(rng.random(n - abs(offset)), offset)
+    A += 4 * np.eye(n)
+    bands = np.zeros((lower + upper + 1, n))
+    for i, j in zip(*np.nonzero(A)):
+        bands[upper + i - j, j] = A[i, j]
+    rhs = rng.random((n, 2))
+    for blockSize in (None, 3, 7):
+        assert np.allclose(gf.SolveBanded(lower, upper, bands, rhs, blockSize), np.linalg.solve(A, rhs))
+
+def test_banded_rows_and_normal_matrix_match_dense_matrices():
+    rng = np.random.default_rng(2)
+    n, degree = 20, 3
+    parameters = np.sort(rng.random(n))
+    parameters[[0, -1]] = 0, 1
+    knotVector = gf.AveragedKnotVector(parameters, degree)
+    firstColumns, B = fitting._Collocation(parameters, knotVector, degree)
+    N = np.zeros((n, n))
+    N[np.arange(n)[:, None], firstColumns[:, None] + np.arange(degree + 1)] = B
+    for (lower, upper, bands), A in ((gf.BandedRows(firstColumns, B, n), N), (gf.BandedNormalMatrix(firstColumns, B, n), N.T @ N)):
+        dense = np.zeros((n, n))
+        for i in range(n):
+            for j in range(max(0, i - lower), min(n, i + upper + 1)):
+                dense[i, j] = bands[upper + i - j, j]
+        assert np.allclose(dense, A)
+
+def test_fitting_rejects_too_few_points():
+    with pytest.raises(ValueError, match='degree == 3'):
+        fitting.InterpolateCurve(np.random.default_rng(0).random((3, 2)), degree=3)
+    with pytest.raises(ValueError, match='cannot be fitted'):
+        fitting.ApproximateCurve(np.random.default_rng(0).random((5, 2)), 6, degree=3)
+
+def test_fitting_rejects_coincident_points():
+    with pytest.raises(ValueError, match='must not coincide'):
+        fitting.InterpolateCurve(np.ones((6, 2)))
+    with pytest.raises(ValueError, match='must not coincide'):
+        fitting.ApproximateCurve(np.ones((10, 2)), 5)
+    with pytest.raises(ValueError, match='must not coincide'):
+        fitting.InterpolateCurve([[0, 0], [1, 0], [1, 0], [2, 1], [3, 0]])
+    with pytest.raises(ValueError, match='coincident points'):
+        fitting.InterpolateSurface(np.ones((5, 5, 3)))
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from freeformdeformation import geom_classes as gc
+from freeformdeformation import geom_functions as gf
+
+def _Geometry(kind, offset):
+    rng = np.random.default_rng(3)
+    if kind == 'bspline':
+        return gc.BSplineCurve(controlPoints=offset + rng.random((15, 3)), degree=3), (1000,)
+    if kind == 'curve':
+        return gc.NURBSCurve(controlPoints=offset + rng.random((15, 3)), weights=0.1 + 5 * rng.random(15), degree=5), (1000,)
+    if kind == 'surface':
+        return gc.NURBSSurface(controlPoints=offset + rng.random((9, 8, 3)), weights=0.1 + 5 * rng.random((9, 8)), degree1=3, degree2=4), (60, 50)
+    return gc.NURBSVolume(controlPoints=offset + rng.random((6, 5, 7, 3)), weights=0.1 + 5 * rng.random((6, 5, 7)), degree1=2, degree2=3, degree3=4), (15, 14, 13)
+
+@pytest.mark.parametrize('kind', ['bspline', 'curve', 'surface', 'volume'])
+@pytest.mark.parametrize('offset', [0, 1000])
+def test_float32_evaluation_is_within_the_rounding_error_bound(kind, offset):
+    geometry, counts = _Geometry(kind, offset)
+    degrees = [degree for knotVector, degree in geometry._directions]
+    bound = gf.RoundingErrorBound(degrees, rational=kind != 'bspline') * np.max(np.abs(geometry.controlPoints))
+    single, double = geometry.Evaluate(*counts, dtype=np.float32), geometry.Evaluate(*counts)
+    assert single.dtype == np.float32
+    assert np.max(np.abs(single - double)) <= bound
+    lower, upper = geometry.ParametricDomain()
+    parameters = lower + (upper - lower) * np.random.default_rng(4).random((500, len(lower)))
+    if len(lower) == 1:
+        parameters = parameters[:, 0]
+    single, double = geometry.EvaluateAt(parameters, dtype=np.float32), geometry.EvaluateAt(parameters)
+    assert single.dtype == np.float32
+    assert np.max(np.abs(single - double)) <= bound
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from freeformdeformation import geom_classes as gc
+
+def test_tessellate_rejects_volumes():
+    volume = gc.NURBSVolume(controlPoints=np.random.default_rng(0).random((4, 4, 4, 3)), degree1=3, degree2=3, degree3=3)
+    with pytest.raises(TypeError):
+        volume.Tessellate()
+
+@pytest.mark.parametrize('seed', [0, 4])
+def test_invert_reports_converged_only_for_closest_points(seed):
+    # random rational curves that come back close to themselves, checked against a dense sampling of the curve
+    rng = np.random.default_rng(seed)
+    curve = gc.NURBSCurve(controlPoints=rng.random((12, 2)), weights=0.5 + rng.random(12), degree=3)
+    points = rng.random((500, 2))
+    parameters, converged, iterations = curve.Invert(points)
+    distances = np.linalg.norm(curve.EvaluateAt(parameters[:, None]) - points, axis=1)
+    dense = curve.Evaluate(20000)
+    closest = np.sqrt(np.min(np.sum(points ** 2, axis=1)[:, None] - 2 * points @ dense.T + np.sum(dense ** 2, axis=1), axis=1))
+    assert converged.mean() > 0.9
+    assert np.all(distances[converged] <= closest[converged] + 1e-6)
+
+def test_invert_converges_to_the_end_of_a_curve():
+    curve = gc.BSplineCurve(controlPoints=[[0, 0], [1, 1], [2, 0], [3, 1]], degree=3)
+    parameters, converged, iterations = curve.Invert([[-1, -0.5], [4, 1.5]])
+    assert np.all(converged)
+    lower, upper = curve.ParametricDomain()
+    assert np.allclose(parameters, [lower[0], upper[0]])
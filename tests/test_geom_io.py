@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from freeformdeformation import geom_classes as gc
+from freeformdeformation import geom_io
+from freeformdeformation.ffd_lattice import FFDLattice
+
+def _Geometries():
+    rng = np.random.default_rng(0)
+    curve = gc.NURBSCurve(controlPoints=rng.random((7, 3)), weights=0.5 + rng.random(7), degree=3)
+    surface = gc.NURBSSurface(controlPoints=rng.random((5, 6, 3)), weights=0.5 + rng.random((5, 6)), degree1=2, degree2=3)
+    return {'curve': curve, 'surface': surface}
+
+@pytest.mark.parametrize('name', ['curve', 'surface'])
+@pytest.mark.parametrize('basisMatrices', [False, True])
+def test_geometries_round_trip(tmp_path, name, basisMatrices):
+    geometry = _Geometries()[name]
+    expected = geometry.Evaluate()
+    geom_io.Save(tmp_path / 'geometry.ffd', geometry, basisMatrices=basisMatrices)
+    loaded = geom_io.Load(tmp_path / 'geometry.ffd')
+    assert type(loaded) is type(geometry)
+    for attribute in geometry._netAttributes + geometry._basisAttributes:
+        assert np.array_equal(getattr(loaded, attribute), getattr(geometry, attribute))
+    assert len(loaded.basisCache) == (len(geometry.basisCache) if basisMatrices else 0)
+    assert np.array_equal(loaded.Evaluate(), expected)
+    assert loaded.basisCache.misses == (0 if basisMatrices else len(geometry.basisCache))
+
+def test_ffd_lattice_round_trips_with_its_embedding(tmp_path):
+    lattice = FFDLattice(nControlPoints=(4, 5, 4), degrees=(3, 2, 3), origin=[1, 0, 0], axes=[[2, 0, 0], [0, 1, 0], [0, 0, 3]])
+    points = np.random.default_rng(1).random((100, 3)) * [2, 1, 3] + [1, 0, 0]
+    lattice.Embed(points)
+    lattice.UpdateControlPoints((1, 2, 1), [[1.5, 0.6, 1.2]])
+    geom_io.Save(tmp_path / 'lattice.ffd', lattice)
+    loaded = geom_io.Load(tmp_path / 'lattice.ffd')
+    assert isinstance(loaded, FFDLattice)
+    for attribute in geom_io.FFD_ATTRIBUTES:
+        assert np.array_equal(getattr(loaded, attribute), getattr(lattice, attribute))
+    assert np.array_equal(loaded.Deform(), lattice.Deform())
+
+def test_tessellation_and_array_round_trip(tmp_path):
+    tessellation = _Geometries()['surface'].Tessellate(tolerance=1e-2)
+    geom_io.Save(tmp_path / 'mesh.ffd', tessellation)
+    loaded = geom_io.Load(tmp_path / 'mesh.ffd')
+    for attribute in ('parameters', 'vertices', 'triangles'):
+        assert np.array_equal(getattr(loaded, attribute), getattr(tessellation, attribute))
+    assert all(np.array_equal(a, b) for a, b in zip(loaded.breaks, tessellation.breaks))
+    assert (loaded.deviation, loaded.evaluations) == (tessellation.deviation, tessellation.evaluations)
+    array = np.random.default_rng(2).random((10, 4)).astype(np.float32)
+    geom_io.Save(tmp_path / 'array.ffd', array)
+    loaded = geom_io.Load(tmp_path / 'array.ffd')
+    assert loaded.dtype == np.float32 and np.array_equal(loaded, array)
+
+@pytest.mark.parametrize('size', [4, 12, 40, -8])
+def test_truncated_files_are_rejected(tmp_path, size):
+    geom_io.Save(tmp_path / 'curve.ffd', _Geometries()['curve'])
+    data = (tmp_path / 'curve.ffd').read_bytes()
+    (tmp_path / 'truncated.ffd').write_bytes(data[:size] if size > 0 else data[:len(data) + size - 64])
+    with pytest.raises(ValueError, match='not a geometry file|truncated'):
+        geom_io.Load(tmp_path / 'truncated.ffd')
+
+def test_files_without_the_magic_number_are_rejected(tmp_path):
+    geom_io.Save(tmp_path / 'curve.ffd', _Geometries()['curve'])
+    data = (tmp_path / 'curve.ffd').read_bytes()
+    (tmp_path / 'other.ffd').write_bytes(b'NOTGEOM\x00' + data[8:])
+    with pytest.raises(ValueError, match='not a geometry file'):
+        geom_io.Load(tmp_path / 'other.ffd')
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from freeformdeformation import geom_classes as gc
+from freeformdeformation.geom_batch import GeometryBatch
+
+def _Members(kind, n, size=3, seed=0):
+    rng = np.random.default_rng(seed)
+    if kind == 'curve':
+        return [gc.NURBSCurve(controlPoints=rng.random((n, 3)), weights=0.5 + rng.random(n), degree=3) for i in range(size)]
+    if kind == 'bspline':
+        return [gc.BSplineCurve(controlPoints=rng.random((n, 2)), degree=2) for i in range(size)]
+    if kind == 'surface':
+        return [gc.NURBSSurface(controlPoints=rng.random((n, 5, 3)), weights=0.5 + rng.random((n, 5)), degree1=3, degree2=2) for i in range(size)]
+    return [gc.NURBSVolume(controlPoints=rng.random((n, 4, 5, 3)), weights=0.5 + rng.random((n, 4, 5)), degree1=2, degree2=3, degree3=2) for i in range(size)]
+
+# 300 control points of degree 3 are past the dense threshold of 64 * (degree + 1) == 256 columns; denseRatio = 0 forces
+# the sparse contraction for every direction
+@pytest.mark.parametrize('kind, n', [('curve', 10), ('curve', 300), ('bspline', 12), ('surface', 8), ('volume', 6)])
+@pytest.mark.parametrize('denseRatio', [None, 0])
+def test_batch_matches_member_evaluation(kind, n, denseRatio):
+    members = _Members(kind, n)
+    batch = GeometryBatch(members)
+    if denseRatio is not None:
+        batch._denseRatio = denseRatio
+    counts = {'curve': (57,), 'bspline': (57,), 'surface': (13, 11), 'volume': (7, 6, 5)}[kind]
+    expected = np.stack([member.Evaluate(*counts) for member in members])
+    assert np.allclose(batch.Evaluate(*counts), expected, rtol=0, atol=1e-12)
+    assert np.allclose(batch.Evaluate(*counts, dtype=np.float32), expected, rtol=0, atol=1e-5)
+    lower, upper = members[0].ParametricDomain()
+    parameters = lower + (upper - lower) * np.random.default_rng(1).random((40, len(lower)))
+    expected = np.stack([member.EvaluateAt(parameters if len(lower) > 1 else parameters[:, 0]) for member in members])
+    assert np.allclose(batch.EvaluateAt(parameters), expected, rtol=0, atol=1e-12)
+
+def test_batch_members_round_trip():
+    members = _Members('surface', 6)
+    batch = GeometryBatch(members)
+    assert len(batch) == len(members)
+    for member, copy in zip(members, (batch[i] for i in range(len(batch)))):
+        assert np.allclose(copy.controlPoints, member.controlPoints) and np.allclose(copy.weights, member.weights)
+    fromArrays = GeometryBatch.FromArrays(members[0], batch.controlPoints, batch.weights)
+    assert np.allclose(fromArrays.Evaluate(9, 8), batch.Evaluate(9, 8), rtol=0, atol=1e-14)
+
+def test_batch_rejects_incompatible_members():
+    curves = _Members('curve', 8)
+    other = curves[1]
+    with pytest.raises(ValueError, match='different knotVector'):
+        GeometryBatch([curves[0], gc.NURBSCurve(controlPoints=other.controlPoints, weights=other.weights, degree=3,
+                                                   knotVector=[0, 0, 0, 0, 0.2, 0.5, 0.6, 1, 1, 1, 1, 1])])
+    with pytest.raises(ValueError, match='different knotVector|different degree'):
+        GeometryBatch([curves[0], gc.NURBSCurve(controlPoints=other.controlPoints, weights=other.weights, degree=2)])
+    with pytest.raises(ValueError, match='controlPoints of shape'):
+        GeometryBatch([curves[0], _Members('curve', 9)[0]])
+    with pytest.raises(TypeError, match='not a NURBSCurve'):
+        GeometryBatch([curves[0], _Members('bspline', 8)[0]])
+    with pytest.raises(ValueError, match='at least one'):
+        GeometryBatch([])
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from freeformdeformation import geom_classes as gc
+from freeformdeformation.ffd_lattice import FFDLattice
+
+def _Geometry(kind, rng):
+    if kind == 'curve':
+        return gc.NURBSCurve(controlPoints=rng.random((12, 3)), weights=0.5 + rng.random(12), degree=3), (200,)
+    if kind == 'bspline':
+        return gc.BSplineCurve(controlPoints=rng.random((12, 2)), degree=3), (200,)
+    if kind == 'surface':
+        return gc.NURBSSurface(controlPoints=rng.random((10, 8, 3)), weights=0.5 + rng.random((10, 8)), degree1=3, degree2=2), (40, 30)
+    return gc.NURBSVolume(controlPoints=rng.random((7, 6, 5, 3)), weights=0.5 + rng.random((7, 6, 5)), degree1=3, degree2=2, degree3=2), (14, 12, 10)
+
+def _RecordPatches(monkeypatch, geometry):
+    # Returns the list that the results of every later _PatchGrid call on geometry's class are appended to.
+    patched, PatchGrid = [], type(geometry)._PatchGrid
+    
+    def RecordedPatchGrid(self, *args):
+        patched.append(PatchGrid(self, *args))
+        return patched[-1]
+    
+    monkeypatch.setattr(type(geometry), '_PatchGrid', RecordedPatchGrid)
+    return patched
+
+@pytest.mark.parametrize('kind', ['curve', 'bspline', 'surface', 'volume'])
+@pytest.mark.parametrize('dtype, tolerance', [(np.float64, 1e-13), (np.float32, 1e-5)])
+def test_incremental_evaluation_matches_a_fresh_one(monkeypatch, kind, dtype, tolerance):
+    rng = np.random.default_rng(0)
+    geometry, counts = _Geometry(kind, rng)
+    patched = _RecordPatches(monkeypatch, geometry)
+    shape = geometry.controlPoints.shape
+    result = geometry.Evaluate(*counts, incremental=True, dtype=dtype)
+    assert result.dtype == dtype and not result.flags.writeable
+    
+    def Check():
+        updated = geometry.Evaluate(*counts, incremental=True, dtype=dtype)
+        assert updated is result
+        assert np.allclose(updated, geometry.Evaluate(*counts, dtype=dtype), rtol=0, atol=tolerance)
+    
+    # a few moved control points are patched into the kept result
+    indices = [tuple(rng.integers(0, n) for n in shape[:-1]) for i in range(2)]
+    geometry.UpdateControlPoints(indices if len(shape) > 2 else [i[0] for i in indices], controlPoints=rng.random((2, shape[-1])))
+    Check()
+    assert patched == [True]
+    if kind != 'bspline':
+        corner = (0,) * (len(shape) - 1)
+        geometry.UpdateControlPoints(corner if len(shape) > 2 else 0, weights=[2.5])
+        Check()
+        geometry.UpdateControlPoints(indices[0] if len(shape) > 2 else indices[0][0], controlPoints=rng.random((1, shape[-1])), weights=[0.7])
+        Check()
+    # reassigning the whole net is not tracked, so the kept result is evaluated again in place
+    count = len(patched)
+    geometry.controlPoints = rng.random(shape)
+    Check()
+    assert len(patched) == count
+    # edits after an untracked change are patched again
+    geometry.UpdateControlPoints(indices if len(shape) > 2 else [i[0] for i in indices], controlPoints=rng.random((2, shape[-1])))
+    Check()
+    assert patched[-1] is True
+
+def test_changing_every_control_point_evaluates_the_whole_grid(monkeypatch):
+    rng = np.random.default_rng(1)
+    geometry, counts = _Geometry('surface', rng)
+    patched = _RecordPatches(monkeypatch, geometry)
+    result = geometry.Evaluate(*counts, incremental=True)
+    shape = geometry.controlPoints.shape
+    indices = [(i, j) for i in range(shape[0]) for j in range(shape[1])]
+    geometry.UpdateControlPoints(indices, controlPoints=rng.random((len(indices), 3)))
+    assert geometry.Evaluate(*counts, incremental=True) is result
+    assert patched == [False]
+    assert np.allclose(result, geometry.Evaluate(*counts), rtol=0, atol=1e-13)
+
+def test_incremental_deformation_matches_a_fresh_one():
+    rng = np.random.default_rng(2)
+    lattice = FFDLattice(nControlPoints=(6, 5, 5), degrees=(3, 2, 2))
+    lattice.Embed(rng.random((500, 3)))
+    deformed = lattice.Deform(incremental=True)
+    for i in range(3):
+        lattice.UpdateControlPoints(tuple(rng.integers(0, 5, 3)), controlPoints=rng.random((1, 3)))
+        assert lattice.Deform(incremental=True) is deformed
+        assert np.allclose(deformed, lattice.Deform(), rtol=0, atol=1e-14)
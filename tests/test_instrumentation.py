@@ -0,0 +1,23 @@
+import subprocess
+import sys
+
+# Each check runs in a fresh interpreter, so that the lazily imported modules are imported in the order it describes.
+
+def _Run(code):
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+def test_disable_restores_kernels_when_backends_is_imported_after_enable():
+    _Run('''
+import freeformdeformation as ffd
+from freeformdeformation import geom_functions as gf
+FindSpans = gf.FindSpans
+ffd.instrumentation.Enable()
+backends = ffd.backends
+ffd.instrumentation.Disable()
+assert backends.ReferenceKernel('FindSpans') is FindSpans
+backends.SetBackend('numpy')
+assert gf.FindSpans is FindSpans
+ffd.instrumentation.Reset()
+ffd.BSplineCurve(controlPoints=[[0, 0], [1, 1], [2, 0], [3, 1]], degree=3).Evaluate(10)
+assert ffd.instrumentation.Report()['kernels'] == {}
+''')
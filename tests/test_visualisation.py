@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from freeformdeformation import geom_classes as gc
+
+pytest.importorskip('matplotlib')
+from freeformdeformation import visualisation
+
+def _CountEvaluatedPoints(monkeypatch, geometry):
+    # Returns a list that collects the shape of every array the geometry's Evaluate returns.
+    shapes = []
+    Evaluate = type(geometry).Evaluate
+    def CountingEvaluate(self, *args, **kwargs):
+        points = Evaluate(self, *args, **kwargs)
+        shapes.append(points.shape)
+        return points
+    monkeypatch.setattr(type(geometry), 'Evaluate', CountingEvaluate)
+    return shapes
+
+def test_surface_plot_evaluates_no_more_lines_than_it_draws(monkeypatch, tmp_path):
+    rng = np.random.default_rng(0)
+    surface = gc.NURBSSurface(controlPoints=rng.random((5, 5, 3)), degree1=3, degree2=3)
+    shapes = _CountEvaluatedPoints(monkeypatch, surface)
+    visualisation.SurfacePlot(surface, N1=2000, N2=2000, maxLines=40, filename=str(tmp_path / 'surface.png'))
+    assert shapes == [(40, 40, 3)]
+
+def test_curve_plot_evaluates_no_more_points_than_it_draws(monkeypatch, tmp_path):
+    curve = gc.BSplineCurve(controlPoints=[[0, 0], [1, 1], [2, 0], [3, 1]], degree=3)
+    shapes = _CountEvaluatedPoints(monkeypatch, curve)
+    visualisation.CurvePlot(curve, dimension='2D', N=100000, maxPoints=500, filename=str(tmp_path / 'curve.png'))
+    visualisation.CurvePlot(curve, dimension='2D', N=300, maxPoints=None, filename=str(tmp_path / 'curve.png'))
+    assert [shape[0] for shape in shapes] == [500, 300]